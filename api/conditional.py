@@ -0,0 +1,44 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified validators from row revisions.
+
+    Viewsets implement `get_revision()`, returning (key, updated_at) for the
+    representation about to be served, found with one indexed lookup, or
+    None when validators do not apply. `conditional_response()` answers a
+    matching If-None-Match / If-Modified-Since with 304 before anything is
+    loaded or serialized, and adds the validators to full responses.
+    """
+
+    def get_revision(self):
+        return None
+
+    def conditional_response(self, request, respond):
+        try:
+            revision = self.get_revision()
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup: the normal path answers 404/400
+            revision = None
+        if revision is None:
+            return respond()
+
+        key, updated_at = revision
+        # The representation also depends on the negotiated format
+        digest = hashlib.sha1(repr((key, request.accepted_renderer.format)).encode("utf-8"))
+        etag = f'"{digest.hexdigest()}"'
+        last_modified = int(updated_at.timestamp())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
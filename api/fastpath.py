@@ -0,0 +1,133 @@
+"""
+Read-only fast path for hot list endpoints.
+
+A ValuesSerializer reads a ModelSerializer's fields once and builds the
+same representation straight from .values() rows: plain columns are copied,
+and only fields whose representation differs from the database value
+(datetimes, files) go through the field's own conversion. Tag lists are
+collected for the whole page with one query. Pages come out identical to
+the ModelSerializer's output (`python manage.py bench_list_serializers`
+checks the JSON byte for byte and measures both).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework import serializers
+from taggit.serializers import TagList, TagListSerializerField
+
+# Fields whose representation is the database value itself
+PLAIN_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+
+class ValuesSerializer:
+    """
+    List rows of `serializer_class` built from a queryset's .values().
+
+    Serializers declare their SerializerMethodFields in `fast_fields`, a
+    dict of field name to (columns, function of the row dict).
+    """
+
+    def __init__(self, serializer_class, context=None):
+        serializer = serializer_class(context=context or {})
+        computed = getattr(serializer_class, 'fast_fields', {})
+        self.columns = {'id'}
+        self.plan = []
+        self.tag_fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in computed:
+                columns, function = computed[name]
+                self.columns.update(columns)
+                self.plan.append((name, None, function))
+            elif isinstance(field, TagListSerializerField):
+                self.tag_fields.append((name, field.source))
+                self.plan.append((name, None, None))
+            elif isinstance(field, serializers.FileField):
+                self.columns.add(field.source)
+                self.plan.append((name, field.source, self._file_converter(field)))
+            elif isinstance(field, serializers.DateTimeField):
+                self.columns.add(field.source)
+                self.plan.append((name, field.source, field.to_representation))
+            elif isinstance(field, serializers.FloatField):
+                self.columns.add(field.source)
+                self.plan.append((name, field.source, float))
+            elif isinstance(field, PLAIN_FIELDS):
+                self.columns.add(field.source)
+                self.plan.append((name, field.source, None))
+            else:
+                raise TypeError(f"{serializer_class.__name__}.{name}: no fast path for {type(field).__name__}")
+
+    @staticmethod
+    def _file_converter(field):
+        storage = field.parent.Meta.model._meta.get_field(field.source).storage
+        request = field.context.get('request')
+
+        def convert(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+
+    def values(self, queryset):
+        """The queryset as dicts holding every column the rows need."""
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def _tags(self, model, source, pks):
+        """Tag names per object for the page, in the order a prefetch yields them."""
+        # The very queryset prefetch_related('tags') runs, so the order matches
+        instances = [model(pk=pk) for pk in pks]
+        queryset = getattr(model, source).get_prefetch_querysets(instances)[0]
+        names = defaultdict(list)
+        for tag in queryset:
+            names[tag._prefetch_related_val].append(tag.name)
+        return names
+
+    def rows(self, values, model):
+        values = list(values)
+        tags = {
+            name: self._tags(model, source, [row['id'] for row in values])
+            for name, source in self.tag_fields
+        } if values else {}
+
+        rows = []
+        for row in values:
+            data = {}
+            for name, column, convert in self.plan:
+                if column is None:
+                    if convert is not None:
+                        data[name] = convert(row)
+                    else:
+                        data[name] = TagList(tags[name].get(row['id'], []))
+                    continue
+                value = row[column]
+                data[name] = value if convert is None or value is None else convert(value)
+            rows.append(data)
+        return rows
+
+
+class FastListMixin:
+    """
+    Viewset helper serving a list page through a ValuesSerializer.
+
+    API_FAST_LIST_SERIALIZERS = False falls back to the ModelSerializers.
+    """
+
+    def fast_list_response(self, queryset, serializer_class=None, context=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        if context is None:
+            context = self.get_serializer_context()
+        if not settings.API_FAST_LIST_SERIALIZERS:
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(serializer_class(page, many=True, context=context).data)
+
+        fast = ValuesSerializer(serializer_class, context)
+        page = self.paginate_queryset(fast.values(queryset))
+        return self.get_paginated_response(fast.rows(page, queryset.model))
@@ -0,0 +1,168 @@
+import base64
+import binascii
+import bisect
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor ("keyset") pagination.
+
+    Rows are ordered by the view's cursor ordering, e.g. ('submitted_at', 'id'),
+    whose last field must be unique. The cursor encodes the ordering values
+    of the last row of a page and the next page is fetched with a
+    `WHERE (ordering) > (cursor)` filter and LIMIT page_size + 1, so deep
+    pages cost the same as the first one and no COUNT(*) is ever run.
+
+    Views choose the ordering with `get_cursor_ordering()` or a
+    `cursor_ordering` attribute; it should be backed by an index.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    default_ordering = ('id',)
+
+    def get_ordering(self, view):
+        if hasattr(view, 'get_cursor_ordering'):
+            return tuple(view.get_cursor_ordering())
+        return tuple(getattr(view, 'cursor_ordering', self.default_ordering))
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested is not None and requested.isdigit() and int(requested) > 0:
+            page_size = int(requested)
+        return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        model = getattr(queryset, 'model', None) or getattr(getattr(view, 'queryset', None), 'model', None)
+        position = self.decode_cursor(request, model)
+
+        if isinstance(queryset, (list, tuple)):
+            rows = self._paginate_sequence(queryset, position)
+        else:
+            queryset = queryset.order_by(*self.ordering)
+            if position is not None:
+                queryset = queryset.filter(self._after(position))
+            rows = list(queryset[:self.page_size + 1])
+
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            self.next_position = [
+                _value(rows[-1], field.lstrip('-')) for field in self.ordering
+            ]
+        return rows
+
+    def _paginate_sequence(self, rows, position):
+        """Page through an in-memory sequence already sorted by the (ascending) ordering."""
+        fields = self.ordering
+        if any(field.startswith('-') for field in fields):
+            raise ValueError("In-memory pagination only supports ascending orderings")
+        start = 0
+        if position is not None:
+            start = bisect.bisect_right(
+                rows, tuple(position),
+                key=lambda row: tuple(_value(row, field) for field in fields)
+            )
+        return list(rows[start:start + self.page_size + 1])
+
+    def _after(self, position):
+        """Q object selecting rows strictly after `position` in the ordering."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request, model=None):
+        """
+        The position encoded in the request's cursor, or None.
+
+        Each value has to suit its ordering field of `model`: an integer for
+        integer fields, an ISO 8601 string for datetime fields. Anything else
+        is answered with 404 instead of reaching the query.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError, binascii.Error, UnicodeError):
+            raise NotFound("Invalid cursor")
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound("Invalid cursor")
+        position = [
+            self._cursor_value(model, field.lstrip('-'), value)
+            for field, value in zip(self.ordering, position)
+        ]
+        if None in position:
+            raise NotFound("Invalid cursor")
+        return position
+
+    @staticmethod
+    def _cursor_value(model, name, value):
+        """`value` decoded for the ordering field `name`, or None if it does not fit."""
+        field = None
+        if model is not None:
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            return None
+        if isinstance(field, models.DateTimeField) or (field is None and isinstance(value, str)):
+            try:
+                return parse_datetime(value) if isinstance(value, str) else None
+            except ValueError:
+                return None
+        if field is None or isinstance(field, models.IntegerField):
+            return value if isinstance(value, int) else None
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            return None
+
+    def encode_cursor(self, position):
+        payload = json.dumps([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in position
+        ])
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
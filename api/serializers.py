@@ -1,18 +1,46 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
+from django.urls import reverse
 from rest_framework import serializers
 from taggit.serializers import TagListSerializerField
 
 from jobsafi.models import (
     Employer,
     Job,
+    JobAnalytics,
     ScreeningQuestion,
     TemplateQuestion,
     Candidate,
+    ExportTask,
     CandidateAnswer,
     CandidateResponse,
 )
+from jobsafi.autotag import resolve_tags
+from jobsafi.template_index import normalize_tag
+from jobsafi.text import text_fingerprint
 
 
-class EmployerSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Serializers declare the select_related/prefetch_related plan their
+    fields need, and viewsets apply it to their querysets so that a page
+    of results costs a fixed number of queries.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
+
+class EmployerSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    prefetch_related_fields = ('groups', 'user_permissions')
+
     class Meta:
         model = Employer
         fields = "__all__"
@@ -30,13 +58,38 @@ class EmployerSerializer(serializers.ModelSerializer):
 
 
 # Basic Job Serializer (for listings)
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     tags = TagListSerializerField(required=False)  # Add required=False
+    # Mean answer score from the job's materialized analytics
+    average_score = serializers.SerializerMethodField()
+    select_related_fields = ('analytics',)
+    prefetch_related_fields = ('tags',)
+    fast_fields = {
+        'average_score': (
+            ('analytics__score_sum', 'analytics__scored_count'),
+            lambda row: row['analytics__score_sum'] / row['analytics__scored_count']
+            if row['analytics__scored_count'] else None,
+        ),
+    }
     
     class Meta:
         model = Job
-        fields = ['id', 'title', 'description', 'seniority', 'employer', 'tags']
+        fields = ['id', 'title', 'description', 'seniority', 'employer', 'tags',
+                  'candidate_count', 'response_count', 'average_score']
+        read_only_fields = ['candidate_count', 'response_count']
         
+    def get_average_score(self, obj):
+        try:
+            return obj.analytics.mean_score
+        except JobAnalytics.DoesNotExist:
+            return None
+
+    @staticmethod
+    def resolve_tags(names):
+        # Matched case-insensitively, like the tags auto-tagging adds, so
+        # "Python" does not sit next to "python"
+        return list(resolve_tags({normalize_tag(name) for name in names} - {''}).values())
+    
     def create(self, validated_data):
         # Extract tags from validated_data
         tags = validated_data.pop('tags', [])
@@ -44,9 +97,9 @@ class JobSerializer(serializers.ModelSerializer):
         # Create the job instance
         job = Job.objects.create(**validated_data)
         
-        # Add tags to the job
+        # Add tags to the job (add, so tags found by auto-tagging are kept)
         if tags:
-            job.tags.set(tags)
+            job.tags.add(*self.resolve_tags(tags))
         
         return job
     
@@ -54,63 +107,126 @@ class JobSerializer(serializers.ModelSerializer):
         # Extract tags from validated_data
         tags = validated_data.pop('tags', None)
         
+        # Update tags if provided; auto-tagging on save only adds tags
+        # matched by changed title/description text, so removals stick
+        if tags is not None:
+            instance.tags.set(self.resolve_tags(tags))
+
         # Update other fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
         
-        # Update tags if provided
-        if tags is not None:
-            instance.tags.set(tags)
-        
         return instance
 
-class ScreeningQuestionSerializer(serializers.ModelSerializer):
+class ScreeningQuestionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """A question as anyone may see it (no grading key)"""
+    duplicate_error = {"text": ["This job already has this question."]}
+
     class Meta:
         model = ScreeningQuestion
-        fields = "__all__"
+        fields = ['id', 'job', 'text', 'is_custom', 'is_approved', 'rating']
+
+    def validate(self, attrs):
+        """Reject a question whose normalized text the job already has"""
+        job = attrs.get('job', getattr(self.instance, 'job', None))
+        text = attrs.get('text', getattr(self.instance, 'text', None))
+        if job is not None and text is not None:
+            duplicates = ScreeningQuestion.objects.filter(
+                job=job, fingerprint=text_fingerprint(text)
+            )
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError(self.duplicate_error)
+        return attrs
+
+    def create(self, validated_data):
+        # A concurrent request may add the same question after validate():
+        # the unique fingerprint constraint turns that into the same 400
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(self.duplicate_error)
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(self.duplicate_error)
+
+class ScreeningQuestionOwnerSerializer(ScreeningQuestionSerializer):
+    """A question as its job's owner sees it, with what auto-scoring grades against"""
+    class Meta(ScreeningQuestionSerializer.Meta):
+        fields = ScreeningQuestionSerializer.Meta.fields + [
+            'position', 'expected_keywords', 'reference_answer', 'revision', 'updated_at',
+        ]
 
 # Detailed Job Serializer (includes questions)
-class JobDetailSerializer(serializers.ModelSerializer):
-    questions = serializers.SerializerMethodField() 
+class JobDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    # Filled by the Prefetch in setup_eager_loading
+    questions = ScreeningQuestionSerializer(source='visible_questions', many=True, read_only=True)
     tags = TagListSerializerField()
     
     class Meta:
         model = Job
         fields = ['id', 'title', 'description', 'seniority', 'employer', 'questions', 'tags']
     
-    def get_questions(self, obj):
-        """Return questions based on user authentication and ownership"""
-        request = self.context.get('request')
-        
-        if request and request.user.is_authenticated and obj.employer == request.user:
-            # Job owner sees all questions
-            questions = obj.questions.all()
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        """Prefetch the questions the user may see: all for the job owner, approved otherwise"""
+        questions = ScreeningQuestion.objects.order_by('position', 'id')
+        if request and request.user.is_authenticated:
+            questions = questions.filter(Q(is_approved=True) | Q(job__employer=request.user))
         else:
-            # Public users only see approved questions
-            questions = obj.questions.filter(is_approved=True)
+            questions = questions.filter(is_approved=True)
         
-        return ScreeningQuestionSerializer(questions, many=True).data
+        return queryset.prefetch_related(
+            'tags',
+            Prefetch('questions', queryset=questions, to_attr='visible_questions'),
+        )
 
 
+class JobOwnerDetailSerializer(JobDetailSerializer):
+    questions = ScreeningQuestionOwnerSerializer(source='visible_questions', many=True, read_only=True)
 
-class TemplateQuestionSerializer(serializers.ModelSerializer):
+
+
+class TemplateQuestionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = TemplateQuestion
-        fields = "__all__"
+        exclude = ["fingerprint", "minhash"]
+
+    def validate(self, attrs):
+        """Reject a template whose normalized text its tag already has"""
+        tag = attrs.get('tag', getattr(self.instance, 'tag', None))
+        text = attrs.get('template_text', getattr(self.instance, 'template_text', None))
+        if tag is not None and text is not None:
+            duplicates = TemplateQuestion.objects.filter(
+                tag=tag.strip().lower(), fingerprint=text_fingerprint(text)
+            )
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError(
+                    {"template_text": "This tag already has this template."}
+                )
+        return attrs
 
 
-class CandidateSerializer(serializers.ModelSerializer):
+class CandidateSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Candidate
         fields = "__all__"
 
 
-class CandidateAnswerSerializer(serializers.ModelSerializer):
+class CandidateAnswerSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = CandidateAnswer
-        fields = ["id", "response", "question", "answer_text", "score"]
-        read_only_fields = ["id", "response", "question", "answer_text"]
+        fields = ["id", "response", "question", "answer_text", "score", "auto_scored"]
+        read_only_fields = ["id", "response", "question", "answer_text", "auto_scored"]
 
     def create(self, validated_data):
         # Auto-set response from URL parameter
@@ -119,10 +235,18 @@ class CandidateAnswerSerializer(serializers.ModelSerializer):
             validated_data['response_id'] = response_id
         return super().create(validated_data)
 
+    def update(self, instance, validated_data):
+        # A score set by a reviewer replaces any auto score
+        if 'score' in validated_data:
+            validated_data['auto_scored'] = False
+        return super().update(instance, validated_data)
+
 
-class CandidateResponseSerializer(serializers.ModelSerializer):
+class CandidateResponseSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     candidate = CandidateSerializer()  # allow nested create
     answers = CandidateAnswerSerializer(many=True, required=False)
+    select_related_fields = ('candidate',)
+    prefetch_related_fields = ('answers',)
 
     class Meta:
         model = CandidateResponse
@@ -145,8 +269,79 @@ class CandidateResponseSerializer(serializers.ModelSerializer):
         for ans in answers_data:
             CandidateAnswer.objects.create(response=response, **ans)
 
-        # Recalculate score
-        response.overall_score = response.calculate_overall_score()
-        response.save()
+        # Answer scores were applied to the running totals on save
+        response.refresh_from_db(fields=['score_sum', 'scored_count', 'overall_score'])
+
+        return response
 
-        return response
\ No newline at end of file
+
+class CandidateSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Candidate
+        fields = ['id', 'name', 'email']
+
+
+class RankedResponseSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """A ranked response with its candidate, without the answers"""
+    candidate = CandidateSummarySerializer(read_only=True)
+    select_related_fields = ('candidate',)
+
+    class Meta:
+        model = CandidateResponse
+        fields = ['id', 'candidate', 'overall_score', 'scored_count', 'submitted_at']
+
+
+class BulkQuestionUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    is_approved = serializers.BooleanField(required=False)
+    rating = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if not {'is_approved', 'rating'} & set(attrs):
+            raise serializers.ValidationError("Give is_approved and/or rating.")
+        return attrs
+
+
+class JobQuestionsSerializer(serializers.Serializer):
+    job = serializers.PrimaryKeyRelatedField(queryset=Job.objects.all())
+
+
+class QuestionOrderSerializer(JobQuestionsSerializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_ids(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Each question may appear only once.")
+        return value
+
+
+class AnswerScoreSerializer(serializers.Serializer):
+    answer_id = serializers.IntegerField()
+    score = serializers.IntegerField(allow_null=True)
+
+
+class BatchScoreSerializer(serializers.Serializer):
+    scores = AnswerScoreSerializer(many=True, allow_empty=False)
+
+
+
+class ExportTaskSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportTask
+        fields = [
+            'id', 'job', 'kind', 'file_format', 'status', 'rows_written', 'error',
+            'created_at', 'started_at', 'finished_at', 'download_url',
+        ]
+        read_only_fields = [
+            'id', 'job', 'status', 'rows_written', 'error',
+            'created_at', 'started_at', 'finished_at',
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status != ExportTask.DONE:
+            return None
+        url = reverse('job-export-download', kwargs={'job_pk': obj.job_id, 'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -1,3 +1,693 @@
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from taggit.models import Tag
+
+from jobsafi.models import (
+    Candidate, CandidateAnswer, CandidateResponse, Employer, Job, ScreeningQuestion, TemplateQuestion,
+)
+from jobsafi.text import text_fingerprint
+
+from .serializers import ScreeningQuestionSerializer
+
+# Keep test runs out of the file-based cache of the project
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+GRADING_FIELDS = {'expected_keywords', 'reference_answer'}
+
+
+def cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode('utf-8')).decode('ascii')
+
+
+# Settings force HTTPS: requests of the test client would be redirected
+@override_settings(CACHES=LOCMEM_CACHE, SECURE_SSL_REDIRECT=False)
+class APITestCase(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+        self.job = Job.objects.create(employer=self.employer, title='Python dev', description='d', seniority='Mid')
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+        self.anonymous = APIClient()
+
+    def question(self, text, job=None, **fields):
+        return ScreeningQuestion.objects.create(job=job or self.job, text=text, **fields)
+
+
+class DuplicateQuestionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.existing = self.question('Describe your Python experience?')
+
+    def test_fingerprint_ignores_case_whitespace_and_punctuation(self):
+        self.assertEqual(
+            text_fingerprint('Describe  your PYTHON experience'), self.existing.fingerprint
+        )
+        self.assertNotEqual(text_fingerprint('Describe your Go experience'), self.existing.fingerprint)
+
+    def test_duplicate_question_is_rejected(self):
+        response = self.client.post('/api/questions/', {'job': self.job.id, 'text': 'describe your python  experience'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'text': ['This job already has this question.']})
+
+        other = self.question('Explain decorators')
+        response = self.client.patch(f'/api/questions/{other.id}/', {'text': 'Describe your Python experience'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_same_question_on_another_job_is_accepted(self):
+        job = Job.objects.create(employer=self.employer, title='Go dev', description='d', seniority='Mid')
+        response = self.client.post('/api/questions/', {'job': job.id, 'text': 'Describe your Python experience'})
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_duplicate_added_after_validation_is_rejected(self):
+        # A concurrent request inserting the same question between validate() and save()
+        with mock.patch.object(ScreeningQuestionSerializer, 'validate', lambda self, attrs: attrs):
+            response = self.client.post('/api/questions/', {'job': self.job.id, 'text': 'Describe your Python experience'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'text': ['This job already has this question.']})
+        self.assertEqual(self.job.questions.count(), 1)
+
+    def test_duplicate_template_is_rejected(self):
+        self.assertEqual(self.client.post('/api/templates/', {'tag': 'python', 'template_text': 'What is a decorator?'}).status_code, 201)
+        response = self.client.post('/api/templates/', {'tag': ' Python', 'template_text': 'what is a  decorator'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SubmissionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.approved = self.question('Explain decorators', is_approved=True)
+        self.draft = self.question('Explain generators')
+        other = Job.objects.create(employer=self.employer, title='Go dev', description='d', seniority='Mid')
+        self.foreign = self.question('Explain goroutines', job=other, is_approved=True)
+
+    def submit(self, answers, email='a@example.com', job=None):
+        return self.anonymous.post(f'/api/jobs/{(job or self.job).id}/responses/', {
+            'candidate': {'name': 'Ada', 'email': email}, 'answers': answers,
+        }, format='json')
+
+    def test_answers_to_other_jobs_and_bad_ids_are_skipped(self):
+        response = self.submit([
+            {'question': self.approved.id, 'answer_text': 'x'},
+            {'question': self.foreign.id, 'answer_text': 'y'},
+            {'question': 'zz', 'answer_text': 'z'},
+        ])
+        self.assertEqual(response.status_code, 201, response.content)
+        saved = CandidateResponse.objects.get(pk=response.json()['response_id'])
+        self.assertEqual(list(saved.answers.values_list('question_id', flat=True)), [self.approved.id])
+
+    def test_candidate_is_reused_by_email(self):
+        self.submit([{'question': self.approved.id, 'answer_text': 'x'}])
+        self.anonymous.post('/api/responses/', {
+            'job': str(self.job.id), 'candidate': {'name': 'Ada L.', 'email': 'a@example.com'},
+            'answers': [{'question': self.draft.id, 'answer_text': 'y'}],
+        }, format='json')
+        candidate = Candidate.objects.get()
+        self.assertEqual((candidate.name, candidate.responses.count()), ('Ada L.', 2))
+
+    def test_query_count_does_not_grow_with_the_answers(self):
+        counts = []
+        for size, email in ((1, 'a@example.com'), (20, 'b@example.com')):
+            questions = [self.question(f'{email} question {i}') for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.submit([{'question': q.id, 'answer_text': 'x'} for q in questions], email=email)
+            self.assertEqual(response.status_code, 201, response.content)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_portal_only_accepts_approved_questions(self):
+        response = self.anonymous.post(f'/jobs/{self.job.id}/', {
+            'candidate_name': 'Bo', 'candidate_email': 'bo@example.com',
+            f'answer_{self.approved.id}': 'hi', f'answer_{self.draft.id}': 'no',
+        })
+        self.assertEqual(response.status_code, 302)
+        answers = CandidateAnswer.objects.filter(response__candidate__email='bo@example.com')
+        self.assertEqual(list(answers.values_list('question_id', flat=True)), [self.approved.id])
+
+
+class IngestTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.mine = self.question('Explain decorators')
+        other = Job.objects.create(
+            employer=Employer.objects.create_user('other', password='x'), title='Go dev', description='d', seniority='Mid',
+        )
+        self.theirs = self.question('Explain goroutines', job=other)
+        self.other_job = other
+
+    def ingest(self, body, **params):
+        response = self.client.post(
+            f'/api/responses/bulk/?{urlencode(params)}', data=body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def line(self, job, email, question, text='hi'):
+        return json.dumps({'job': job.id, 'candidate': {'name': 'a', 'email': email},
+                           'answers': [{'question': question.id, 'answer_text': text}]})
+
+    def test_one_report_per_line(self):
+        existing = Candidate.objects.create(job=self.job, name='x', email='x@example.com')
+        body = '\n'.join([
+            self.line(self.job, 'a@example.com', self.mine),
+            self.line(self.job, 'a@example.com', self.mine, 'again'),
+            'garbage',
+            self.line(self.other_job, 'b@example.com', self.theirs),
+            json.dumps({'job': self.job.id, 'candidate': existing.id, 'answers': [{'question': self.mine.id, 'answer_text': 'hi'}]}),
+            json.dumps({'job': self.job.id, 'candidate': {'email': 'bad'}, 'answers': [{'question': self.mine.id, 'answer_text': 'hi'}]}),
+        ]) + '\n\n'
+        reports = self.ingest(body, chunk_size=2)
+        self.assertEqual([report['line'] for report in reports], [1, 2, 3, 4, 5, 6])
+        self.assertEqual([report['status'] for report in reports], ['ok', 'ok', 'error', 'error', 'ok', 'error'])
+        self.assertEqual(Candidate.objects.filter(email='a@example.com').count(), 1)
+        self.assertEqual(CandidateAnswer.objects.count(), 3)
+
+    def test_invalid_utf8_is_reported_and_the_stream_goes_on(self):
+        body = b'\n'.join([
+            b'{"job": 1, "candidate": {"name": "\xff"}}',
+            self.line(self.job, 'a@example.com', self.mine).encode(),
+        ])
+        reports = self.ingest(body)
+        self.assertEqual([report['status'] for report in reports], ['error', 'ok'])
+
+
+class AnswerScoreTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        candidate = Candidate.objects.create(job=self.job, name='a', email='a@example.com')
+        self.response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+        self.answer = CandidateAnswer.objects.create(
+            response=self.response, question=self.question('Explain decorators'), answer_text='x',
+            score=1, auto_scored=True,
+        )
+        self.url = f'/api/responses/{self.response.id}/answers/{self.answer.id}/'
+
+    def test_score_action_and_patch_update_the_totals(self):
+        self.assertEqual(self.client.patch(f'{self.url}score/', {'score': 4}).json(), {'score': 4})
+        self.response.refresh_from_db()
+        self.assertEqual((self.response.score_sum, self.response.scored_count), (4, 1))
+
+        response = self.client.patch(self.url, {'score': 3})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.response.refresh_from_db()
+        self.assertEqual((self.response.score_sum, self.response.overall_score), (3, 3.0))
+        self.answer.refresh_from_db()
+        self.assertFalse(self.answer.auto_scored)
+
+    def test_score_must_be_an_integer(self):
+        self.assertEqual(self.client.patch(f'{self.url}score/', {'score': 'high'}).status_code, 400)
+
+    def test_score_answers(self):
+        url = f'/api/jobs/{self.job.id}/score_answers/'
+        response = self.client.post(url, {'scores': [{'answer_id': self.answer.id, 'score': 5}]}, format='json')
+        self.assertEqual(response.json(), {'scored': 1, 'responses': [{'id': self.response.id, 'overall_score': 5.0}]})
+
+        response = self.client.post(url, {'scores': [{'answer_id': self.answer.id + 1, 'score': 1}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['answer_ids'], [self.answer.id + 1])
+        response = self.client.post(url, {'scores': [{'answer_id': self.answer.id, 'score': 'high'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.answer.refresh_from_db()
+        self.assertEqual((self.answer.score, self.answer.auto_scored), (5, False))
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(7):
+            candidate = Candidate.objects.create(job=self.job, name='a', email=f'a{i}@example.com')
+            CandidateResponse.objects.create(job=self.job, candidate=candidate)
+        # Ties on submitted_at are broken by id
+        first = CandidateResponse.objects.order_by('id').first()
+        CandidateResponse.objects.filter(id__lte=first.id + 3).update(submitted_at=first.submitted_at)
+
+    def test_pages_cover_every_row_once(self):
+        url = f'/api/jobs/{self.job.id}/responses/?page_size=3'
+        seen, pages = [], 0
+        while url:
+            page = self.client.get(url).json()
+            seen += [response['id'] for response in page['results']]
+            url = page['next']
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, list(CandidateResponse.objects.order_by('submitted_at', 'id').values_list('id', flat=True)))
+
+    def test_invalid_cursor_is_not_found(self):
+        responses = f'/api/jobs/{self.job.id}/responses/'
+        for url, value in (
+            ('/api/jobs/', 'zzz'),
+            ('/api/jobs/', cursor('1')),
+            ('/api/jobs/', cursor(True)),
+            ('/api/jobs/', cursor(1, 2)),
+            (responses, cursor(1, 1)),
+            (responses, cursor('yesterday', 1)),
+        ):
+            with self.subTest(url=url, cursor=value):
+                response = self.client.get(url, {'cursor': value})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+
+# Cached public pages would hide the queries of repeated requests
+@override_settings(PUBLIC_CACHE_TIMEOUT=0, AUTO_TAG_JOBS=False)
+class QueryCountTests(APITestCase):
+    def add_job(self, index):
+        job = Job.objects.create(employer=self.employer, title=f'Dev {index}', description='d', seniority='Mid')
+        job.tags.add('python', f'tag{index}')
+        questions = [self.question(f'Question {i}', job=job, is_approved=i % 2 == 0) for i in range(3)]
+        candidate = Candidate.objects.create(job=job, name='a', email=f'a{index}@example.com')
+        response = CandidateResponse.objects.create(job=job, candidate=candidate)
+        for question in questions:
+            CandidateAnswer.objects.create(response=response, question=question, answer_text='x', score=3)
+        return job
+
+    def count(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def test_query_counts_do_not_grow_with_the_rows(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), self.settings(API_FAST_LIST_SERIALIZERS=fast):
+                self.check_query_counts(str(fast))
+
+    def check_query_counts(self, run):
+        urls = [
+            (self.client, '/api/jobs/'),
+            (self.anonymous, '/api/jobs/'),
+            (self.client, '/api/questions/'),
+            (self.client, '/api/responses/'),
+            (self.client, f'/api/jobs/{self.job.id}/responses/'),
+            (self.client, f'/api/jobs/{self.job.id}/'),
+            (self.anonymous, f'/api/jobs/{self.job.id}/'),
+        ]
+        # A response whose answers grow with the rows
+        candidate = Candidate.objects.create(job=self.job, name='b', email=f'b{run}@example.com')
+        growing = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+        urls.append((self.client, f'/api/responses/{growing.id}/answers/'))
+        counts = []
+        for size in (1, 5):
+            for index in range(size):
+                key = f'{run}-{size}-{index}'
+                self.add_job(key)
+                candidate = Candidate.objects.create(job=self.job, name='b', email=f'b{key}@example.com')
+                response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+                question = self.question(f'Job question {key}', is_approved=True)
+                for answered in (response, growing):
+                    CandidateAnswer.objects.create(response=answered, question=question, answer_text='x')
+            counts.append([self.count(client, url) for client, url in urls])
+        self.assertEqual(counts[0], counts[1])
+
+
+class ExportTests(APITestCase):
+    def test_streams_the_responses(self):
+        question = self.question('Explain decorators')
+        candidate = Candidate.objects.create(job=self.job, name='Ada', email='a@example.com')
+        response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+        CandidateAnswer.objects.create(response=response, question=question, answer_text='x', score=2)
+
+        response = self.client.get(f'/api/jobs/{self.job.id}/export/', {'output': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn(f'job-{self.job.id}-responses.ndjson', response['Content-Disposition'])
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(record['candidate'], record[f'Q{question.id} score']) for record in records], [('Ada', 2)])
+
+        self.assertEqual(self.client.get(f'/api/jobs/{self.job.id}/export/', {'output': 'xlsx'}).status_code, 400)
+
+
+class ExportTaskTests(APITestCase):
+    def test_download_once_the_worker_is_done(self):
+        url = f'/api/jobs/{self.job.id}/exports/'
+        task = self.client.post(url, {'kind': 'questions', 'file_format': 'csv'}).json()
+        self.assertEqual(task['status'], 'pending')
+        self.assertEqual(self.client.get(f'{url}{task["id"]}/download/').status_code, 409)
+
+        with tempfile.TemporaryDirectory() as root, self.settings(EXPORT_ROOT=root):
+            call_command('run_export_worker', '--once', stdout=io.StringIO())
+            response = self.client.get(f'{url}{task["id"]}/download/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()[0],
+                             'id,text,is_custom,is_approved,rating')
+            response.close()
+
+    def test_other_employers_cannot_export(self):
+        other = APIClient()
+        other.force_authenticate(Employer.objects.create_user('other', password='x'))
+        self.assertEqual(other.post(f'/api/jobs/{self.job.id}/exports/', {'kind': 'questions'}).status_code, 403)
+
+
+class SearchTests(APITestCase):
+    def test_search(self):
+        question = self.question('Explain Python decorators', is_approved=True)
+        response = self.anonymous.get('/api/search/', {'q': 'decorator', 'type': 'question'})
+        self.assertEqual([(hit['type'], hit['id']) for hit in response.json()['results']], [('question', question.id)])
+        self.assertEqual(self.anonymous.get('/api/search/').status_code, 400)
+        self.assertEqual(self.anonymous.get('/api/search/', {'q': 'x', 'type': 'user'}).status_code, 400)
+
+
+@override_settings(TEMPLATE_AUTO_PROPAGATE=False)
+class JobTagTests(APITestCase):
+    def test_requested_tags_match_auto_tags_case_insensitively(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            TemplateQuestion.objects.create(tag='python', template_text='What is a decorator?')
+        response = self.client.post('/api/jobs/', {
+            'title': 'Backend dev', 'description': 'We use python', 'seniority': 'Mid', 'employer': self.employer.id,
+            'tags': ['Python', 'Django'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(sorted(response.json()['tags']), ['django', 'python'])
+        self.assertEqual(Tag.objects.filter(name__iexact='python').count(), 1)
+
+        job = Job.objects.get(pk=response.json()['id'])
+        response = self.client.patch(f'/api/jobs/{job.id}/', {'tags': ['PYTHON']}, format='json')
+        self.assertEqual(response.json()['tags'], ['python'])
+
+
+class QuestionVisibilityTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.approved = self.question(
+            'Explain decorators', is_approved=True,
+            expected_keywords='wrapper, closure', reference_answer='A function wrapping another',
+        )
+        self.draft = self.question('Explain generators')
+
+    def test_owner_sees_every_question_with_its_grading_key(self):
+        questions = self.client.get(f'/api/jobs/{self.job.id}/').json()['questions']
+        self.assertEqual([question['id'] for question in questions], [self.approved.id, self.draft.id])
+        self.assertEqual(questions[0]['reference_answer'], 'A function wrapping another')
+        self.assertEqual(questions[0]['expected_keywords'], 'wrapper, closure')
+
+        listed = self.client.get('/api/questions/', {'job': self.job.id}).json()['results']
+        self.assertEqual(len(listed), 2)
+        self.assertTrue(GRADING_FIELDS <= set(listed[0]))
+
+    def test_anonymous_users_see_approved_questions_without_grading_key(self):
+        questions = self.anonymous.get(f'/api/jobs/{self.job.id}/').json()['questions']
+        self.assertEqual([question['id'] for question in questions], [self.approved.id])
+        self.assertFalse(GRADING_FIELDS & set(questions[0]))
+
+        listed = self.anonymous.get('/api/questions/', {'job': self.job.id}).json()['results']
+        self.assertEqual([question['id'] for question in listed], [self.approved.id])
+        self.assertFalse(GRADING_FIELDS & set(listed[0]))
+
+        detail = self.anonymous.get(f'/api/questions/{self.approved.id}/').json()
+        self.assertFalse(GRADING_FIELDS & set(detail))
+        self.assertEqual(self.anonymous.get(f'/api/questions/{self.draft.id}/').status_code, 404)
+
+    def test_other_employers_do_not_get_the_job(self):
+        other = APIClient()
+        other.force_authenticate(Employer.objects.create_user('other', password='x'))
+        self.assertEqual(other.get(f'/api/jobs/{self.job.id}/').status_code, 404)
+        self.assertEqual(other.get(f'/api/questions/{self.approved.id}/').status_code, 404)
+
+
+class AutoScoreTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.keywords = self.question('Explain decorators', expected_keywords='wrapper, closure')
+        self.reference = self.question('Explain generators', reference_answer='A generator yields values lazily')
+        self.plain = self.question('Anything else?')
+        self.responses = []
+        for i, texts in enumerate([
+            ('a wrapper using a closure', 'A generator yields values lazily.', 'no'),
+            ('a wrapper', 'no idea', 'no'),
+            ('', '', 'no'),
+        ]):
+            candidate = Candidate.objects.create(job=self.job, name='a', email=f'a{i}@example.com')
+            response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+            for question, text in zip((self.keywords, self.reference, self.plain), texts):
+                CandidateAnswer.objects.create(response=response, question=question, answer_text=text)
+            self.responses.append(response)
+
+    def scores(self, response):
+        return list(response.answers.order_by('question_id').values_list('score', 'auto_scored'))
+
+    def test_scores_unscored_answers_of_questions_with_a_grading_key(self):
+        # A reviewer already scored every answer of the third response
+        CandidateAnswer.objects.filter(response=self.responses[2]).update(score=1)
+        result = self.client.post(f'/api/jobs/{self.job.id}/auto_score/').json()
+        self.assertEqual(result, {'scored': 4, 'responses': 2})
+
+        self.assertEqual(self.scores(self.responses[0]), [(10, True), (10, True), (None, False)])
+        first, second = self.scores(self.responses[1])[:2]
+        self.assertEqual(first, (5, True))
+        self.assertLess(second[0], 5)
+        self.assertEqual(self.scores(self.responses[2]), [(1, False)] * 3)
+        self.responses[0].refresh_from_db()
+        self.assertEqual(self.responses[0].overall_score, 10.0)
+        self.assertEqual(self.job.analytics.scored_count, 7)
+
+    def test_rescore_keeps_reviewer_scores(self):
+        self.client.post(f'/api/jobs/{self.job.id}/auto_score/')
+        self.assertEqual(self.client.post(f'/api/jobs/{self.job.id}/auto_score/').json(), {'scored': 0, 'responses': 0})
+
+        self.client.patch(
+            f'/api/responses/{self.responses[1].id}/answers/{self.responses[1].answers.get(question=self.keywords).id}/score/',
+            {'score': 7},
+        )
+        result = self.client.post(f'/api/jobs/{self.job.id}/auto_score/?rescore=true').json()
+        self.assertEqual(result, {'scored': 5, 'responses': 3})
+        self.assertEqual(self.scores(self.responses[1])[0], (7, False))
+
+
+class TopCandidatesTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.question('Explain decorators')
+        self.second = self.question('Explain generators')
+        now = timezone.now()
+        self.responses = {}
+        # name: (days ago, first score and text, second score and text)
+        for name, days, answers in (
+            ('a', 3, [(5, 'x'), (5, 'x')]),
+            ('b', 1, [(9, 'x'), (8, '')]),
+            ('c', 5, [(4, 'x'), (6, 'x')]),
+            ('d', 2, [(None, 'x'), (None, 'x')]),
+            ('e', 4, [(2, 'x'), (8, 'x')]),
+        ):
+            candidate = Candidate.objects.create(job=self.job, name=name, email=f'{name}@example.com')
+            response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+            for question, (score, text) in zip((self.first, self.second), answers):
+                CandidateAnswer.objects.create(response=response, question=question, answer_text=text, score=score)
+            CandidateResponse.objects.filter(pk=response.pk).update(submitted_at=now - timedelta(days=days))
+            self.responses[name] = response
+
+    def top(self, **params):
+        response = self.client.get(f'/api/jobs/{self.job.id}/top_candidates/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(row['rank'], row['candidate']['name'], row['overall_score']) for row in response.json()['results']]
+
+    def test_best_scores_first_and_earliest_submission_breaks_ties(self):
+        self.assertEqual(self.top(k=4), [(1, 'b', 8.5), (2, 'c', 5.0), (3, 'e', 5.0), (4, 'a', 5.0)])
+        self.assertEqual(self.top(k=1), [(1, 'b', 8.5)])
+
+    def test_filters(self):
+        self.assertEqual([name for _, name, _ in self.top(min_answered=2)], ['c', 'e', 'a'])
+        self.assertEqual(
+            [name for _, name, _ in self.top(question_min_score=f'{self.first.id}:4,{self.second.id}:6')], ['b', 'c'],
+        )
+
+    def test_invalid_parameters(self):
+        url = f'/api/jobs/{self.job.id}/top_candidates/'
+        other = self.question('Elsewhere', job=Job.objects.create(employer=self.employer, title='x', description='d', seniority='Mid'))
+        for params in ({'k': 0}, {'k': 'ten'}, {'question_min_score': '1'}, {'question_min_score': f'{other.id}:1'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+class PublicCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.job.tags.add('python')
+        self.approved = self.question('Explain decorators', is_approved=True)
+        self.draft = self.question('Explain generators')
+        self.url = f'/api/jobs/{self.job.id}/'
+
+    def public_questions(self):
+        return [question['text'] for question in self.anonymous.get(self.url).json()['questions']]
+
+    def test_job_page_is_cached_until_a_change_commits(self):
+        self.assertEqual(self.public_questions(), ['Explain decorators'])
+        # Writes that send no signal are not seen: the page is cached
+        ScreeningQuestion.objects.filter(pk=self.approved.pk).update(text='Explain closures')
+        self.assertEqual(self.public_questions(), ['Explain decorators'])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(f'/api/questions/{self.draft.id}/', {'is_approved': True})
+        self.assertEqual(self.public_questions(), ['Explain decorators'])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.public_questions(), ['Explain closures', 'Explain generators'])
+
+    def test_unapproving_a_question_expires_the_page(self):
+        self.public_questions()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/questions/{self.approved.id}/', {'is_approved': False})
+        self.assertEqual(self.public_questions(), [])
+
+    def test_tag_renames_expire_job_pages_and_listings(self):
+        self.assertEqual(self.anonymous.get(self.url).json()['tags'], ['python'])
+        self.anonymous.get('/api/jobs/')
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.get(name='python')
+            tag.name = 'Python 3'
+            tag.save()
+        self.assertEqual(self.anonymous.get(self.url).json()['tags'], ['Python 3'])
+        self.assertEqual(self.anonymous.get('/api/jobs/').json()['results'][0]['tags'], ['Python 3'])
+
+    def test_listing_follows_jobs_and_reads_counters_fresh(self):
+        self.assertEqual(len(self.anonymous.get('/api/jobs/').json()['results']), 1)
+        Candidate.objects.create(job=self.job, name='a', email='a@example.com')
+        self.assertEqual(self.anonymous.get('/api/jobs/').json()['results'][0]['candidate_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/jobs/', {
+                'title': 'Go dev', 'description': 'd', 'seniority': 'Mid', 'employer': self.employer.id,
+            })
+        self.assertEqual(len(self.anonymous.get('/api/jobs/').json()['results']), 2)
+
+    # The manifest of the production static storage is only built by collectstatic
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_board_page(self):
+        self.assertContains(self.anonymous.get('/'), 'Python dev')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.title = 'Senior Python dev'
+            self.job.save()
+        self.assertContains(self.anonymous.get('/'), 'Senior Python dev')
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.approved = self.question('Explain decorators', is_approved=True)
+
+    def test_unchanged_job_is_not_modified(self):
+        url = f'/api/jobs/{self.job.id}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+
+    def test_changes_to_the_job_change_its_etag(self):
+        url = f'/api/jobs/{self.job.id}/'
+        etag = self.client.get(url)['ETag']
+        self.approved.text = 'Explain generators'
+        self.approved.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.job.tags.add('python')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etags_differ_per_audience(self):
+        url = '/api/questions/'
+        etag = self.client.get(url, {'job': self.job.id})['ETag']
+        self.assertEqual(self.client.get(url, {'job': self.job.id}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.anonymous.get(url, {'job': self.job.id}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_response_last_modified(self):
+        response = CandidateResponse.objects.create(
+            job=self.job, candidate=Candidate.objects.create(job=self.job, name='a', email='a@example.com'),
+        )
+        url = f'/api/responses/{response.id}/'
+        last_modified = self.anonymous.get(url)['Last-Modified']
+        self.assertEqual(self.anonymous.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+
+# Cached public pages would be served whichever serializer built them
+@override_settings(PUBLIC_CACHE_TIMEOUT=0)
+class FastListTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.job.tags.add('python', 'Django')
+        other = Job.objects.create(employer=self.employer, title='Go dev', description='', seniority='Senior')
+        self.question('Explain decorators', is_approved=True, rating=4, expected_keywords='wrapper', reference_answer='r')
+        self.question('Explain generators', is_custom=True)
+        self.question('Explain goroutines', job=other, is_approved=True)
+        Candidate.objects.create(job=self.job, name='Ada', email='ada@example.com', resume='resumes/ada cv.pdf')
+        candidate = Candidate.objects.create(job=self.job, name='Bo', email='bo@example.com')
+        response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+        CandidateAnswer.objects.create(response=response, question=self.job.questions.first(), answer_text='x', score=3)
+
+    def test_fast_lists_match_the_model_serializers(self):
+        for client, url in (
+            (self.client, '/api/jobs/'),
+            (self.anonymous, '/api/jobs/'),
+            (self.client, '/api/jobs/?page_size=1'),
+            (self.client, '/api/questions/'),
+            (self.anonymous, f'/api/questions/?job={self.job.id}'),
+            (self.client, f'/api/jobs/{self.job.id}/candidates/'),
+        ):
+            with self.subTest(url=url, anonymous=client is self.anonymous):
+                with self.settings(API_FAST_LIST_SERIALIZERS=False):
+                    expected = client.get(url).content
+                with self.settings(API_FAST_LIST_SERIALIZERS=True):
+                    self.assertEqual(client.get(url).content, expected)
+
+
+class BulkReviewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.questions = [self.question(f'Question {i}') for i in range(3)]
+        other = Employer.objects.create_user('other', password='x')
+        other_job = Job.objects.create(employer=other, title='Go dev', description='d', seniority='Mid')
+        self.foreign = self.question('Their question', job=other_job)
+
+    def test_bulk_update(self):
+        ids = [question.id for question in self.questions[:2]]
+        response = self.client.post('/api/questions/bulk_update/', {'ids': ids, 'is_approved': True, 'rating': 4}, format='json')
+        self.assertEqual(response.json(), {'matched': 2, 'updated': 2})
+        self.assertEqual(ScreeningQuestion.objects.filter(is_approved=True, rating=4).count(), 2)
+
+        # Rows already in the requested state are not written again
+        ids.append(self.questions[2].id)
+        response = self.client.post('/api/questions/bulk_update/', {'ids': ids, 'rating': 4}, format='json')
+        self.assertEqual(response.json(), {'matched': 3, 'updated': 1})
+
+    def test_questions_of_other_employers_reject_the_whole_request(self):
+        ids = [self.questions[0].id, self.foreign.id]
+        response = self.client.post('/api/questions/bulk_update/', {'ids': ids, 'is_approved': True}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['question_ids'], [self.foreign.id])
+        self.assertFalse(ScreeningQuestion.objects.filter(is_approved=True).exists())
+
+    def test_reorder_rejects_questions_of_other_jobs(self):
+        response = self.client.post(
+            '/api/questions/reorder/', {'job': self.job.id, 'ids': [self.questions[0].id, self.foreign.id]}, format='json',
+        )
+        self.assertEqual((response.status_code, response.json()['question_ids']), (400, [self.foreign.id]))
+
+    def test_approve_generated_needs_the_job_owner(self):
+        response = self.client.post('/api/questions/approve_generated/', {'job': self.foreign.job_id}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ScreeningQuestion.objects.get(pk=self.foreign.pk).is_approved)
+
+
+@override_settings(AUTO_TAG_JOBS=False)
+class JobImportTests(APITestCase):
+    def test_reports_stream_and_invalid_utf8_is_reported(self):
+        body = b'title,description,seniority,tags\nGo dev,d,Mid,"go, python"\nCaf\xe9 dev,d,Mid,\n'
+        response = self.client.post('/api/jobs/import/?input=csv', data=body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        reports = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(report['record'], report['status']) for report in reports], [(1, 'ok'), (2, 'error')])
+        self.assertEqual(reports[1]['error'], 'Invalid UTF-8')
+        job = Job.objects.get(pk=reports[0]['job_id'])
+        self.assertEqual((job.employer, sorted(job.tags.names())), (self.employer, ['go', 'python']))
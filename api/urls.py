@@ -1,9 +1,11 @@
 from django.urls import path, include
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
 from .views import (
     EmployerViewSet, JobViewSet, ScreeningQuestionViewSet,
     TemplateQuestionViewSet, CandidateViewSet, 
-    CandidateResponseViewSet, CandidateAnswerViewSet
+    CandidateResponseViewSet, CandidateAnswerViewSet, CandidateResponseIngestView,
+    ExportTaskViewSet, SearchView
 )
 
 router = DefaultRouter()
@@ -14,13 +16,33 @@ router.register(r'templates', TemplateQuestionViewSet, basename='templates')
 router.register(r'candidates', CandidateViewSet, basename='candidates')
 router.register(r'responses', CandidateResponseViewSet, basename='responses')
 
+# jobs/<id>/responses/ is shared by the router's GET action (employer view)
+# and candidate submissions (POST), so it is dispatched by method here.
+job_responses_list = JobViewSet.as_view({'get': 'responses'}, **JobViewSet.responses.kwargs)
+job_responses_create = CandidateResponseViewSet.as_view({'post': 'create'})
+
+
+@csrf_exempt
+def job_responses(request, job_id):
+    if request.method == 'POST':
+        return job_responses_create(request, job_id=job_id)
+    return job_responses_list(request, pk=job_id)
+
+
 # Manual nested routing for answers
 urlpatterns = [
+    path('jobs/<int:job_id>/responses/', job_responses, name='job-responses'),
+    path('responses/bulk/', CandidateResponseIngestView.as_view(), name='responses-bulk'),
+    path('search/', SearchView.as_view(), name='search'),
     path("", include(router.urls)),
-    path('jobs/<int:job_id>/responses/', CandidateResponseViewSet.as_view({'post': 'create'}), name='job-responses'),
     
     # Manual nested routes for answers
     path('responses/<int:response_pk>/answers/', CandidateAnswerViewSet.as_view({'get': 'list', 'post': 'create'}), name='response-answers'),
     path('responses/<int:response_pk>/answers/<int:pk>/', CandidateAnswerViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='response-answer-detail'),
     path('responses/<int:response_pk>/answers/<int:pk>/score/', CandidateAnswerViewSet.as_view({'patch': 'score'}), name='response-answer-score'),
+
+    # Manual nested routes for background exports
+    path('jobs/<int:job_pk>/exports/', ExportTaskViewSet.as_view({'get': 'list', 'post': 'create'}), name='job-exports'),
+    path('jobs/<int:job_pk>/exports/<int:pk>/', ExportTaskViewSet.as_view({'get': 'retrieve'}), name='job-export-detail'),
+    path('jobs/<int:job_pk>/exports/<int:pk>/download/', ExportTaskViewSet.as_view({'get': 'download'}), name='job-export-download'),
 ]
\ No newline at end of file
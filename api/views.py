@@ -1,19 +1,46 @@
+import json
+import os
+
 from rest_framework import viewsets, mixins, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, AllowAny
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from jobsafi.utils import auto_generate_questions
+from jobsafi.submissions import submit_response
+from jobsafi.ingest import ingest_responses
+from jobsafi.job_import import import_jobs
+from jobsafi.records import IMPORT_FORMATS, read_records
+from jobsafi.scoring import apply_answer_scores
+from jobsafi.autoscore import AutoScoringUnavailable, auto_score_job
+from jobsafi.ranking import top_responses
+from jobsafi.review import approve_generated_questions, reorder_questions, update_questions
+from jobsafi.analytics import job_analytics
+from jobsafi.exports import EXPORT_FORMATS, export_lines, response_rows
+from jobsafi.template_index import get_template_index, normalize_tag, template_index_stats
+from jobsafi.template_library import import_templates, template_rows
+from jobsafi.neardup import default_threshold
+from jobsafi.public_cache import get_or_build, public_cache_stats
+from jobsafi.search import FULLTEXT_INDEXES, fulltext_available, search
 
 from jobsafi.models import (
     Employer, Job, ScreeningQuestion, TemplateQuestion,
-    Candidate, CandidateAnswer, CandidateResponse
+    Candidate, CandidateAnswer, CandidateResponse, ExportTask
 )
+from .conditional import ConditionalGetMixin
+from .fastpath import FastListMixin
 from .serializers import (
-    EmployerSerializer, JobSerializer, ScreeningQuestionSerializer,
-    TemplateQuestionSerializer, CandidateSerializer,
-    JobDetailSerializer, CandidateResponseSerializer, ScreeningQuestionSerializer, CandidateAnswerSerializer
+    EmployerSerializer, JobSerializer, ScreeningQuestionSerializer, ScreeningQuestionOwnerSerializer,
+    TemplateQuestionSerializer, CandidateSerializer, JobDetailSerializer, JobOwnerDetailSerializer,
+    CandidateResponseSerializer, CandidateAnswerSerializer,
+    BatchScoreSerializer, ExportTaskSerializer, RankedResponseSerializer,
+    BulkQuestionUpdateSerializer, JobQuestionsSerializer, QuestionOrderSerializer
 )
 
 
@@ -31,11 +58,11 @@ class EmployerViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]  # Others must be logged in
 
     def get_queryset(self):
-        return Employer.objects.all()
+        return EmployerSerializer.setup_eager_loading(Employer.objects.all(), self.request)
 
 
 # ---------------- JOB ----------------
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(FastListMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Jobs belong to Employers.
     - Public can view jobs
@@ -45,14 +72,89 @@ class JobViewSet(viewsets.ModelViewSet):
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
+            # Signed-in employers only ever get their own jobs (see get_queryset),
+            # so they see the grading key of the questions
+            if self.request.user.is_authenticated:
+                return JobOwnerDetailSerializer
             return JobDetailSerializer
         return JobSerializer
 
+    def get_cursor_ordering(self):
+        # Matches the (job, submitted_at, id) index on CandidateResponse
+        if self.action == 'responses':
+            return ('submitted_at', 'id')
+        return ('id',)
+
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
-            return Job.objects.filter(employer=user).prefetch_related('tags')
-        return Job.objects.all().prefetch_related('tags')
+            queryset = Job.objects.filter(employer=user)
+        else:
+            queryset = Job.objects.all()
+        
+        # Custom actions load the job alone and declare their own plans
+        if self.action in ('list', 'retrieve', 'create', 'update', 'partial_update'):
+            queryset = self.get_serializer_class().setup_eager_loading(queryset, self.request)
+        return queryset
+
+    # Change with every application and score: left out of the cached board
+    # and read fresh for each page
+    LIVE_FIELDS = ('candidate_count', 'response_count', 'average_score')
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if request.user.is_authenticated:
+            return self.fast_list_response(queryset)
+        # The public board is the same for every visitor: serve it from the cache
+        page = get_or_build("job_list", request, lambda: self._without_live_fields(
+            self.fast_list_response(queryset).data
+        ))
+        return Response(self._with_live_fields(page))
+
+    def _without_live_fields(self, page):
+        return {
+            **page,
+            'results': [
+                {name: value for name, value in row.items() if name not in self.LIVE_FIELDS}
+                for row in page['results']
+            ],
+        }
+
+    def _with_live_fields(self, page):
+        """Add the live fields to a cached page with one query by primary key."""
+        columns, average_score = JobSerializer.fast_fields['average_score']
+        live = {
+            row['id']: {
+                'candidate_count': row['candidate_count'],
+                'response_count': row['response_count'],
+                'average_score': average_score(row),
+            }
+            for row in Job.objects.filter(pk__in=[job['id'] for job in page['results']])
+            .values('id', 'candidate_count', 'response_count', *columns)
+        }
+        # A job deleted since the page was cached is left out
+        page['results'] = [{**row, **live[row['id']]} for row in page['results'] if row['id'] in live]
+        return page
+
+    def retrieve(self, request, *args, **kwargs):
+        build = super().retrieve
+        if request.user.is_authenticated:
+            return self.conditional_response(request, lambda: build(request, *args, **kwargs))
+        return self.conditional_response(request, lambda: Response(get_or_build(
+            "job_retrieve", request, lambda: build(request, *args, **kwargs).data, job_id=kwargs['pk']
+        )))
+
+    def get_revision(self):
+        if self.action != 'retrieve':
+            return None
+        user = self.request.user
+        jobs = Job.objects.filter(employer=user) if user.is_authenticated else Job.objects.all()
+        row = jobs.filter(pk=self.kwargs['pk']).values_list('revision', 'updated_at').first()
+        if row is None:
+            return None
+        # Owners also see unapproved questions
+        visibility = user.pk if user.is_authenticated else 'public'
+        return ('job', self.kwargs['pk'], visibility, row[0]), row[1]
 
     def perform_create(self, serializer):
         serializer.save(employer=self.request.user)
@@ -82,9 +184,8 @@ class JobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        candidates = job.candidates.all()
-        serializer = CandidateSerializer(candidates, many=True)
-        return Response(serializer.data)
+        # No request in the context: resume URLs stay relative as before
+        return self.fast_list_response(job.candidates.all(), CandidateSerializer, context={})
 
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
     def responses(self, request, pk=None):
@@ -101,10 +202,206 @@ class JobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        responses = job.responses.all()
+        responses = self.paginate_queryset(
+            CandidateResponseSerializer.setup_eager_loading(job.responses.all(), request)
+        )
         serializer = CandidateResponseSerializer(responses, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def top_candidates(self, request, pk=None):
+        """
+        The K best scored responses of a job with candidate summaries.
+        ?k=20, ?min_answered=N, ?question_min_score=<question_id>:<score> (repeatable)
+        Ties are broken by the earliest submission.
+        """
+        job = self.get_object()
+        
+        # Check if the current user owns this job
+        if job.employer != request.user:
+            return Response(
+                {"error": "You can only view responses for your own jobs"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        params = request.query_params
+        try:
+            k = int(params.get('k', 20))
+            min_answered = int(params.get('min_answered', 0))
+            question_min_scores = {}
+            for value in params.getlist('question_min_score'):
+                for item in value.split(','):
+                    question_id, score = item.split(':')
+                    question_min_scores[int(question_id)] = int(score)
+        except ValueError:
+            return Response(
+                {"error": "k and min_answered must be integers and question_min_score <question_id>:<score>"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= k <= settings.API_MAX_PAGE_SIZE:
+            return Response(
+                {"error": f"k must be between 1 and {settings.API_MAX_PAGE_SIZE}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if question_min_scores:
+            known = set(job.questions.filter(id__in=list(question_min_scores)).values_list('id', flat=True))
+            unknown = sorted(set(question_min_scores) - known)
+            if unknown:
+                return Response(
+                    {"error": "Some questions do not belong to this job", "question_ids": unknown},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        responses = RankedResponseSerializer.setup_eager_loading(
+            top_responses(job, k, min_answered, question_min_scores), request
+        )
+        data = RankedResponseSerializer(responses, many=True).data
+        for rank, row in enumerate(data, 1):
+            row['rank'] = rank
+        return Response({"results": data})
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def analytics(self, request, pk=None):
+        """
+        Response and answer statistics of a job and of each of its questions:
+        counts, answer rates, mean and variance of scores and score histograms.
+        Read from materialized counters, so it is cheap to poll.
+        """
+        job = self.get_object()
+        
+        # Check if the current user owns this job
+        if job.employer != request.user:
+            return Response(
+                {"error": "You can only view analytics for your own jobs"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response(job_analytics(job))
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def export(self, request, pk=None):
+        """
+        Stream all responses of a job with answers and scores.
+        ?output=csv (default) or ?output=ndjson
+        """
+        job = self.get_object()
+        
+        # Check if the current user owns this job
+        if job.employer != request.user:
+            return Response(
+                {"error": "You can only export responses for your own jobs"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"output must be one of: {', '.join(sorted(EXPORT_FORMATS))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            export_lines(response_rows(job), output), content_type=EXPORT_FORMATS[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="job-{job.id}-responses.{output}"'
+        return response
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def score_answers(self, request, pk=None):
+        """
+        Score many answers of this job's responses in one request.
+        Body: {"scores": [{"answer_id": 1, "score": 4}, ...]} (null clears a score)
+        """
+        job = self.get_object()
+        
+        # Check if the current user owns this job
+        if job.employer != request.user:
+            return Response(
+                {"error": "You can only score answers for your own jobs"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BatchScoreSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scores = {item['answer_id']: item['score'] for item in serializer.validated_data['scores']}
+        
+        try:
+            response_ids = apply_answer_scores(job, scores)
+        except CandidateAnswer.DoesNotExist as exc:
+            return Response(
+                {"error": "Some answers do not belong to this job", "answer_ids": exc.args[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        responses = CandidateResponse.objects.filter(id__in=response_ids).values('id', 'overall_score')
+        return Response({"scored": len(scores), "responses": list(responses)})
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def auto_score(self, request, pk=None):
+        """
+        Auto-score unscored answers from the questions' expected keywords and
+        reference answers. ?rescore=true also refreshes earlier auto scores.
+        Scores set by reviewers are never changed.
+        """
+        job = self.get_object()
+        
+        # Check if the current user owns this job
+        if job.employer != request.user:
+            return Response(
+                {"error": "You can only score answers for your own jobs"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        rescore = request.query_params.get('rescore', '').lower() in ('1', 'true', 'yes')
+        try:
+            result = auto_score_job(job, rescore=rescore)
+        except AutoScoringUnavailable as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        return Response(result)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def cache_stats(self, request):
+        """Hit/miss counters of this worker's public page cache"""
+        return Response(public_cache_stats())
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], url_path='import')
+    def bulk_import(self, request):
+        """
+        Import jobs from the body, newline-delimited JSON or CSV (?input=csv).
+        ?generate=true also generates their questions, ?start=N skips the
+        records up to N (resuming an interrupted import) and ?chunk_size=
+        sets the records per transaction. The reply streams one NDJSON
+        report entry per record.
+        """
+        input_format = request.query_params.get('input', 'ndjson')
+        if input_format not in IMPORT_FORMATS:
+            return Response(
+                {"error": f"input must be one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        numbers = {}
+        for name, minimum, error in (
+            ('chunk_size', 1, "chunk_size must be a positive integer"),
+            ('start', 0, "start must be a non-negative integer"),
+        ):
+            value = request.query_params.get(name)
+            if value is not None:
+                if not value.isdigit() or int(value) < minimum:
+                    return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+                numbers[name] = int(value)
+        generate = request.query_params.get('generate', '').lower() in ('1', 'true', 'yes')
+
+        stream = request.stream
+        lines = iter(stream.readline, b'') if stream is not None else ()
+        reports = import_jobs(
+            read_records(lines, input_format), request.user,
+            chunk_size=numbers.get('chunk_size'), start=numbers.get('start', 0), generate=generate,
+        )
+        return StreamingHttpResponse(
+            (json.dumps(report) + "\n" for report in reports),
+            content_type="application/x-ndjson"
+        )
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def generate_questions(self, request, pk=None):
         """
@@ -121,14 +418,26 @@ class JobViewSet(viewsets.ModelViewSet):
         
         # Generate questions
         generated_questions = auto_generate_questions(job)
-        
+        return self._generated_questions_response(generated_questions)
+
+    @action(detail=False, methods=['post'], url_path='generate_questions',
+            permission_classes=[IsAuthenticated])
+    def generate_all_questions(self, request):
+        """
+        Auto-generate screening questions for all of the employer's jobs
+        """
+        jobs = Job.objects.filter(employer=request.user).values_list('id', flat=True)
+        generated_questions = auto_generate_questions(list(jobs))
+        return self._generated_questions_response(generated_questions)
+
+    def _generated_questions_response(self, generated_questions):
         if not generated_questions:
             return Response(
                 {"message": "No new questions generated. Either no matching templates found or questions already exist."},
                 status=status.HTTP_200_OK
             )
-        
-        serializer = ScreeningQuestionSerializer(generated_questions, many=True)
+
+        serializer = ScreeningQuestionOwnerSerializer(generated_questions, many=True)
         return Response(
             {
                 "message": f"Generated {len(generated_questions)} new questions",
@@ -138,15 +447,27 @@ class JobViewSet(viewsets.ModelViewSet):
         )
 
 # ---------------- SCREENING QUESTIONS ----------------
-class ScreeningQuestionViewSet(viewsets.ModelViewSet):
+class ScreeningQuestionViewSet(FastListMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Screening questions for jobs.
     - Public can view approved questions
     - Only job owner can manage questions
     """
-    serializer_class = ScreeningQuestionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_serializer_class(self):
+        # Signed-in employers only reach questions of their own jobs (see
+        # get_queryset and perform_create): they may read and set the grading key
+        if self.request.user.is_authenticated:
+            return ScreeningQuestionOwnerSerializer
+        return ScreeningQuestionSerializer
+
+    def get_cursor_ordering(self):
+        # A job's questions are listed in their display order
+        if self.request.query_params.get('job'):
+            return ('position', 'id')
+        return ('id',)
+
     def get_queryset(self):
         user = self.request.user
         job_id = self.request.query_params.get('job')
@@ -161,7 +482,34 @@ class ScreeningQuestionViewSet(viewsets.ModelViewSet):
         if job_id:
             queryset = queryset.filter(job_id=job_id)
             
-        return queryset
+        return self.get_serializer_class().setup_eager_loading(queryset, self.request)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, lambda: self.fast_list_response(self.filter_queryset(self.get_queryset()))
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        build = super().retrieve
+        return self.conditional_response(request, lambda: build(request, *args, **kwargs))
+
+    def get_revision(self):
+        user = self.request.user
+        visibility = user.pk if user.is_authenticated else 'public'
+        if self.action == 'retrieve':
+            questions = (
+                ScreeningQuestion.objects.filter(job__employer=user) if user.is_authenticated
+                else ScreeningQuestion.objects.filter(is_approved=True)
+            )
+            row = questions.filter(pk=self.kwargs['pk']).values_list('revision', 'updated_at').first()
+            return row and (('question', self.kwargs['pk'], visibility, row[0]), row[1])
+
+        job_id = self.request.query_params.get('job')
+        if self.action != 'list' or not job_id:
+            return None
+        # A job's revision moves whenever one of its questions changes
+        row = Job.objects.filter(pk=job_id).values_list('revision', 'updated_at').first()
+        return row and (('questions', self.request.get_full_path(), visibility, row[0]), row[1])
 
     def perform_create(self, serializer):
         job = serializer.validated_data["job"]
@@ -179,6 +527,71 @@ class ScreeningQuestionViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You cannot delete questions for another employer's job.")
         instance.delete()
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_update(self, request):
+        """
+        Approve, reject or rate many questions in one request.
+        Body: {"ids": [1, 2, ...], "is_approved": true, "rating": 4} (either field may be left out)
+        """
+        serializer = BulkQuestionUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        ids = changes.pop('ids')
+        
+        try:
+            updated = update_questions(request.user, ids, **changes)
+        except ScreeningQuestion.DoesNotExist as exc:
+            return Response(
+                {"error": "Some questions do not belong to your jobs", "question_ids": exc.args[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"matched": len(set(ids)), "updated": updated})
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def approve_generated(self, request):
+        """
+        Approve all generated questions of a job still awaiting review.
+        Body: {"job": 1}
+        """
+        serializer = JobQuestionsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.validated_data['job']
+        
+        # Check if the current user owns this job
+        if job.employer_id != request.user.id:
+            return Response(
+                {"error": "You can only approve questions for your own jobs"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response({"updated": approve_generated_questions(request.user, job)})
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def reorder(self, request):
+        """
+        Set the display order of a job's questions.
+        Body: {"job": 1, "ids": [3, 1, 2]} (questions left out keep their position)
+        """
+        serializer = QuestionOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.validated_data['job']
+        
+        # Check if the current user owns this job
+        if job.employer_id != request.user.id:
+            return Response(
+                {"error": "You can only reorder questions of your own jobs"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            updated = reorder_questions(request.user, job, serializer.validated_data['ids'])
+        except ScreeningQuestion.DoesNotExist as exc:
+            return Response(
+                {"error": "Some questions do not belong to this job", "question_ids": exc.args[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"updated": updated})
+
 
 # ---------------- TEMPLATE QUESTIONS ----------------
 class TemplateQuestionViewSet(viewsets.ModelViewSet):
@@ -190,6 +603,157 @@ class TemplateQuestionViewSet(viewsets.ModelViewSet):
     serializer_class = TemplateQuestionSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request):
+        """List templates (optionally ?tag=) from the in-process tag index"""
+        index = get_template_index()
+        tag = request.query_params.get('tag')
+        templates = index.for_tag(tag) if tag else index.entries
+        # Index entries are sorted by id, so they page without touching the DB
+        page = self.paginate_queryset(templates)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """Clusters of near-duplicate templates (?threshold=0..1, ?tag=)"""
+        try:
+            threshold = float(request.query_params.get('threshold', default_threshold()))
+        except ValueError:
+            return Response({"error": "threshold must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < threshold <= 1:
+            return Response({"error": "threshold must be between 0 and 1"}, status=status.HTTP_400_BAD_REQUEST)
+
+        clusters = get_template_index().duplicate_clusters(threshold)
+        tag = request.query_params.get('tag')
+        if tag:
+            clusters = [
+                cluster for cluster in clusters
+                if any(normalize_tag(entry.tag) == normalize_tag(tag) for entry in cluster)
+            ]
+        return Response({
+            "threshold": threshold,
+            "clusters": [self.get_serializer(cluster, many=True).data for cluster in clusters],
+        })
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Hit/miss counters of this worker's template index"""
+        return Response(template_index_stats())
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the template library (optionally ?tag=).
+        ?output=csv (default) or ?output=ndjson; the files import back unchanged.
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"output must be one of: {', '.join(sorted(EXPORT_FORMATS))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            export_lines(template_rows(request.query_params.get('tag')), output),
+            content_type=EXPORT_FORMATS[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="templates.{output}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Upsert templates from the body, newline-delimited JSON or CSV (?input=csv),
+        with one {"tag", "template_text"} record per line or row. A template is
+        matched by tag and normalized text. Replies with the inserted, updated
+        and unchanged counts.
+        """
+        input_format = request.query_params.get('input', 'ndjson')
+        if input_format not in IMPORT_FORMATS:
+            return Response(
+                {"error": f"input must be one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        chunk_size = request.query_params.get('chunk_size')
+        if chunk_size is not None:
+            if not chunk_size.isdigit() or int(chunk_size) < 1:
+                return Response(
+                    {"error": "chunk_size must be a positive integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            chunk_size = int(chunk_size)
+
+        stream = request.stream
+        lines = iter(stream.readline, b'') if stream is not None else ()
+        return Response(import_templates(read_records(lines, input_format), chunk_size=chunk_size))
+
+
+# ---------------- EXPORTS ----------------
+class ExportTaskViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
+                        mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Offline exports of a job's responses, candidates or question bank.
+    Tasks queued here are written to gzip files by `manage.py run_export_worker`.
+    Only the job owner can request and download exports.
+    """
+    serializer_class = ExportTaskSerializer
+    permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-id',)
+
+    def get_queryset(self):
+        queryset = ExportTask.objects.filter(
+            job_id=self.kwargs.get('job_pk'), job__employer=self.request.user
+        )
+        return ExportTaskSerializer.setup_eager_loading(queryset, self.request)
+
+    def perform_create(self, serializer):
+        job = get_object_or_404(Job, pk=self.kwargs.get('job_pk'))
+        if job.employer != self.request.user:
+            raise PermissionDenied("You can only export data of your own jobs.")
+        serializer.save(job=job, requested_by=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, job_pk=None, pk=None):
+        """Download a finished export as a gzip-compressed file"""
+        task = self.get_object()
+        if task.status != ExportTask.DONE or not os.path.exists(task.file_path):
+            return Response(
+                {"error": "Export is not available for download", "status": task.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        return FileResponse(
+            open(task.file_path, 'rb'), as_attachment=True,
+            filename=os.path.basename(task.file_path), content_type='application/gzip'
+        )
+
+
+# ---------------- SEARCH ----------------
+class SearchView(APIView):
+    """
+    Ranked full-text search over jobs, questions and templates.
+    `?q=` is required; `?type=job,question` limits the types searched.
+    Hits follow the visibility rules of the list endpoints.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if not fulltext_available():
+            return Response({"error": "Full-text search is not available"}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        types = [t for t in request.query_params.get('type', '').split(',') if t]
+        unknown = set(types) - set(FULLTEXT_INDEXES)
+        if unknown:
+            return Response({"error": f"Unknown type: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"results": search(query, types, request.user, max(limit, 1))})
+
 
 # ---------------- CANDIDATE ----------------
 class CandidateViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
@@ -203,7 +767,7 @@ class CandidateViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
 
 
 # ---------------- CANDIDATE RESPONSES ----------------
-class CandidateResponseViewSet(viewsets.ModelViewSet):
+class CandidateResponseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Candidate submits responses to a job’s screening questions in one flow:
     - Candidate info (id or object)
@@ -215,6 +779,19 @@ class CandidateResponseViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
     authentication_classes = []
 
+    def get_queryset(self):
+        return CandidateResponseSerializer.setup_eager_loading(self.queryset.all(), self.request)
+
+    def retrieve(self, request, *args, **kwargs):
+        build = super().retrieve
+        return self.conditional_response(request, lambda: build(request, *args, **kwargs))
+
+    def get_revision(self):
+        if self.action != 'retrieve':
+            return None
+        row = CandidateResponse.objects.filter(pk=self.kwargs['pk']).values_list('revision', 'updated_at').first()
+        return row and (('response', self.kwargs['pk'], row[0]), row[1])
+
 
     def create(self, request, job_id=None):
         data = request.data.copy()
@@ -236,87 +813,98 @@ class CandidateResponseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # --- Candidate Handling ---
-        candidate = None
-        if isinstance(candidate_data, int) or str(candidate_data).isdigit():
-            # Candidate by ID
-            try:
-                candidate = Candidate.objects.get(id=candidate_data)
+        try:
+            job = Job.objects.get(id=job_id)
+        except (Job.DoesNotExist, ValueError):
+            return Response(
+                {"error": f"Job with id {job_id} not found"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            # --- Candidate Handling ---
+            candidate = None
+            if isinstance(candidate_data, int) or str(candidate_data).isdigit():
+                # Candidate by ID
+                try:
+                    candidate = Candidate.objects.get(id=candidate_data)
+                except Candidate.DoesNotExist:
+                    return Response(
+                        {"error": f"Candidate with id {candidate_data} not found"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 # Verify this candidate is associated with the correct job
-                if candidate.job_id != job_id:
+                if candidate.job_id != job.id:
                     return Response(
                         {"error": "Candidate is not associated with this job"},
                         status=status.HTTP_400_BAD_REQUEST
                     )
-            except Candidate.DoesNotExist:
-                return Response(
-                    {"error": f"Candidate with id {candidate_data} not found"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        elif isinstance(candidate_data, dict):
-            # Candidate by object - use the job from context
-            candidate_data['job'] = job_id
-            candidate_serializer = CandidateSerializer(data=candidate_data)
-            if candidate_serializer.is_valid():
-                # Try to find existing candidate by email for this job
-                try:
-                    candidate = Candidate.objects.get(email=candidate_data['email'], job_id=job_id)
-                    # Update name if provided and different
-                    if candidate_data.get('name') and candidate.name != candidate_data['name']:
-                        candidate.name = candidate_data['name']
-                        candidate.save()
-                except Candidate.DoesNotExist:
-                    # Create new candidate
+            elif isinstance(candidate_data, dict):
+                # Candidate by object - use the job from context
+                candidate_data['job'] = job.id
+                email = candidate_data.get('email')
+                candidate = Candidate.objects.filter(email=email, job=job).first() if email else None
+                if candidate is None:
+                    candidate_serializer = CandidateSerializer(data=candidate_data)
+                    if not candidate_serializer.is_valid():
+                        return Response(
+                            {"error": "Invalid candidate data", "details": candidate_serializer.errors},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
                     candidate = candidate_serializer.save()
+                elif candidate_data.get('name') and candidate.name != candidate_data['name']:
+                    # Update name if provided and different
+                    candidate.name = candidate_data['name']
+                    candidate.save(update_fields=['name'])
             else:
                 return Response(
-                    {"error": "Invalid candidate data", "details": candidate_serializer.errors},
+                    {"error": "Invalid candidate format. Provide ID or candidate object."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        else:
-            return Response(
-                {"error": "Invalid candidate format. Provide ID or candidate object."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # --- Create CandidateResponse ---
-        try:
-            job = Job.objects.get(id=job_id)
-        except Job.DoesNotExist:
-            return Response(
-                {"error": f"Job with id {job_id} not found"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        response_obj = CandidateResponse.objects.create(
-            candidate=candidate,
-            job=job
-        )
-        
-        # --- Create Answers ---
-        for ans in answers:
-            question_id = ans.get("question")
-            answer_text = ans.get("answer_text")  # Use answer_text instead of answer
-            
-            if not question_id or answer_text is None:
-                continue  # skip invalid entries
-            
-            try:
-                question = ScreeningQuestion.objects.get(id=question_id, job_id=job_id)
-            except ScreeningQuestion.DoesNotExist:
-                continue  # skip invalid questions
             
-            CandidateAnswer.objects.create(
-                response=response_obj,
-                question=question,
-                answer_text=answer_text
-            )
+            # --- Create CandidateResponse and Answers ---
+            # Invalid entries and questions from other jobs are skipped
+            response_obj = submit_response(job, candidate, (
+                (ans.get("question"), ans.get("answer_text"))
+                for ans in answers
+                if isinstance(ans, dict)
+            ))
         
         return Response(
             {"message": "Answers submitted successfully!", "response_id": response_obj.id},
             status=status.HTTP_201_CREATED
         )
 
+class CandidateResponseIngestView(APIView):
+    """
+    Bulk import of candidate submissions for the employer's jobs.
+    The body is newline-delimited JSON (one {candidate, job, answers} object
+    per line) and is read incrementally; the reply streams one NDJSON report
+    entry per input line.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        chunk_size = request.query_params.get('chunk_size')
+        if chunk_size is not None:
+            if not chunk_size.isdigit() or int(chunk_size) < 1:
+                return Response(
+                    {"error": "chunk_size must be a positive integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            chunk_size = int(chunk_size)
+
+        stream = request.stream
+        lines = iter(stream.readline, b'') if stream is not None else ()
+        reports = ingest_responses(
+            lines, chunk_size=chunk_size, jobs=Job.objects.filter(employer=request.user)
+        )
+        return StreamingHttpResponse(
+            (json.dumps(report) + "\n" for report in reports),
+            content_type="application/x-ndjson"
+        )
+
+
 class CandidateAnswerViewSet(viewsets.ModelViewSet):
     """
     API endpoint for managing candidate answers.
@@ -326,26 +914,42 @@ class CandidateAnswerViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         response_pk = self.kwargs.get('response_pk')
-        return CandidateAnswer.objects.filter(response_id=response_pk)
+        queryset = CandidateAnswer.objects.filter(response_id=response_pk)
+        if self.action in ('score', 'update', 'partial_update'):
+            # Saves apply the difference to the stored score: hold the row
+            # until the save commits, so concurrent edits cannot both apply it
+            queryset = queryset.select_for_update()
+        return CandidateAnswerSerializer.setup_eager_loading(queryset, self.request)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['response_pk'] = self.kwargs.get('response_pk')
         return context
 
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
     @action(detail=True, methods=['patch'])
     def score(self, request, response_pk=None, pk=None):
         """Update the score of a specific answer"""
-        answer = self.get_object()
         score = request.data.get('score')
         
         if score is not None:
-            answer.score = score
-            answer.save()
-            
-            # Recalculate overall response score
-            answer.response.calculate_overall_score()
-            answer.response.save()
+            try:
+                score = int(score)
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'Score must be an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Saving applies the change to the response's running totals
+            with transaction.atomic():
+                answer = self.get_object()
+                answer.score = score
+                answer.auto_scored = False  # reviewer override
+                answer.save(update_fields=['score', 'auto_scored'])
             
             return Response({'score': answer.score})
         
@@ -2,11 +2,36 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from taggit.models import Tag
 from taggit.admin import TagAdmin
-from .models import Employer, Job, ScreeningQuestion, TemplateQuestion, CandidateAnswer, Candidate, CandidateResponse
+from django.db.models import Q
+from .models import Employer, Job, ScreeningQuestion, TemplateQuestion, CandidateAnswer, Candidate, CandidateResponse, ExportTask, TagAlias
+from .search import fulltext_available, match_expression, matching_ids
 
 # Clean up admin by removing default Tag registration
 admin.site.unregister(Tag)
 
+
+class FullTextSearchMixin:
+    """
+    Route admin search through the FTS indexes.
+    `fulltext_fields` maps search fields to the index serving them, as
+    (path of the indexed row, index type): ('pk', 'job') for a job's own
+    columns, ('job', 'job') for job__title. The other search_fields are
+    matched exactly, so no search scans a table with LIKE.
+    """
+    fulltext_fields = {}
+
+    def get_search_results(self, request, queryset, search_term):
+        if not fulltext_available() or not match_expression(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        condition = Q()
+        for path, kind in dict.fromkeys(self.fulltext_fields.values()):
+            condition |= Q(**{f"{path}__in": matching_ids(kind, search_term)})
+        for field in self.get_search_fields(request):
+            if field not in self.fulltext_fields:
+                condition |= Q(**{field: search_term})
+        return queryset.filter(condition), False
+
+
 class EmployerAdmin(UserAdmin):
     list_display = ('username', 'email', 'phone', 'company_name')
     search_fields = ('username', 'email', 'company_name')
@@ -19,9 +44,10 @@ class EmployerAdmin(UserAdmin):
 
 admin.site.register(Employer, EmployerAdmin)
 
-class JobAdmin(admin.ModelAdmin):
-    list_display = ('title', 'employer', 'seniority', 'display_tags')
+class JobAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ('title', 'employer', 'seniority', 'display_tags', 'candidate_count', 'response_count')
     search_fields = ('title', 'description', 'employer__username')
+    fulltext_fields = {'title': ('pk', 'job'), 'description': ('pk', 'job')}
     list_filter = ('tags', 'seniority', 'employer')
     
     def display_tags(self, obj):
@@ -30,9 +56,10 @@ class JobAdmin(admin.ModelAdmin):
 
 admin.site.register(Job, JobAdmin)
 
-class ScreeningQuestionAdmin(admin.ModelAdmin):
+class ScreeningQuestionAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('job', 'short_text', 'rating', 'is_custom', 'is_approved')
     search_fields = ('job__title', 'text')
+    fulltext_fields = {'job__title': ('job', 'job'), 'text': ('pk', 'question')}
     list_filter = ('is_custom', 'is_approved', 'job__employer')
     
     def short_text(self, obj):
@@ -41,9 +68,10 @@ class ScreeningQuestionAdmin(admin.ModelAdmin):
 
 admin.site.register(ScreeningQuestion, ScreeningQuestionAdmin)
 
-class TemplateQuestionAdmin(admin.ModelAdmin):
+class TemplateQuestionAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('tag', 'short_template_text')
     search_fields = ('tag', 'template_text')
+    fulltext_fields = {'tag': ('pk', 'template'), 'template_text': ('pk', 'template')}
     list_filter = ('tag',)
     
     def short_template_text(self, obj):
@@ -52,6 +80,12 @@ class TemplateQuestionAdmin(admin.ModelAdmin):
 
 admin.site.register(TemplateQuestion, TemplateQuestionAdmin)
 
+class TagAliasAdmin(admin.ModelAdmin):
+    list_display = ('alias', 'tag')
+    search_fields = ('alias', 'tag')
+
+admin.site.register(TagAlias, TagAliasAdmin)
+
 class CandidateAnswerAdmin(admin.ModelAdmin):
     list_display = ('response', 'short_question', 'short_answer', 'score')
     search_fields = ('response__candidate__name', 'question__text')
@@ -80,4 +114,12 @@ class CandidateResponseAdmin(admin.ModelAdmin):
     list_filter = ('job', 'submitted_at')
     readonly_fields = ('submitted_at',)
 
-admin.site.register(CandidateResponse, CandidateResponseAdmin)
\ No newline at end of file
+admin.site.register(CandidateResponse, CandidateResponseAdmin)
+
+class ExportTaskAdmin(admin.ModelAdmin):
+    list_display = ('job', 'kind', 'file_format', 'status', 'rows_written', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind', 'file_format')
+    search_fields = ('job__title',)
+    readonly_fields = ('rows_written', 'attempts', 'file_path', 'error', 'created_at', 'started_at', 'finished_at')
+
+admin.site.register(ExportTask, ExportTaskAdmin)
@@ -0,0 +1,268 @@
+"""
+Materialized answer statistics per job and per screening question.
+
+JobAnalytics and QuestionAnalytics keep answer counts and running sums of
+the scores and of their squares, so the mean and variance are derived
+without reading answers, and ScoreBucket rows hold each question's score
+histogram. Write paths collect their changes in an AnalyticsDelta that is
+applied as F() increments, one UPDATE per distinct delta, so concurrent
+writers never overwrite each other; rows emptied by deletes are removed.
+Dashboards only read these small rows; rebuild_analytics() recomputes them
+from the answers and leaves the same rows behind.
+"""
+from collections import defaultdict
+from functools import reduce
+from itertools import chain
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    CandidateAnswer, Job, JobAnalytics, QuestionAnalytics,
+    ScoreBucket, ScreeningQuestion,
+)
+
+COUNTERS = ('answer_count', 'answered_count', 'scored_count', 'score_sum', 'score_square_sum')
+
+
+def _increments(names, deltas):
+    return {name: F(name) + delta for name, delta in zip(names, deltas) if delta}
+
+
+class AnalyticsDelta:
+    """Counter changes collected from one write, applied together."""
+
+    def __init__(self):
+        self.questions = defaultdict(lambda: [0] * len(COUNTERS))
+        self.buckets = defaultdict(int)
+
+    def add_answer(self, question_id, answer_text, score, sign=1):
+        """Count an answer created (sign 1) or deleted (sign -1)."""
+        counters = self.questions[question_id]
+        counters[0] += sign
+        if answer_text:
+            counters[1] += sign
+        if sign > 0:
+            self.change_score(question_id, None, score)
+        else:
+            self.change_score(question_id, score, None)
+
+    def change_score(self, question_id, old_score, new_score):
+        """Move an answer between scores; None means "not scored"."""
+        if old_score == new_score:
+            return
+        counters = self.questions[question_id]
+        for score, sign in ((old_score, -1), (new_score, 1)):
+            if score is not None:
+                counters[2] += sign
+                counters[3] += sign * score
+                counters[4] += sign * score * score
+                self.buckets[question_id, score] += sign
+
+    def apply(self, question_jobs=None, create=True):
+        """
+        Write the changes.
+
+        `question_jobs` maps question id to job id when the caller knows it;
+        otherwise it is looked up. Missing rows are created unless `create`
+        is false (deletes, where the rows may be going away too).
+        """
+        questions = {pk: counters for pk, counters in self.questions.items() if any(counters)}
+        buckets = {key: delta for key, delta in self.buckets.items() if delta}
+        if question_jobs is None and questions:
+            question_jobs = dict(
+                ScreeningQuestion.objects.filter(id__in=list(questions)).values_list('id', 'job_id')
+            )
+
+        jobs = defaultdict(lambda: [0] * len(COUNTERS))
+        for question_id, counters in questions.items():
+            job_id = question_jobs.get(question_id)
+            if job_id is not None:
+                totals = jobs[job_id]
+                for index, delta in enumerate(counters):
+                    totals[index] += delta
+        jobs = {pk: counters for pk, counters in jobs.items() if any(counters)}
+        if not questions and not buckets:
+            return
+
+        now = timezone.now()
+        with transaction.atomic():
+            if create:
+                JobAnalytics.objects.bulk_create(
+                    [JobAnalytics(job_id=pk, updated_at=now) for pk in jobs], ignore_conflicts=True
+                )
+                QuestionAnalytics.objects.bulk_create(
+                    [QuestionAnalytics(question_id=pk, updated_at=now) for pk in questions],
+                    ignore_conflicts=True,
+                )
+                ScoreBucket.objects.bulk_create(
+                    [ScoreBucket(question_id=pk, score=score) for (pk, score), delta in buckets.items()
+                     if delta > 0],
+                    ignore_conflicts=True,
+                )
+
+            # Rows receiving the same deltas share one UPDATE (a submission
+            # adds one answer to every question it answers)
+            for model, key, names, changes in (
+                (JobAnalytics, 'job_id', COUNTERS, jobs),
+                (QuestionAnalytics, 'question_id', COUNTERS, questions),
+            ):
+                groups = defaultdict(list)
+                for pk, counters in changes.items():
+                    groups[tuple(counters)].append(pk)
+                for counters, pks in groups.items():
+                    model.objects.filter(**{f'{key}__in': pks}).update(
+                        updated_at=now, **_increments(names, counters)
+                    )
+
+            by_delta = defaultdict(list)
+            for (question_id, score), delta in buckets.items():
+                by_delta[delta].append(Q(question_id=question_id, score=score))
+            for delta, conditions in by_delta.items():
+                ScoreBucket.objects.filter(reduce(or_, conditions)).update(count=F('count') + delta)
+
+            # Rows emptied by deletes and score changes go, as rebuild_analytics()
+            # only creates them for answers that exist
+            emptied = [conditions for delta, conditions in by_delta.items() if delta < 0]
+            if emptied:
+                ScoreBucket.objects.filter(reduce(or_, chain(*emptied)), count__lte=0).delete()
+            shrunk = [pk for pk, counters in questions.items() if counters[0] < 0]
+            if shrunk:
+                QuestionAnalytics.objects.filter(question_id__in=shrunk, answer_count__lte=0).delete()
+
+
+def record_answers(answers, question_jobs=None, sign=1):
+    """Count created (or, with sign=-1, deleted) answers."""
+    delta = AnalyticsDelta()
+    for answer in answers:
+        delta.add_answer(answer.question_id, answer.answer_text, answer.score, sign)
+    delta.apply(question_jobs, create=sign > 0)
+
+
+def analytics_rows(answers):
+    """
+    Job, question and bucket rows aggregated from an answer queryset.
+
+    Returns (jobs, questions, buckets): dicts of job id and question id to
+    counter lists in COUNTERS order, and a list of (question_id, score, count).
+    """
+    jobs = defaultdict(lambda: [0] * len(COUNTERS))
+    questions = {}
+    for row in (
+        answers.order_by().values('question_id', 'question__job_id')
+        .annotate(
+            answers=Count('id'),
+            answered=Count('id', filter=~Q(answer_text='')),
+            scored=Count('score'),
+            total=Sum('score', default=0),
+            squares=Sum(F('score') * F('score'), default=0),
+        )
+    ):
+        counters = [row['answers'], row['answered'], row['scored'], row['total'], row['squares']]
+        questions[row['question_id']] = counters
+        totals = jobs[row['question__job_id']]
+        for index, value in enumerate(counters):
+            totals[index] += value
+
+    buckets = list(
+        answers.filter(score__isnull=False).order_by().values('question_id', 'score')
+        .annotate(n=Count('id')).values_list('question_id', 'score', 'n')
+    )
+    return dict(jobs), questions, buckets
+
+
+def rebuild_analytics(jobs=None):
+    """
+    Recompute the statistics of `jobs` (a Job queryset, all jobs by default)
+    from their answers. Returns the number of jobs rebuilt.
+
+    The jobs are filtered through a subquery rather than a list of ids, so
+    any number of jobs stays within the database's bound-parameter limit.
+    """
+    if jobs is None:
+        jobs = Job.objects.all()
+    jobs = jobs.order_by().values('id')
+    now = timezone.now()
+    with transaction.atomic():
+        job_ids = set(jobs.values_list('id', flat=True))
+        job_rows, question_rows, bucket_rows = analytics_rows(
+            CandidateAnswer.objects.filter(question__job__in=jobs)
+        )
+        JobAnalytics.objects.filter(job__in=jobs).delete()
+        QuestionAnalytics.objects.filter(question__job__in=jobs).delete()
+        ScoreBucket.objects.filter(question__job__in=jobs).delete()
+        JobAnalytics.objects.bulk_create(
+            [JobAnalytics(job_id=pk, updated_at=now, **dict(zip(COUNTERS, job_rows.get(pk, ()))))
+             for pk in job_ids],
+            batch_size=500,
+        )
+        QuestionAnalytics.objects.bulk_create(
+            [QuestionAnalytics(question_id=pk, updated_at=now, **dict(zip(COUNTERS, counters)))
+             for pk, counters in question_rows.items()],
+            batch_size=500,
+        )
+        ScoreBucket.objects.bulk_create(
+            [ScoreBucket(question_id=pk, score=score, count=count) for pk, score, count in bucket_rows],
+            batch_size=500,
+        )
+    return len(job_ids)
+
+
+def _summary(statistics):
+    return {
+        'answer_count': statistics.answer_count,
+        'answered_count': statistics.answered_count,
+        'scored_count': statistics.scored_count,
+        'mean_score': statistics.mean_score,
+        'score_variance': statistics.score_variance,
+    }
+
+
+def _histogram(pairs):
+    return [{'score': score, 'count': count} for score, count in sorted(pairs) if count]
+
+
+def job_analytics(job):
+    """
+    Dashboard data for `job`, read from the materialized rows only.
+
+    Answer rates are the share of the job's responses (Job.response_count)
+    that answered each question with some text.
+    """
+    statistics = JobAnalytics.objects.filter(job=job).first() or JobAnalytics(job=job, updated_at=None)
+    questions = list(
+        ScreeningQuestion.objects.filter(job=job).select_related('analytics').order_by('id')
+    )
+    per_question = defaultdict(list)
+    job_buckets = defaultdict(int)
+    for question_id, score, count in ScoreBucket.objects.filter(question__job=job).values_list(
+        'question_id', 'score', 'count'
+    ):
+        per_question[question_id].append((score, count))
+        job_buckets[score] += count
+
+    responses = job.response_count
+    rows = []
+    for question in questions:
+        try:
+            row_statistics = question.analytics
+        except QuestionAnalytics.DoesNotExist:
+            row_statistics = QuestionAnalytics(question=question)
+        rows.append({
+            'question': question.id,
+            'text': question.text,
+            **_summary(row_statistics),
+            'answer_rate': row_statistics.answered_count / responses if responses else None,
+            'histogram': _histogram(per_question[question.id]),
+        })
+
+    return {
+        'job': job.id,
+        'response_count': responses,
+        **_summary(statistics),
+        'histogram': _histogram(job_buckets.items()),
+        'updated_at': statistics.updated_at,
+        'questions': rows,
+    }
@@ -0,0 +1,176 @@
+"""
+Batch auto-scoring of candidate answers.
+
+Questions describe a good answer with `expected_keywords` and/or a
+`reference_answer`. All answers of a job are scored together: the TF-IDF
+vocabulary is fitted once over the job's answers and references, and the
+cosine similarity and keyword coverage of every answer are computed with
+NumPy array operations instead of per-answer Python loops.
+
+NumPy is optional (`pip install numpy`); it is only imported when scoring
+runs. Auto scores never replace a score set by a reviewer: only unscored
+answers (and, when rescoring, previous auto scores) are written, and
+setting a score through the API clears `auto_scored`.
+"""
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .analytics import rebuild_analytics
+from .models import CandidateAnswer, CandidateResponse, Job, ScreeningQuestion
+from .neardup import STOPWORDS
+from .scoring import recompute_response_scores
+from .text import SeparatorTable
+
+UPDATE_BATCH_SIZE = 500
+
+_separators = SeparatorTable()
+
+
+class AutoScoringUnavailable(Exception):
+    """Raised when NumPy is not installed."""
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise AutoScoringUnavailable("Auto-scoring requires NumPy (pip install numpy)") from None
+    return numpy
+
+
+def _tokens(text):
+    return text.casefold().translate(_separators).split()
+
+
+def _keywords(question):
+    return [word for keyword in question.expected_keywords.split(",") for word in _tokens(keyword)]
+
+
+def compute_scores(questions, answers, scale=None):
+    """
+    Score answers against their questions.
+
+    `questions` are ScreeningQuestion objects and `answers` a list of
+    (answer_id, question_id, answer_text). Returns a dict of answer id →
+    integer score from 0 to `scale` (AUTO_SCORE_SCALE by default). The score
+    is the mean of the answer's TF-IDF cosine similarity to the reference
+    answer and the share of expected keywords it mentions, for whichever of
+    the two the question defines.
+    """
+    np = _numpy()
+    scale = settings.AUTO_SCORE_SCALE if scale is None else scale
+    if not answers:
+        return {}
+
+    row_of_question = {question.id: row for row, question in enumerate(questions)}
+    n_questions, n_answers = len(questions), len(answers)
+
+    # Documents: the answers first, then one reference per question
+    documents = [_tokens(text) for _, _, text in answers]
+    documents += [_tokens(question.reference_answer) for question in questions]
+    keyword_lists = [_keywords(question) for question in questions]
+
+    # Vocabulary fitted once for the whole job
+    vocabulary = {word: index for index, word in enumerate(set(chain(*documents, *keyword_lists)))}
+    size = max(len(vocabulary), 1)
+    terms = np.fromiter(map(vocabulary.__getitem__, chain(*documents)), dtype=np.int64)
+    lengths = np.fromiter(map(len, documents), dtype=np.int64, count=len(documents))
+    docs = np.repeat(np.arange(len(documents), dtype=np.int64), lengths)
+
+    # Sparse term counts as (document, term, count) triples
+    keys, counts = np.unique(docs * size + terms, return_counts=True)
+    docs, terms = keys // size, keys % size
+
+    stopword = np.zeros(size, dtype=bool)
+    stopword[[index for word, index in vocabulary.items() if word in STOPWORDS]] = True
+    document_frequency = np.bincount(terms, minlength=size)
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    idf[stopword] = 0
+    weights = (1 + np.log(counts)) * idf[terms]
+    norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=len(documents)))
+
+    is_answer = docs < n_answers
+    answer_docs, answer_terms, answer_weights = docs[is_answer], terms[is_answer], weights[is_answer]
+    answer_rows = np.fromiter(
+        (row_of_question[question_id] for _, question_id, _ in answers), dtype=np.int64, count=n_answers
+    )
+    rows = answer_rows[answer_docs]
+
+    # Cosine similarity with the reference: a dense question × term matrix
+    # of reference weights, gathered for every (answer, term) pair at once
+    references = np.zeros((n_questions, size))
+    is_reference = ~is_answer
+    references[docs[is_reference] - n_answers, terms[is_reference]] = weights[is_reference]
+    reference_norms = norms[n_answers:]
+    dots = np.bincount(answer_docs, weights=answer_weights * references[rows, answer_terms], minlength=n_answers)
+    denominators = norms[:n_answers] * reference_norms[answer_rows]
+    cosine = np.divide(dots, denominators, out=np.zeros(n_answers), where=denominators > 0)
+
+    # Keyword coverage: expected keyword words present in the answer
+    expected = np.zeros((n_questions, size), dtype=bool)
+    for row, words in enumerate(keyword_lists):
+        expected[row, [vocabulary[word] for word in words]] = True
+    keyword_counts = expected.sum(axis=1)
+    hits = np.bincount(answer_docs, weights=expected[rows, answer_terms], minlength=n_answers)
+    coverage = np.divide(
+        hits, keyword_counts[answer_rows], out=np.zeros(n_answers), where=keyword_counts[answer_rows] > 0
+    )
+
+    has_reference = (reference_norms > 0)[answer_rows]
+    has_keywords = (keyword_counts > 0)[answer_rows]
+    signals = has_reference.astype(float) + has_keywords
+    similarity = np.divide(
+        cosine * has_reference + coverage * has_keywords, signals, out=np.zeros(n_answers), where=signals > 0
+    )
+    scores = np.rint(np.clip(similarity, 0, 1) * scale).astype(int)
+    return dict(zip((answer_id for answer_id, _, _ in answers), scores.tolist()))
+
+
+def auto_score_job(job, rescore=False):
+    """
+    Auto-score the answers of `job` whose questions define keywords or a reference.
+
+    Only unscored answers are scored, plus earlier auto scores when `rescore`
+    is set. Scores are written with one UPDATE per score value (batched), each
+    re-checking that no reviewer scored the answer meanwhile, and the
+    response totals and analytics of the job are recomputed once. Returns a dict with the
+    number of answers scored and of the distinct responses they belong to.
+    """
+    questions = list(
+        ScreeningQuestion.objects.filter(job=job)
+        .exclude(expected_keywords="", reference_answer="")
+        .only("id", "expected_keywords", "reference_answer")
+    )
+    if not questions:
+        return {"scored": 0, "responses": 0}
+
+    scorable = Q(score__isnull=True)
+    if rescore:
+        scorable |= Q(auto_scored=True)
+    answers = CandidateAnswer.objects.filter(scorable, question__in=questions)
+    rows = list(answers.values_list("id", "question_id", "answer_text"))
+    if not rows:
+        return {"scored": 0, "responses": 0}
+
+    by_score = {}
+    for answer_id, score in compute_scores(questions, rows).items():
+        by_score.setdefault(score, []).append(answer_id)
+
+    scored = 0
+    response_ids = set()
+    with transaction.atomic():
+        for score, answer_ids in by_score.items():
+            for start in range(0, len(answer_ids), UPDATE_BATCH_SIZE):
+                batch = answers.select_for_update().filter(id__in=answer_ids[start:start + UPDATE_BATCH_SIZE])
+                # Read under the lock, so only the responses of rows the UPDATE writes count
+                response_ids.update(batch.values_list("response_id", flat=True))
+                scored += batch.update(score=score, auto_scored=True)
+        # One UPDATE over the job's responses rather than a huge id list
+        recompute_response_scores(CandidateResponse.objects.filter(job=job))
+        # Some rows may have been skipped by the re-check, so the analytics
+        # are recomputed rather than adjusted by the expected deltas
+        rebuild_analytics(Job.objects.filter(pk=job.pk))
+    return {"scored": scored, "responses": len(response_ids)}
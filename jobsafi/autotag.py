@@ -0,0 +1,236 @@
+"""
+Auto-tagging of jobs from their title and description.
+
+The vocabulary is every template tag plus the TagAlias table. It is compiled
+into a token-level Aho-Corasick automaton, so a description is scanned once
+however many patterns there are. The automaton is kept per process and only
+rebuilt when the template or alias version counter moves.
+"""
+import threading
+from collections import defaultdict, deque
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.functions import Lower
+from taggit.models import Tag, TaggedItem
+
+from .models import Job, TagAlias
+from .public_cache import invalidate_jobs
+from .revisions import touch
+from .template_index import VERSION_NAME as TEMPLATES_VERSION, get_template_index, normalize_tag
+from .text import SeparatorTable
+from .utils import JOB_BATCH_SIZE
+from .versions import bump_version, get_versions
+
+ALIASES_VERSION = "tag_aliases"
+
+_matcher = None
+_lock = threading.Lock()
+
+
+# Dots, dashes, + and # are kept so "node.js", "c++" and "c#" stay one word
+_separators = SeparatorTable(keep="_+#.-")
+
+
+def tokenize(text):
+    return [word.strip(".-") for word in text.casefold().translate(_separators).split()]
+
+
+class TagMatcher:
+    """Aho-Corasick automaton over word tokens, mapping phrases to tags."""
+
+    def __init__(self, version, patterns):
+        self.version = version
+        goto = [{}]
+        outputs = [set()]
+        for phrase, tag in patterns:
+            state = 0
+            for token in filter(None, tokenize(phrase)):
+                next_state = goto[state].get(token)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][token] = next_state
+                    goto.append({})
+                    outputs.append(set())
+                state = next_state
+            if state:
+                outputs[state].add(tag)
+
+        # Failure links in breadth-first order, so a state's fallback has
+        # its own outputs merged before they are copied into the state.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and token not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(token, 0)
+                outputs[next_state] |= outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(tags) or None for tags in outputs]
+
+    def __len__(self):
+        return len(self._goto) - 1
+
+    def match(self, *texts):
+        """Return the set of tags whose phrases occur in any of `texts`."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        root = goto[0]
+        found = set()
+        for text in texts:
+            state = 0
+            for token in tokenize(text or ""):
+                if not state:
+                    # Most words start no pattern: one dict lookup and move on
+                    state = root.get(token, 0)
+                    if not state:
+                        continue
+                else:
+                    while state and token not in goto[state]:
+                        state = fail[state]
+                    state = goto[state].get(token, 0)
+                if outputs[state]:
+                    found.update(outputs[state])
+        return found
+
+
+def get_tag_matcher():
+    """Return the current matcher, rebuilding it if the vocabulary changed."""
+    global _matcher
+    version = tuple(get_versions(TEMPLATES_VERSION, ALIASES_VERSION))
+    matcher = _matcher
+    if matcher is not None and matcher.version == version:
+        return matcher
+
+    with _lock:
+        matcher = _matcher
+        if matcher is None or matcher.version != version:
+            patterns = [(tag, tag) for tag in get_template_index().by_tag]
+            patterns.extend(TagAlias.objects.values_list("alias", "tag"))
+            matcher = TagMatcher(version, patterns)
+            _matcher = matcher
+        return matcher
+
+
+def _drop_matcher():
+    global _matcher
+    bump_version(ALIASES_VERSION)
+    _matcher = None
+
+
+def invalidate_tag_aliases():
+    """
+    Mark every process's matcher as stale once the alias change commits,
+    so no worker rebuilds it from the old aliases under the new version.
+    """
+    transaction.on_commit(_drop_matcher)
+
+
+def autotag_jobs(jobs, previous=None, created=False):
+    """
+    Add the vocabulary tags found in each job's title and description.
+
+    Accepts a job or an iterable/queryset of jobs or ids. Tags the jobs
+    already carry are left alone and nothing is ever removed. `previous`
+    maps job ids to their earlier (title, description): only tags the new
+    text matches and the earlier text did not are added. Missing Tag rows
+    are created once and the links are bulk inserted (see add_job_tags for
+    `created`). Returns a dict of job id → added tag names.
+    """
+    if isinstance(jobs, Job):
+        jobs = [jobs]
+    job_ids = [job.pk if isinstance(job, Job) else job for job in jobs]
+    if not job_ids:
+        return {}
+
+    matcher = get_tag_matcher()
+    previous = previous or {}
+    added = {}
+    for start in range(0, len(job_ids), JOB_BATCH_SIZE):
+        batch = job_ids[start:start + JOB_BATCH_SIZE]
+        current = defaultdict(set)
+        for job_id, tag_name in Job.objects.filter(pk__in=batch, tags__isnull=False).values_list("pk", "tags__name"):
+            current[job_id].add(normalize_tag(tag_name))
+        for job_id, title, description in Job.objects.filter(pk__in=batch).values_list("pk", "title", "description"):
+            new_tags = matcher.match(title, description) - current[job_id]
+            if job_id in previous:
+                new_tags -= matcher.match(*previous[job_id])
+            if new_tags:
+                added[job_id] = sorted(new_tags)
+
+    if added:
+        add_job_tags(added, created=created)
+    return added
+
+
+def _existing_tags(names):
+    return {
+        tag.lname: tag
+        for tag in Tag.objects.annotate(lname=Lower("name")).filter(lname__in=names)
+    }
+
+
+def resolve_tags(names):
+    """
+    Return a dict of normalized name → Tag, creating the missing tags.
+
+    Existing tags are matched case-insensitively with one query. New tags
+    whose slug is free are bulk inserted; the rare ones whose slug is taken
+    (or shared within the batch) go through Tag.save(), which derives a
+    unique one.
+    """
+    names = set(names)
+    tags = _existing_tags(names)
+    missing = names - tags.keys()
+    if not missing:
+        return tags
+
+    slugs = {name: Tag().slugify(name) for name in missing}
+    taken = set(Tag.objects.filter(slug__in=set(slugs.values())).values_list("slug", flat=True))
+    claimed = set()
+    fresh, clashing = [], []
+    for name, slug in sorted(slugs.items()):
+        if not slug or slug in taken or slug in claimed:
+            clashing.append(name)
+        else:
+            claimed.add(slug)
+            fresh.append(Tag(name=name, slug=slug))
+    # A concurrent import may create the same tags: re-read instead of trusting pks
+    Tag.objects.bulk_create(fresh, ignore_conflicts=True)
+    tags.update(_existing_tags(missing))
+    for name in missing - tags.keys():
+        tags[name] = Tag.objects.create(name=name)
+    return tags
+
+
+def add_job_tags(job_tags, created=False):
+    """
+    Link tags to jobs with one bulk insert.
+
+    `job_tags` maps job id to normalized tag names; missing tags are created.
+    Links the jobs already have are skipped. With `created`, the jobs were
+    inserted in the current transaction: no revision or cached page of them
+    exists yet, so none is bumped and the caller expires the listings.
+    """
+    names = {name for tags in job_tags.values() for name in tags}
+    with transaction.atomic():
+        tags = resolve_tags(names)
+        content_type = ContentType.objects.get_for_model(Job)
+        TaggedItem.objects.bulk_create(
+            [
+                TaggedItem(content_type=content_type, object_id=job_id, tag=tags[name])
+                for job_id, tag_names in job_tags.items()
+                for name in tag_names
+            ],
+            ignore_conflicts=True,
+        )
+    if created:
+        return
+    # Bulk inserts send no m2m_changed signal
+    touch(Job.objects.filter(pk__in=list(job_tags)))
+    invalidate_jobs(job_tags)
@@ -0,0 +1,60 @@
+"""
+Candidate and response counters on Job.
+
+Job listings show `candidate_count` and `response_count` without counting
+rows. Creates and deletes are applied as F() increments, so concurrent
+submissions never lose a count; signals cover single saves and deletes,
+and bulk_create callers report their rows with adjust_job_counters().
+reconcile_job_counters() rebuilds the columns from the tables. The cached
+public listings leave the counters out and read them fresh, so counter
+changes expire no cache entry.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Candidate, CandidateResponse, Job
+
+
+def adjust_job_counters(candidates=None, responses=None):
+    """
+    Add count deltas to jobs.
+
+    `candidates` and `responses` map job id to a delta. Jobs receiving the
+    same pair of deltas share one UPDATE.
+    """
+    candidates, responses = Counter(candidates or {}), Counter(responses or {})
+    groups = defaultdict(list)
+    for job_id in set(candidates) | set(responses):
+        deltas = (candidates[job_id], responses[job_id])
+        if any(deltas):
+            groups[deltas].append(job_id)
+
+    for (candidate_delta, response_delta), job_ids in groups.items():
+        changes = {}
+        if candidate_delta:
+            changes['candidate_count'] = F('candidate_count') + candidate_delta
+        if response_delta:
+            changes['response_count'] = F('response_count') + response_delta
+        Job.objects.filter(id__in=job_ids).update(**changes)
+
+
+def _count(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(job=OuterRef('pk')).order_by().values('job')
+            .annotate(n=Count('id')).values('n')
+        ),
+        0,
+    )
+
+
+def reconcile_job_counters(jobs=None):
+    """
+    Recount candidates and responses of `jobs` (all jobs by default) in one
+    UPDATE with correlated subqueries. Returns the number of jobs updated.
+    """
+    if jobs is None:
+        jobs = Job.objects.all()
+    return jobs.update(candidate_count=_count(Candidate), response_count=_count(CandidateResponse))
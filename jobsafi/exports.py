@@ -0,0 +1,237 @@
+"""
+Streaming exports of a job's data as CSV or NDJSON.
+
+Rows are read with QuerySet.iterator() over plain joins (no prefetching),
+grouped on the fly and written out one line at a time, so memory stays
+flat and the first line is available immediately whatever the size of the
+job. Exports too large for a request are queued as ExportTask rows and
+written to gzip files by the run_export_worker command; tasks abandoned by
+a dead worker are claimed again, and a task's file is removed with it.
+"""
+import csv
+import gzip
+import json
+import logging
+import os
+from contextlib import suppress
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Candidate, CandidateResponse, ExportTask, ScreeningQuestion
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def response_rows(job, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield a header and then one row per response of the job: candidate,
+    submitted_at, overall_score and each question's answer and score.
+    """
+    questions = list(job.questions.order_by("id").values_list("id", "text"))
+    header = ["response_id", "candidate", "email", "submitted_at", "overall_score"]
+    for question_id, text in questions:
+        header += [f"Q{question_id}: {text}", f"Q{question_id} score"]
+    yield header
+
+    # One LEFT JOIN row per (response, answer), already grouped by response
+    rows = (
+        CandidateResponse.objects.filter(job=job)
+        .order_by("id", "answers__question_id")
+        .values_list(
+            "id", "candidate__name", "candidate__email", "submitted_at", "overall_score",
+            "answers__question_id", "answers__answer_text", "answers__score",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        answers = {row[5]: (row[6], row[7]) for row in group if row[5] is not None}
+        row = list(group[0][:5])
+        for question_id, _ in questions:
+            row.extend(answers.get(question_id, (None, None)))
+        yield row
+
+
+def candidate_rows(job, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a header and then one row per candidate of the job."""
+    fields = ["id", "name", "email", "resume"]
+    yield fields
+    yield from (
+        Candidate.objects.filter(job=job).order_by("id")
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def question_rows(job, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a header and then one row per screening question of the job."""
+    fields = ["id", "text", "is_custom", "is_approved", "rating"]
+    yield fields
+    yield from (
+        ScreeningQuestion.objects.filter(job=job).order_by("id")
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+EXPORT_KINDS = {
+    "responses": response_rows,
+    "candidates": candidate_rows,
+    "questions": question_rows,
+}
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands back the line for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(["" if value is None else _cell(value) for value in row])
+
+
+def ndjson_lines(rows):
+    rows = iter(rows)
+    header = next(rows)
+    for row in rows:
+        yield json.dumps(dict(zip(header, map(_cell, row)))) + "\n"
+
+
+def export_lines(rows, output):
+    """Serialize header-first `rows` as lines of the given output format."""
+    if output == "csv":
+        return csv_lines(rows)
+    if output == "ndjson":
+        return ndjson_lines(rows)
+    raise ValueError(f"Unknown export format: {output}")
+
+
+# ---------------- BACKGROUND EXPORTS ----------------
+
+PROGRESS_EVERY = 1000
+
+
+def _claimable(now):
+    """Pending tasks, and running ones abandoned by their worker with attempts left."""
+    stale = now - timedelta(minutes=settings.EXPORT_TASK_TIMEOUT_MINUTES)
+    return Q(status=ExportTask.PENDING) | Q(
+        status=ExportTask.RUNNING, started_at__lt=stale, attempts__lt=settings.EXPORT_MAX_ATTEMPTS
+    )
+
+
+def fail_abandoned_tasks():
+    """Fail the tasks still running past the timeout that have no attempts left."""
+    now = timezone.now()
+    return ExportTask.objects.filter(
+        status=ExportTask.RUNNING,
+        started_at__lt=now - timedelta(minutes=settings.EXPORT_TASK_TIMEOUT_MINUTES),
+        attempts__gte=settings.EXPORT_MAX_ATTEMPTS,
+    ).update(
+        status=ExportTask.FAILED, finished_at=now,
+        error=f"Abandoned by its worker after {settings.EXPORT_MAX_ATTEMPTS} attempts",
+    )
+
+
+def claim_next_task():
+    """
+    Atomically move the oldest claimable task to running and return it.
+
+    A task still running EXPORT_TASK_TIMEOUT_MINUTES after it was claimed
+    lost its worker and is claimed again, until it has had
+    EXPORT_MAX_ATTEMPTS attempts.
+    """
+    fail_abandoned_tasks()
+    while True:
+        now = timezone.now()
+        task_id = (
+            ExportTask.objects.filter(_claimable(now))
+            .order_by("id").values_list("id", flat=True).first()
+        )
+        if task_id is None:
+            return None
+        # Only one worker wins the conditional UPDATE
+        claimed = ExportTask.objects.filter(_claimable(now), pk=task_id).update(
+            status=ExportTask.RUNNING, started_at=now, attempts=F("attempts") + 1
+        )
+        if claimed:
+            return ExportTask.objects.select_related("job").get(pk=task_id)
+
+
+def export_file_path(task):
+    name = f"job-{task.job_id}-{task.kind}-{task.pk}.{task.file_format}.gz"
+    return os.path.join(settings.EXPORT_ROOT, name)
+
+
+def remove_export_file(path):
+    if path:
+        with suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def run_export_task(task):
+    """
+    Write the task's export to a gzip file, recording progress as it goes.
+
+    Updates are restricted to the task's current attempt, so a worker whose
+    task was claimed again after the timeout cannot overwrite the outcome.
+    """
+    path = export_file_path(task)
+    partial = f"{path}.{task.attempts}.part"
+    os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+    attempt = ExportTask.objects.filter(pk=task.pk, attempts=task.attempts)
+    # CSV files start with a header line that is not a data row
+    header_lines = 1 if task.file_format == "csv" else 0
+    lines_written = 0
+    try:
+        rows = EXPORT_KINDS[task.kind](task.job)
+        with gzip.open(partial, "wt", encoding="utf-8", newline="") as out:
+            for line in export_lines(rows, task.file_format):
+                out.write(line)
+                lines_written += 1
+                if lines_written % PROGRESS_EVERY == 0:
+                    attempt.update(rows_written=lines_written - header_lines)
+        os.replace(partial, path)
+    except Exception as exc:
+        logger.exception("Export task %s failed", task.pk)
+        remove_export_file(partial)
+        attempt.update(status=ExportTask.FAILED, error=str(exc), finished_at=timezone.now())
+        return False
+
+    finished = attempt.update(
+        status=ExportTask.DONE, rows_written=max(lines_written - header_lines, 0),
+        file_path=path, finished_at=timezone.now()
+    )
+    if not finished and not ExportTask.objects.filter(pk=task.pk).exists():
+        # Deleted (e.g. with its job) while running: nothing points at the file
+        remove_export_file(path)
+    return bool(finished)
+
+
+def cleanup_expired_exports():
+    """Delete files of exports older than EXPORT_RETENTION_HOURS."""
+    cutoff = timezone.now() - timedelta(hours=settings.EXPORT_RETENTION_HOURS)
+    expired = ExportTask.objects.filter(status=ExportTask.DONE, finished_at__lt=cutoff)
+    for path in expired.values_list("file_path", flat=True):
+        remove_export_file(path)
+    return expired.update(status=ExportTask.EXPIRED, file_path="")
@@ -0,0 +1,176 @@
+"""
+Bulk ingest of candidate submissions from newline-delimited JSON.
+
+Each line is one submission:
+
+    {"job": 12, "candidate": {"name": "...", "email": "..."} or 34,
+     "answers": [{"question": 56, "answer_text": "..."}, ...]}
+
+Lines are consumed lazily and written in chunks: every chunk resolves its
+jobs, candidates and questions with one query each and inserts candidates,
+responses and answers with bulk_create inside one transaction, so memory
+depends on the chunk size rather than on the size of the input.
+"""
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .analytics import AnalyticsDelta
+from .counters import adjust_job_counters
+from .models import Candidate, CandidateAnswer, CandidateResponse, Job, ScreeningQuestion
+
+
+class IngestError(Exception):
+    pass
+
+
+def ingest_responses(lines, chunk_size=None, jobs=None):
+    """
+    Ingest NDJSON submissions and yield one report dict per non-blank line.
+
+    `lines` is any iterable of str/bytes lines. `jobs` optionally restricts
+    the jobs submissions may target (e.g. the requesting employer's jobs).
+    """
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    if jobs is None:
+        jobs = Job.objects.all()
+
+    chunk = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        chunk.append((number, line))
+        if len(chunk) >= chunk_size:
+            yield from _ingest_chunk(chunk, jobs)
+            chunk = []
+    if chunk:
+        yield from _ingest_chunk(chunk, jobs)
+
+
+def _parse(line):
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        raise IngestError(f"Invalid JSON: {exc}")
+    if not isinstance(record, dict):
+        raise IngestError("Each line must be a JSON object")
+
+    job_id = record.get("job")
+    candidate = record.get("candidate")
+    answers = record.get("answers")
+    if not isinstance(job_id, int) or not candidate or not isinstance(answers, list) or not answers:
+        raise IngestError("candidate, job, and answers are required")
+
+    if isinstance(candidate, dict):
+        email = candidate.get("email")
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise IngestError("Invalid candidate email")
+        candidate = {"email": email, "name": candidate.get("name") or ""}
+    elif not isinstance(candidate, int):
+        raise IngestError("Invalid candidate format. Provide ID or candidate object.")
+
+    pairs = []
+    for answer in answers:
+        if not isinstance(answer, dict):
+            continue
+        question_id, answer_text = answer.get("question"), answer.get("answer_text")
+        if isinstance(question_id, int) and isinstance(answer_text, str):
+            pairs.append((question_id, answer_text))
+    return job_id, candidate, pairs
+
+
+def _ingest_chunk(chunk, jobs):
+    reports = {}
+    records = []
+    for number, line in chunk:
+        try:
+            records.append((number, *_parse(line)))
+        except IngestError as exc:
+            reports[number] = {"line": number, "status": "error", "error": str(exc)}
+
+    # Batched lookups: one query each for jobs, candidates and questions
+    job_ids = set(jobs.filter(id__in={job_id for _, job_id, _, _ in records}).values_list("id", flat=True))
+    candidate_ids = {c for _, _, c, _ in records if isinstance(c, int)}
+    emails = {c["email"] for _, _, c, _ in records if isinstance(c, dict)}
+    candidates_by_id = dict(
+        Candidate.objects.filter(id__in=candidate_ids).values_list("id", "job_id")
+    )
+    candidates_by_email = {
+        email: (candidate_id, job_id)
+        for candidate_id, email, job_id in Candidate.objects.filter(email__in=emails)
+        .values_list("id", "email", "job_id")
+    }
+    question_jobs = dict(
+        ScreeningQuestion.objects.filter(
+            id__in={question_id for _, _, _, pairs in records for question_id, _ in pairs}
+        ).values_list("id", "job_id")
+    )
+
+    accepted = []
+    new_candidates = {}
+    for number, job_id, candidate, pairs in records:
+        error = None
+        if job_id not in job_ids:
+            error = f"Job with id {job_id} not found"
+        elif isinstance(candidate, int):
+            if candidate not in candidates_by_id:
+                error = f"Candidate with id {candidate} not found"
+            elif candidates_by_id[candidate] != job_id:
+                error = "Candidate is not associated with this job"
+        elif candidate["email"] in candidates_by_email:
+            candidate_id, candidate_job_id = candidates_by_email[candidate["email"]]
+            if candidate_job_id != job_id:
+                error = "Candidate email is already registered for another job"
+            candidate = candidate_id
+        elif candidate["email"] in new_candidates:
+            if new_candidates[candidate["email"]].job_id != job_id:
+                error = "Candidate email is already registered for another job"
+        else:
+            new_candidates[candidate["email"]] = Candidate(
+                job_id=job_id, email=candidate["email"], name=candidate["name"]
+            )
+
+        if error:
+            reports[number] = {"line": number, "status": "error", "error": error}
+            continue
+        # Answers to questions of other jobs are skipped, as in the API
+        pairs = [(q, text) for q, text in pairs if question_jobs.get(q) == job_id]
+        accepted.append((number, job_id, candidate, pairs))
+
+    with transaction.atomic():
+        Candidate.objects.bulk_create(new_candidates.values())
+        responses = CandidateResponse.objects.bulk_create([
+            CandidateResponse(
+                job_id=job_id,
+                candidate_id=candidate if isinstance(candidate, int)
+                else new_candidates[candidate["email"]].id,
+            )
+            for _, job_id, candidate, _ in accepted
+        ])
+        answers = CandidateAnswer.objects.bulk_create([
+            CandidateAnswer(response=response, question_id=question_id, answer_text=answer_text)
+            for response, (_, _, _, pairs) in zip(responses, accepted)
+            for question_id, answer_text in pairs
+        ])
+        # Bulk inserts send no signals: count the chunk's rows here
+        adjust_job_counters(
+            candidates=Counter(candidate.job_id for candidate in new_candidates.values()),
+            responses=Counter(response.job_id for response in responses),
+        )
+        analytics = AnalyticsDelta()
+        for answer in answers:
+            analytics.add_answer(answer.question_id, answer.answer_text, answer.score)
+        analytics.apply(question_jobs)
+
+    for response, (number, _, _, pairs) in zip(responses, accepted):
+        reports[number] = {
+            "line": number, "status": "ok", "response_id": response.id, "answers": len(pairs),
+        }
+    for number, _ in chunk:
+        yield reports[number]
@@ -0,0 +1,119 @@
+"""
+Bulk import of job postings from CSV or newline-delimited JSON.
+
+Each record is one job:
+
+    {"title": "...", "description": "...", "seniority": "...", "tags": ["python", "django"]}
+
+CSV input has the same columns under a header row, with the tags
+comma-separated in one cell. Records are read lazily and written in
+chunks, one transaction each: the chunk's jobs are bulk inserted, its tags
+resolved and linked with a few set-based queries, vocabulary tags added as
+on a single save, and questions optionally generated for the whole chunk.
+Reports of a chunk are only yielded once it has committed, and an
+interrupted import resumes after the last committed record (`start`).
+The cached public listings are expired once, when the import ends.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .autotag import add_job_tags, autotag_jobs
+from .models import Job
+from .public_cache import invalidate_listings
+from .records import RecordError, text_value
+from .template_index import normalize_tag
+from .utils import auto_generate_questions
+
+FIELDS = ("title", "description", "seniority")
+
+
+def _clean(record, employer, now):
+    """Return an unsaved Job and its normalized tag names, or raise RecordError."""
+    if isinstance(record, RecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordError("Each record must be a JSON object")
+
+    values = {name: text_value(record, name, Job._meta.get_field(name).max_length) for name in FIELDS}
+
+    tags = record.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise RecordError("tags must be a list of names or a comma-separated string")
+    names = list(dict.fromkeys(filter(None, map(normalize_tag, tags))))
+    if any(len(name) > 100 for name in names):
+        raise RecordError("Tag names are limited to 100 characters")
+
+    return Job(employer=employer, updated_at=now, **values), names
+
+
+def import_jobs(records, employer, chunk_size=None, start=0, generate=False, progress=None):
+    """
+    Import jobs for `employer` and yield one report dict per record.
+
+    `records` yields (number, record) pairs, as records.read_records()
+    does; records numbered `start` or lower are skipped. With `generate`, questions are
+    generated from the templates for every imported job. `progress` is
+    called with the number of the last record of every committed chunk.
+    """
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    imported = False
+    try:
+        for report in _import_records(records, start, chunk_size, employer, generate, progress):
+            imported = imported or report["status"] == "ok"
+            yield report
+    finally:
+        # Also when the caller stops early: committed chunks stay imported
+        if imported:
+            invalidate_listings()
+
+
+def _import_records(records, start, chunk_size, employer, generate, progress):
+    chunk = []
+    for number, record in records:
+        if number <= start:
+            continue
+        chunk.append((number, record))
+        if len(chunk) >= chunk_size:
+            yield from _import_chunk(chunk, employer, generate, progress)
+            chunk = []
+    if chunk:
+        yield from _import_chunk(chunk, employer, generate, progress)
+
+
+def _import_chunk(chunk, employer, generate, progress):
+    now = timezone.now()
+    reports = {}
+    accepted = []
+    for number, record in chunk:
+        try:
+            accepted.append((number, *_clean(record, employer, now)))
+        except RecordError as exc:
+            reports[number] = {"record": number, "status": "error", "error": str(exc)}
+
+    questions = Counter()
+    with transaction.atomic():
+        jobs = Job.objects.bulk_create([job for _, job, _ in accepted])
+        job_ids = [job.id for job in jobs]
+        # Bulk inserts skip the post_save tagging and the m2m signals
+        job_tags = {job.id: names for job, (_, _, names) in zip(jobs, accepted) if names}
+        if job_tags:
+            add_job_tags(job_tags, created=True)
+        if settings.AUTO_TAG_JOBS:
+            autotag_jobs(job_ids, created=True)
+        if generate:
+            questions.update(question.job_id for question in auto_generate_questions(job_ids))
+    if progress is not None:
+        progress(chunk[-1][0])
+
+    for job, (number, _, _) in zip(jobs, accepted):
+        reports[number] = {
+            "record": number, "status": "ok", "job_id": job.id, "questions": questions[job.id],
+        }
+    for number, _ in chunk:
+        yield reports[number]
+
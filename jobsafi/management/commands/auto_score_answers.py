@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobsafi.autoscore import AutoScoringUnavailable, auto_score_job
+from jobsafi.models import Job
+
+
+class Command(BaseCommand):
+    help = "Auto-score unscored answers from the questions' expected keywords and reference answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=int, help="Jobs to score (default: all)")
+        parser.add_argument("--rescore", action="store_true", help="Also refresh earlier auto scores")
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.order_by("id")
+        if options["job_ids"]:
+            jobs = jobs.filter(pk__in=options["job_ids"])
+
+        total = 0
+        for job in jobs.filter(questions__isnull=False).distinct().only("id", "title"):
+            try:
+                result = auto_score_job(job, rescore=options["rescore"])
+            except AutoScoringUnavailable as exc:
+                raise CommandError(str(exc))
+            if result["scored"]:
+                self.stdout.write(f"Job {job.pk} ({job.title}): scored {result['scored']} answers")
+            total += result["scored"]
+        self.stdout.write(self.style.SUCCESS(f"Scored {total} answers"))
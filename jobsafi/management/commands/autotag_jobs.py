@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from jobsafi.autotag import autotag_jobs
+from jobsafi.models import Job
+from jobsafi.utils import auto_generate_questions
+
+
+class Command(BaseCommand):
+    help = "Tag existing jobs with template tags and aliases found in their title and description"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=int, help="Jobs to tag (default: all)")
+        parser.add_argument("--employer", type=int, help="Only tag jobs of this employer")
+        parser.add_argument("--untagged", action="store_true", help="Only tag jobs without any tag")
+        parser.add_argument("--generate", action="store_true",
+                            help="Generate screening questions for the jobs that got new tags")
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.order_by("id")
+        if options["job_ids"]:
+            jobs = jobs.filter(pk__in=options["job_ids"])
+        if options["employer"]:
+            jobs = jobs.filter(employer_id=options["employer"])
+        if options["untagged"]:
+            jobs = jobs.filter(tags__isnull=True)
+
+        added = autotag_jobs(jobs.values_list("id", flat=True))
+        tag_count = sum(len(tags) for tags in added.values())
+        self.stdout.write(self.style.SUCCESS(f"Added {tag_count} tags to {len(added)} jobs"))
+
+        if options["generate"] and added:
+            questions = auto_generate_questions(list(added))
+            self.stdout.write(self.style.SUCCESS(f"Generated {len(questions)} questions"))
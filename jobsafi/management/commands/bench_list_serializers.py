@@ -0,0 +1,102 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from taggit.models import Tag, TaggedItem
+
+from api.fastpath import ValuesSerializer
+from api.serializers import CandidateSerializer, JobSerializer, ScreeningQuestionOwnerSerializer
+from jobsafi.models import Candidate, Employer, Job, JobAnalytics, ScreeningQuestion
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows per second of the list serializers and their .values() "
+        "fast path, checking both render the same JSON. Runs inside a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[50, 500])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options["rows"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, repeat):
+        count = max(sizes)
+        employer = Employer.objects.create_user("bench-list-serializers", password=None)
+        jobs = Job.objects.bulk_create([
+            Job(employer=employer, title=f"Bench {i}", description="Bench job", seniority="Mid")
+            for i in range(count)
+        ])
+        JobAnalytics.objects.bulk_create([
+            JobAnalytics(job=job, scored_count=i % 3, score_sum=7 * (i % 3))
+            for i, job in enumerate(jobs)
+        ])
+        tags = Tag.objects.bulk_create([Tag(name=f"bench-{i}", slug=f"bench-{i}") for i in range(5)])
+        job_type = ContentType.objects.get_for_model(Job)
+        TaggedItem.objects.bulk_create([
+            TaggedItem(content_type=job_type, object_id=job.id, tag=tag)
+            for i, job in enumerate(jobs) for tag in tags[:i % 4]
+        ])
+        ScreeningQuestion.objects.bulk_create([
+            ScreeningQuestion(job=jobs[0], text=f"Question {i}", fingerprint=f"bench-{i}", rating=i % 5 or None)
+            for i in range(count)
+        ])
+        Candidate.objects.bulk_create([
+            Candidate(job=jobs[0], name=f"Bench {i}", email=f"bench-{i}@example.com",
+                      resume=f"resumes/bench-{i}.pdf" if i % 2 else None)
+            for i in range(count)
+        ])
+
+        request = Request(APIRequestFactory().get("/api/jobs/"))
+        # Contexts as the endpoints pass them (job candidates get no request)
+        cases = [
+            ("jobs", JobSerializer, Job.objects.filter(employer=employer), {"request": request}),
+            ("questions", ScreeningQuestionOwnerSerializer, ScreeningQuestion.objects.filter(job=jobs[0]),
+             {"request": request}),
+            ("candidates", CandidateSerializer, Candidate.objects.filter(job=jobs[0]), {}),
+        ]
+
+        renderer = JSONRenderer()
+        self.stdout.write(f"{'endpoint':>10} {'rows':>6} {'serializer/s':>13} {'values/s':>10} {'speedup':>8}")
+        for name, serializer_class, queryset, context in cases:
+            queryset = queryset.order_by("id")
+            for size in sizes:
+                def serialize():
+                    page = list(serializer_class.setup_eager_loading(queryset, request)[:size])
+                    return renderer.render(serializer_class(page, many=True, context=context).data)
+
+                def fast():
+                    values = ValuesSerializer(serializer_class, context)
+                    return renderer.render(values.rows(values.values(queryset)[:size], queryset.model))
+
+                if serialize() != fast():
+                    raise CommandError(f"{name}: the fast path renders different JSON")
+                slow_rate, fast_rate = size / self.best(serialize, repeat), size / self.best(fast, repeat)
+                self.stdout.write(
+                    f"{name:>10} {size:>6} {slow_rate:>13.0f} {fast_rate:>10.0f} {fast_rate / slow_rate:>7.1f}x"
+                )
+
+    @staticmethod
+    def best(function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.views import CandidateResponseViewSet
+from jobsafi.models import Employer, Job, ScreeningQuestion
+from jobsafi.submissions import get_or_create_candidate, submit_response
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the queries one candidate submission costs for growing numbers "
+        "of answers. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--answers", type=int, nargs="+", default=[1, 10, 40, 100])
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options["answers"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes):
+        employer = Employer.objects.create_user("bench-submissions", password=None)
+        create = CandidateResponseViewSet.as_view({"post": "create"})
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{'answers':>8} {'service':>8} {'api':>8}")
+        for size in sizes:
+            job = Job.objects.create(employer=employer, title="Bench", description="", seniority="")
+            questions = ScreeningQuestion.objects.bulk_create([
+                ScreeningQuestion(job=job, text=f"Question {i}", fingerprint=str(i))
+                for i in range(size)
+            ])
+            answers = [(question.id, "Answer") for question in questions]
+
+            candidate = get_or_create_candidate(job, f"service-{size}@example.com", "Bench")
+            with CaptureQueriesContext(connection) as service:
+                submit_response(job, candidate, answers)
+
+            request = factory.post(f"/api/jobs/{job.id}/responses/", {
+                "candidate": {"name": "Bench", "email": f"api-{size}@example.com"},
+                "answers": [
+                    {"question": question_id, "answer_text": text}
+                    for question_id, text in answers
+                ],
+            }, format="json")
+            with CaptureQueriesContext(connection) as api:
+                create(request, job_id=job.id)
+
+            self.stdout.write(f"{size:>8} {len(service):>8} {len(api):>8}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobsafi.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines, response_rows
+from jobsafi.models import Job
+
+
+class Command(BaseCommand):
+    help = "Export every response of a job, with answers and scores, as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_id", type=int)
+        parser.add_argument("--output", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--file", help="Write to this path instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            job = Job.objects.get(pk=options["job_id"])
+        except Job.DoesNotExist:
+            raise CommandError(f"Job with id {options['job_id']} not found")
+
+        lines = export_lines(response_rows(job, options["chunk_size"]), options["output"])
+        if options["file"]:
+            with open(options["file"], "w", newline="", encoding="utf-8") as out:
+                out.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
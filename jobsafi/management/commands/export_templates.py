@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from jobsafi.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines
+from jobsafi.template_library import template_rows
+
+
+class Command(BaseCommand):
+    help = "Export the template question library as CSV or NDJSON (re-importable with import_templates)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--tag", help="Only export templates of this tag")
+        parser.add_argument("--file", help="Write to this path instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = export_lines(template_rows(options["tag"], options["chunk_size"]), options["output"])
+        if options["file"]:
+            with open(options["file"], "w", newline="", encoding="utf-8") as out:
+                out.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobsafi.models import Job
+from jobsafi.neardup import LSHIndex, default_threshold
+from jobsafi.template_index import get_template_index, normalize_tag
+
+
+class Command(BaseCommand):
+    help = "Report clusters of near-duplicate templates (or of one job's questions)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, help="Similarity from 0 to 1 (default: NEAR_DUPLICATE_THRESHOLD)")
+        parser.add_argument("--tag", help="Only report clusters containing a template with this tag")
+        parser.add_argument("--job", type=int, help="Report the questions of this job instead of templates")
+
+    def handle(self, *args, **options):
+        threshold = options["threshold"] or default_threshold()
+        if not 0 < threshold <= 1:
+            raise CommandError("--threshold must be between 0 and 1")
+
+        if options["job"]:
+            job = Job.objects.filter(pk=options["job"]).first()
+            if job is None:
+                raise CommandError(f"Job {options['job']} does not exist")
+            texts = {}
+            index = LSHIndex()
+            for pk, text, minhash in job.questions.values_list("id", "text", "minhash"):
+                texts[pk] = text
+                index.add(pk, minhash)
+            clusters = [[(pk, texts[pk]) for pk in cluster] for cluster in index.clusters(threshold)]
+        else:
+            clusters = [
+                [(entry.id, f"[{entry.tag}] {entry.template_text}") for entry in cluster]
+                for cluster in get_template_index().duplicate_clusters(threshold)
+                if not options["tag"]
+                or any(normalize_tag(entry.tag) == normalize_tag(options["tag"]) for entry in cluster)
+            ]
+
+        for number, cluster in enumerate(clusters, 1):
+            self.stdout.write(f"Cluster {number}:")
+            for pk, text in cluster:
+                self.stdout.write(f"  {pk}: {text}")
+        self.stdout.write(self.style.SUCCESS(f"Found {len(clusters)} clusters at threshold {threshold}"))
@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobsafi.job_import import import_jobs
+from jobsafi.records import IMPORT_FORMATS, read_records
+from jobsafi.models import Employer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import jobs for an employer from a CSV or newline-delimited JSON file ('-' for stdin). "
+        "With --progress, the number of the last committed record is kept in a file "
+        "and a rerun resumes after it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--employer", type=int, required=True, help="Employer id owning the jobs")
+        parser.add_argument("--input", choices=IMPORT_FORMATS,
+                            help="Input format (default: from the file extension, else ndjson)")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Records per transaction (default: INGEST_CHUNK_SIZE)")
+        parser.add_argument("--generate", action="store_true",
+                            help="Generate screening questions for the imported jobs")
+        parser.add_argument("--start", type=int, default=None,
+                            help="Skip records up to this number")
+        parser.add_argument("--progress", help="File recording the last committed record")
+
+    def handle(self, *args, **options):
+        employer = Employer.objects.filter(pk=options["employer"]).first()
+        if employer is None:
+            raise CommandError(f"Employer with id {options['employer']} not found")
+        input_format = options["input"] or ("csv" if options["path"].endswith(".csv") else "ndjson")
+
+        start = options["start"]
+        progress = options["progress"]
+        if start is None:
+            start = 0
+            if progress and os.path.exists(progress):
+                with open(progress) as handle:
+                    start = int(handle.read().strip() or 0)
+                self.stderr.write(f"Resuming after record {start}")
+
+        if options["path"] == "-":
+            self.run(sys.stdin.buffer, input_format, employer, start, options)
+        else:
+            with open(options["path"], "rb") as lines:
+                self.run(lines, input_format, employer, start, options)
+
+    def run(self, lines, input_format, employer, start, options):
+        path = options["progress"]
+        ok = failed = 0
+        try:
+            for report in import_jobs(
+                read_records(lines, input_format), employer,
+                chunk_size=options["chunk_size"], start=start, generate=options["generate"],
+                progress=(lambda record: self.save_progress(path, record)) if path else None,
+            ):
+                self.stdout.write(json.dumps(report))
+                if report["status"] == "ok":
+                    ok += 1
+                else:
+                    failed += 1
+        finally:
+            self.stderr.write(f"Imported {ok} jobs, {failed} errors")
+
+    @staticmethod
+    def save_progress(path, record):
+        with open(path, "w") as handle:
+            handle.write(str(record))
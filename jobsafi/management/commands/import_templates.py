@@ -0,0 +1,37 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from jobsafi.records import IMPORT_FORMATS, read_records
+from jobsafi.template_library import import_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert template questions from a CSV or newline-delimited JSON file ('-' for stdin), "
+        "matching existing templates by tag and normalized text"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--input", choices=IMPORT_FORMATS,
+                            help="Input format (default: from the file extension, else ndjson)")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Records per transaction (default: INGEST_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        input_format = options["input"] or ("csv" if options["path"].endswith(".csv") else "ndjson")
+        if options["path"] == "-":
+            report = import_templates(read_records(sys.stdin.buffer, input_format), options["chunk_size"])
+        else:
+            with open(options["path"], "rb") as lines:
+                report = import_templates(read_records(lines, input_format), options["chunk_size"])
+
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {report['inserted']}, updated {report['updated']}, "
+            f"unchanged {report['unchanged']}, duplicates {report['duplicates']}, "
+            f"errors {len(report['errors'])}"
+        ))
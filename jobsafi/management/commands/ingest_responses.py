@@ -0,0 +1,32 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from jobsafi.ingest import ingest_responses
+
+
+class Command(BaseCommand):
+    help = "Import candidate submissions from a newline-delimited JSON file ('-' for stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Lines per transaction (default: INGEST_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        if options["path"] == "-":
+            self.ingest(sys.stdin.buffer, options["chunk_size"])
+        else:
+            with open(options["path"], "rb") as lines:
+                self.ingest(lines, options["chunk_size"])
+
+    def ingest(self, lines, chunk_size):
+        ok = failed = 0
+        for report in ingest_responses(lines, chunk_size=chunk_size):
+            self.stdout.write(json.dumps(report))
+            if report["status"] == "ok":
+                ok += 1
+            else:
+                failed += 1
+        self.stderr.write(f"Imported {ok} responses, {failed} errors")
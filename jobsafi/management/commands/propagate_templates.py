@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from jobsafi.models import TemplateQuestion
+from jobsafi.utils import JOB_BATCH_SIZE, propagate_template
+
+
+class Command(BaseCommand):
+    help = "Add template questions to existing jobs tagged with the template's tag"
+
+    def add_arguments(self, parser):
+        parser.add_argument("template_ids", nargs="*", type=int,
+                            help="Templates to propagate (default: all)")
+        parser.add_argument("--tag", help="Only propagate templates for this tag")
+        parser.add_argument("--batch-size", type=int, default=JOB_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        templates = TemplateQuestion.objects.order_by("id")
+        if options["template_ids"]:
+            templates = templates.filter(pk__in=options["template_ids"])
+        if options["tag"]:
+            templates = templates.filter(tag__iexact=options["tag"].strip())
+
+        total = 0
+        for template in templates:
+            added = propagate_template(template, batch_size=options["batch_size"])
+            total += added
+            self.stdout.write(f"Template {template.pk} ({template.tag}): added to {added} jobs")
+        self.stdout.write(self.style.SUCCESS(f"Added {total} questions"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from jobsafi.analytics import rebuild_analytics
+from jobsafi.models import Job
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized job and question analytics from the answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=int, help="Only rebuild these jobs")
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.all()
+        if options["job_ids"]:
+            jobs = jobs.filter(id__in=options["job_ids"])
+        rebuilt = rebuild_analytics(jobs)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt analytics of {rebuilt} jobs"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobsafi.search import FULLTEXT_INDEXES, ensure_triggers, fulltext_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search tables of jobs, questions and templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type", action="append", choices=sorted(FULLTEXT_INDEXES), dest="types",
+            help="Only rebuild this index (can be repeated)",
+        )
+        parser.add_argument("--optimize", action="store_true", help="Merge index segments after rebuilding")
+
+    def handle(self, *args, **options):
+        if not fulltext_available():
+            raise CommandError("Full-text search requires an SQLite database")
+        kinds = options["types"] or list(FULLTEXT_INDEXES)
+        for kind in ensure_triggers():
+            self.stdout.write(f"Restored missing sync triggers for {kind}")
+        rebuild_index(kinds, optimize=options["optimize"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index for {', '.join(kinds)}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from jobsafi.models import CandidateResponse
+from jobsafi.scoring import recompute_response_scores
+
+
+class Command(BaseCommand):
+    help = "Rebuild score_sum, scored_count and overall_score of responses from their answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, help="Only repair responses of this job")
+
+    def handle(self, *args, **options):
+        responses = CandidateResponse.objects.all()
+        if options["job"]:
+            responses = responses.filter(job_id=options["job"])
+        updated = recompute_response_scores(responses)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed scores of {updated} responses"))
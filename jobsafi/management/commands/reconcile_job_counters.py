@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from jobsafi.counters import reconcile_job_counters
+from jobsafi.models import Job
+
+
+class Command(BaseCommand):
+    help = "Recount the candidate_count and response_count columns of jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=int, help="Only reconcile these jobs")
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.all()
+        if options["job_ids"]:
+            jobs = jobs.filter(id__in=options["job_ids"])
+        updated = reconcile_job_counters(jobs)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters of {updated} jobs"))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobsafi.exports import claim_next_task, cleanup_expired_exports, run_export_task
+
+
+class Command(BaseCommand):
+    help = "Process queued export tasks and delete exports past their retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Process the pending tasks, then exit")
+        parser.add_argument("--poll-interval", type=float, default=5.0,
+                            help="Seconds to wait when the queue is empty")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = cleanup_expired_exports()
+            if expired:
+                self.stdout.write(f"Removed {expired} expired exports")
+
+            task = claim_next_task()
+            while task is not None:
+                ok = run_export_task(task)
+                self.stdout.write(f"Export {task.pk} ({task.kind}, job {task.job_id}): "
+                                  f"{'done' if ok else 'failed'}")
+                task = claim_next_task()
+
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
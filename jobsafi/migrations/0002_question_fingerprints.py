@@ -0,0 +1,72 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+from jobsafi.text import text_fingerprint
+
+
+def backfill_fingerprints(apps, schema_editor):
+    ScreeningQuestion = apps.get_model('jobsafi', 'ScreeningQuestion')
+    CandidateAnswer = apps.get_model('jobsafi', 'CandidateAnswer')
+    TemplateQuestion = apps.get_model('jobsafi', 'TemplateQuestion')
+
+    # Questions duplicated on the same job are merged into the first copy:
+    # their answers move to it and it keeps the approval, custom flag and
+    # rating any of them had.
+    kept = {}
+    questions = []
+    merged = {}
+    for question in ScreeningQuestion.objects.order_by('id').iterator():
+        fingerprint = text_fingerprint(question.text)
+        first = kept.get((question.job_id, fingerprint))
+        if first is None:
+            kept[question.job_id, fingerprint] = question
+            question.fingerprint = fingerprint
+            questions.append(question)
+            continue
+        merged[question.id] = first
+        first.is_approved = first.is_approved or question.is_approved
+        first.is_custom = first.is_custom or question.is_custom
+        if first.rating is None:
+            first.rating = question.rating
+    ScreeningQuestion.objects.bulk_update(
+        questions, ['fingerprint', 'is_approved', 'is_custom', 'rating'], batch_size=500
+    )
+    for duplicate_id, first in merged.items():
+        CandidateAnswer.objects.filter(question_id=duplicate_id).update(question_id=first.id)
+    duplicate_ids = list(merged)
+    for start in range(0, len(duplicate_ids), 500):
+        ScreeningQuestion.objects.filter(id__in=duplicate_ids[start:start + 500]).delete()
+
+    templates = []
+    for template in TemplateQuestion.objects.only('id', 'template_text').iterator():
+        template.fingerprint = text_fingerprint(template.template_text)
+        templates.append(template)
+    TemplateQuestion.objects.bulk_update(templates, ['fingerprint'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningquestion',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='templatequestion',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='screeningquestion',
+            constraint=models.UniqueConstraint(condition=models.Q(('fingerprint', ''), _negated=True), fields=('job', 'fingerprint'), name='unique_question_fingerprint_per_job'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:38
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_score_totals(apps, schema_editor):
+    CandidateAnswer = apps.get_model('jobsafi', 'CandidateAnswer')
+    CandidateResponse = apps.get_model('jobsafi', 'CandidateResponse')
+
+    scored = (
+        CandidateAnswer.objects.filter(response=OuterRef('pk'), score__isnull=False)
+        .order_by()
+        .values('response')
+    )
+    CandidateResponse.objects.update(
+        score_sum=Coalesce(Subquery(scored.annotate(total=Sum('score')).values('total')), 0),
+        scored_count=Coalesce(Subquery(scored.annotate(n=Count('id')).values('n')), 0),
+        overall_score=Subquery(scored.annotate(average=Avg('score')).values('average')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0002_question_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidateresponse',
+            name='score_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='candidateresponse',
+            name='scored_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_score_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0003_response_score_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidateresponse',
+            index=models.Index(fields=['job', 'submitted_at', 'id'], name='response_job_submitted_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:05
+
+from django.db import migrations
+
+# External-content FTS5 tables over the searchable text columns. Triggers keep
+# them in sync with every write, including bulk_create/update and raw SQL.
+# (fts table, content table, indexed columns, bm25 column weights)
+FULLTEXT_TABLES = [
+    ('jobsafi_job_fts', 'jobsafi_job', ['title', 'description'], '10.0, 1.0'),
+    ('jobsafi_screeningquestion_fts', 'jobsafi_screeningquestion', ['text'], '1.0'),
+    ('jobsafi_templatequestion_fts', 'jobsafi_templatequestion', ['tag', 'template_text'], '5.0, 1.0'),
+]
+
+
+def create_sql(fts, content, columns, weights):
+    cols = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{content}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"INSERT INTO {fts}({fts}, rank) VALUES('rank', 'bm25({weights})')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {content} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {content} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {content} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES('rebuild')",
+    ]
+
+
+def drop_sql(fts):
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def create_fulltext_tables(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends keep the LIKE search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in FULLTEXT_TABLES:
+        for sql in create_sql(*table):
+            schema_editor.execute(sql)
+
+
+def drop_fulltext_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts, *_ in FULLTEXT_TABLES:
+        for sql in drop_sql(fts):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0005_export_tasks'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_tables, drop_fulltext_tables),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0006_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=200, unique=True)),
+                ('tag', models.CharField(max_length=200)),
+            ],
+            options={
+                'verbose_name_plural': 'Tag aliases',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+from jobsafi.neardup import minhash_signature
+
+BATCH_SIZE = 500
+
+
+def _backfill(model, text_field):
+    batch = []
+    for row in model.objects.order_by('id').only('id', text_field).iterator(chunk_size=2000):
+        row.minhash = minhash_signature(getattr(row, text_field))
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            model.objects.bulk_update(batch, ['minhash'])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, ['minhash'])
+
+
+def backfill_signatures(apps, schema_editor):
+    _backfill(apps.get_model('jobsafi', 'ScreeningQuestion'), 'text')
+    _backfill(apps.get_model('jobsafi', 'TemplateQuestion'), 'template_text')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0007_tag_aliases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningquestion',
+            name='minhash',
+            field=models.BinaryField(default=b'', editable=False),
+        ),
+        migrations.AddField(
+            model_name='templatequestion',
+            name='minhash',
+            field=models.BinaryField(default=b'', editable=False),
+        ),
+        migrations.RunPython(backfill_signatures, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0008_minhash_signatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidateanswer',
+            name='auto_scored',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='screeningquestion',
+            name='expected_keywords',
+            field=models.TextField(blank=True, help_text='Comma-separated'),
+        ),
+        migrations.AddField(
+            model_name='screeningquestion',
+            name='reference_answer',
+            field=models.TextField(blank=True),
+        ),
+    ]
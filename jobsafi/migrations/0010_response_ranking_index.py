@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0009_auto_scoring'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidateanswer',
+            index=models.Index(fields=['response', 'question'], name='answer_response_question_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidateresponse',
+            index=models.Index(fields=['job', '-overall_score', 'submitted_at', 'id'], name='response_job_ranking_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+from jobsafi.analytics import COUNTERS, analytics_rows
+
+
+def backfill_analytics(apps, schema_editor):
+    JobAnalytics = apps.get_model('jobsafi', 'JobAnalytics')
+    QuestionAnalytics = apps.get_model('jobsafi', 'QuestionAnalytics')
+    ScoreBucket = apps.get_model('jobsafi', 'ScoreBucket')
+    jobs, questions, buckets = analytics_rows(apps.get_model('jobsafi', 'CandidateAnswer').objects.all())
+    JobAnalytics.objects.bulk_create(
+        [JobAnalytics(job_id=pk, **dict(zip(COUNTERS, counters))) for pk, counters in jobs.items()],
+        batch_size=500,
+    )
+    QuestionAnalytics.objects.bulk_create(
+        [QuestionAnalytics(question_id=pk, **dict(zip(COUNTERS, counters))) for pk, counters in questions.items()],
+        batch_size=500,
+    )
+    ScoreBucket.objects.bulk_create(
+        [ScoreBucket(question_id=pk, score=score, count=count) for pk, score, count in buckets],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0010_response_ranking_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobAnalytics',
+            fields=[
+                ('answer_count', models.IntegerField(default=0)),
+                ('answered_count', models.IntegerField(default=0)),
+                ('scored_count', models.IntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('score_square_sum', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analytics', serialize=False, to='jobsafi.job')),
+                ('response_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'job analytics',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionAnalytics',
+            fields=[
+                ('answer_count', models.IntegerField(default=0)),
+                ('answered_count', models.IntegerField(default=0)),
+                ('scored_count', models.IntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('score_square_sum', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analytics', serialize=False, to='jobsafi.screeningquestion')),
+            ],
+            options={
+                'verbose_name_plural': 'question analytics',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='jobsafi.screeningquestion')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='scorebucket',
+            constraint=models.UniqueConstraint(fields=('question', 'score'), name='unique_question_score_bucket'),
+        ),
+        migrations.RunPython(backfill_analytics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(job=OuterRef('pk')).order_by().values('job')
+            .annotate(n=Count('id')).values('n')
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    apps.get_model('jobsafi', 'Job').objects.update(
+        candidate_count=_count(apps.get_model('jobsafi', 'Candidate')),
+        response_count=_count(apps.get_model('jobsafi', 'CandidateResponse')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0011_job_question_analytics'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='jobanalytics',
+            name='response_count',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='candidate_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='response_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
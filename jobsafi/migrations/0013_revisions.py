@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:07
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def responses_updated_at_submission(apps, schema_editor):
+    apps.get_model('jobsafi', 'CandidateResponse').objects.update(updated_at=F('submitted_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0012_job_listing_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidateresponse',
+            name='revision',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='candidateresponse',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='revision',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='screeningquestion',
+            name='revision',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='screeningquestion',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(responses_updated_at_submission, migrations.RunPython.noop),
+    ]
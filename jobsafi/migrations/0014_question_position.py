@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0013_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screeningquestion',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='screeningquestion',
+            index=models.Index(fields=['job', 'position', 'id'], name='question_job_position_idx'),
+        ),
+    ]
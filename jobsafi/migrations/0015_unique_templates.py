@@ -0,0 +1,65 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:18
+
+import csv
+import os
+import time
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def write_dropped(dropped):
+    """
+    Save the dropped copies as CSV under EXPORT_ROOT, in the columns of the
+    template export plus the id of the copy that was kept.
+    """
+    os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+    path = os.path.join(settings.EXPORT_ROOT, f'dropped-duplicate-templates-{time.strftime("%Y%m%d-%H%M%S")}.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        writer.writerow(['id', 'tag', 'template_text', 'kept_id'])
+        for template, kept_id in dropped:
+            writer.writerow([template.id, template.tag, template.template_text, kept_id])
+    print(f'\n  Dropped {len(dropped)} duplicate templates, written to {path}')
+    for template, kept_id in dropped:
+        print(f'    {template.id} (copy of {kept_id}): [{template.tag}] {template.template_text[:60]}')
+
+
+def normalize_templates(apps, schema_editor):
+    """
+    Store tags normalized and keep the first copy of each (tag, text) pair.
+    The other copies are written out before they are deleted.
+    """
+    TemplateQuestion = apps.get_model('jobsafi', 'TemplateQuestion')
+    kept = {}
+    dropped = []
+    renamed = []
+    for template in TemplateQuestion.objects.order_by('id').iterator():
+        tag = template.tag.strip().lower()
+        key = (tag, template.fingerprint)
+        if key in kept:
+            dropped.append((template, kept[key]))
+            continue
+        kept[key] = template.id
+        if tag != template.tag:
+            template.tag = tag
+            renamed.append(template)
+    if dropped:
+        write_dropped(dropped)
+        TemplateQuestion.objects.filter(id__in=[template.id for template, _ in dropped]).delete()
+    TemplateQuestion.objects.bulk_update(renamed, ['tag'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0014_question_position'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_templates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='templatequestion',
+            constraint=models.UniqueConstraint(fields=('tag', 'fingerprint'), name='unique_template_per_tag'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0015_unique_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exporttask',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,101 @@
+from django.db import migrations
+from django.db.models import Count, F, Q, Sum
+
+from jobsafi.text import text_fingerprint
+
+BATCH_SIZE = 500
+
+
+def _recount(QuestionAnalytics, ScoreBucket, CandidateAnswer, question_ids):
+    """Rebuild the analytics rows of questions that received moved answers."""
+    ScoreBucket.objects.filter(question_id__in=question_ids).delete()
+    answers = CandidateAnswer.objects.filter(question_id__in=question_ids).order_by()
+    totals = answers.values('question_id').annotate(
+        answer_count=Count('id'),
+        answered_count=Count('id', filter=~Q(answer_text='')),
+        scored_count=Count('score'),
+        score_sum=Sum('score'),
+        score_square_sum=Sum(F('score') * F('score')),
+    )
+    for row in totals:
+        QuestionAnalytics.objects.update_or_create(
+            question_id=row['question_id'],
+            defaults={
+                'answer_count': row['answer_count'],
+                'answered_count': row['answered_count'],
+                'scored_count': row['scored_count'],
+                'score_sum': row['score_sum'] or 0,
+                'score_square_sum': row['score_square_sum'] or 0,
+            },
+        )
+    ScoreBucket.objects.bulk_create([
+        ScoreBucket(question_id=row['question_id'], score=row['score'], count=row['count'])
+        for row in answers.filter(score__isnull=False)
+        .values('question_id', 'score').annotate(count=Count('id'))
+    ])
+
+
+def merge_duplicate_questions(apps, schema_editor):
+    """
+    Merge the duplicate questions an earlier 0002 left with an empty
+    fingerprint into the copy holding the fingerprint (see 0002).
+
+    Their answers move to the kept question, whose analytics are recounted,
+    and the kept question takes over any approval, custom flag and rating.
+    Questions without a copy just get their fingerprint.
+    """
+    ScreeningQuestion = apps.get_model('jobsafi', 'ScreeningQuestion')
+    CandidateAnswer = apps.get_model('jobsafi', 'CandidateAnswer')
+    QuestionAnalytics = apps.get_model('jobsafi', 'QuestionAnalytics')
+    ScoreBucket = apps.get_model('jobsafi', 'ScoreBucket')
+
+    blank = list(ScreeningQuestion.objects.filter(fingerprint='').order_by('id'))
+    if not blank:
+        return
+    kept = {}
+    for start in range(0, len(blank), BATCH_SIZE):
+        batch = blank[start:start + BATCH_SIZE]
+        for question in ScreeningQuestion.objects.filter(
+            job_id__in={question.job_id for question in batch}
+        ).exclude(fingerprint=''):
+            kept[question.job_id, question.fingerprint] = question
+
+    fingerprinted, merged = [], {}
+    for question in blank:
+        fingerprint = text_fingerprint(question.text)
+        first = kept.get((question.job_id, fingerprint))
+        if first is None:
+            question.fingerprint = fingerprint
+            kept[question.job_id, fingerprint] = question
+            fingerprinted.append(question)
+            continue
+        merged[question.id] = first
+        first.is_approved = first.is_approved or question.is_approved
+        first.is_custom = first.is_custom or question.is_custom
+        if first.rating is None:
+            first.rating = question.rating
+
+    targets = {first.id: first for first in merged.values()}
+    ScreeningQuestion.objects.bulk_update(fingerprinted, ['fingerprint'], batch_size=BATCH_SIZE)
+    ScreeningQuestion.objects.bulk_update(
+        list(targets.values()), ['is_approved', 'is_custom', 'rating'], batch_size=BATCH_SIZE
+    )
+    for duplicate_id, first in merged.items():
+        CandidateAnswer.objects.filter(question_id=duplicate_id).update(question_id=first.id)
+    duplicate_ids = list(merged)
+    for start in range(0, len(duplicate_ids), BATCH_SIZE):
+        ScreeningQuestion.objects.filter(id__in=duplicate_ids[start:start + BATCH_SIZE]).delete()
+    target_ids = list(targets)
+    for start in range(0, len(target_ids), BATCH_SIZE):
+        _recount(QuestionAnalytics, ScoreBucket, CandidateAnswer, target_ids[start:start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobsafi', '0017_cache_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_questions, migrations.RunPython.noop),
+    ]
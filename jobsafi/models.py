@@ -1,8 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 from taggit.managers import TaggableManager
 
+from .neardup import minhash_signature
+from .text import text_fingerprint
+
 
 # Employer model (system users who create jobs and screen candidates)
 class Employer(AbstractUser):
@@ -17,8 +21,32 @@ class Employer(AbstractUser):
         verbose_name_plural = "Employers"
 
 
+# Rows the API serves with ETag/Last-Modified validators
+class Revisioned(models.Model):
+    # Bumped on every save, and by jobsafi.revisions.touch() when child rows change
+    revision = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.updated_at = timezone.now()
+        bump = not self._state.adding
+        if bump:
+            # Incremented in the UPDATE so concurrent saves get distinct revisions
+            self.revision = models.F("revision") + 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "revision", "updated_at"}
+        super().save(*args, **kwargs)
+        if bump:
+            # Reloaded from the row on next access
+            del self.revision
+
+
 # Job model (submitted by Employer, generates screening questions)
-class Job(models.Model):
+class Job(Revisioned):
     employer = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="jobs"
     )
@@ -26,13 +54,24 @@ class Job(models.Model):
     description = models.TextField()
     seniority = models.CharField(max_length=50)
     tags = TaggableManager()
+    # Listing counters, maintained by jobsafi.counters
+    candidate_count = models.IntegerField(default=0, editable=False)
+    response_count = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored text, so auto-tagging only reacts to edits of it
+        if "title" in field_names and "description" in field_names:
+            instance._loaded_text = (instance.title, instance.description)
+        return instance
+
 
 # Screening questions for a specific Job
-class ScreeningQuestion(models.Model):
+class ScreeningQuestion(Revisioned):
     job = models.ForeignKey(
         Job, on_delete=models.CASCADE, related_name="questions"
     )
@@ -40,21 +79,93 @@ class ScreeningQuestion(models.Model):
     is_custom = models.BooleanField(default=False)
     is_approved = models.BooleanField(default=False)
     rating = models.IntegerField(null=True, blank=True)
+    # Display order within the job, set by jobsafi.review.reorder_questions
+    position = models.PositiveIntegerField(default=0)
+    # What a good answer covers, used by auto-scoring (jobsafi.autoscore)
+    expected_keywords = models.TextField(blank=True, help_text="Comma-separated")
+    reference_answer = models.TextField(blank=True)
+    fingerprint = models.CharField(max_length=64, editable=False)
+    minhash = models.BinaryField(default=b"", editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["job", "fingerprint"],
+                condition=~models.Q(fingerprint=""),
+                name="unique_question_fingerprint_per_job",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["job", "position", "id"], name="question_job_position_idx"),
+        ]
 
     def __str__(self):
         return f"Q: {self.text[:50]}..."
 
+    def save(self, *args, **kwargs):
+        self.fingerprint = text_fingerprint(self.text)
+        self.minhash = minhash_signature(self.text)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember whether the stored row was public, for cache invalidation
+        if "is_approved" in field_names:
+            instance._loaded_is_approved = instance.is_approved
+        return instance
+
 
 # Pre-approved question templates (reusable across jobs)
 class TemplateQuestion(models.Model):
     tag = models.CharField(max_length=200)
     template_text = models.TextField()
+    fingerprint = models.CharField(max_length=64, editable=False)
+    minhash = models.BinaryField(default=b"", editable=False)
+
+    class Meta:
+        constraints = [
+            # The key of the library's bulk upsert (jobsafi.template_library)
+            models.UniqueConstraint(fields=["tag", "fingerprint"], name="unique_template_per_tag"),
+        ]
 
     def __str__(self):
         return f"{self.tag}: {self.template_text[:50]}..."
 
+    def save(self, *args, **kwargs):
+        self.tag = self.tag.strip().lower()
+        self.fingerprint = text_fingerprint(self.template_text)
+        self.minhash = minhash_signature(self.template_text)
+        super().save(*args, **kwargs)
+
+
+# Alternative spellings of a tag used by auto-tagging (e.g. "js" → "javascript")
+class TagAlias(models.Model):
+    alias = models.CharField(max_length=200, unique=True)
+    tag = models.CharField(max_length=200)
+
+    class Meta:
+        verbose_name_plural = "Tag aliases"
+
+    def __str__(self):
+        return f"{self.alias} → {self.tag}"
+
+    def save(self, *args, **kwargs):
+        self.alias = self.alias.strip().lower()
+        self.tag = self.tag.strip().lower()
+        super().save(*args, **kwargs)
+
 
 # Candidate model (individuals being screened for a Job)
+class CacheVersion(models.Model):
+    """A shared version counter (see jobsafi.versions)"""
+    name = models.CharField(max_length=200, unique=True)
+    value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
 class Candidate(models.Model):
     job = models.ForeignKey(
         Job, on_delete=models.CASCADE, related_name="candidates"
@@ -68,7 +179,7 @@ class Candidate(models.Model):
 
 
 # Candidate response session (all answers per candidate for a specific job)
-class CandidateResponse(models.Model):
+class CandidateResponse(Revisioned):
     candidate = models.ForeignKey(
         Candidate, on_delete=models.CASCADE, related_name="responses"
     )
@@ -77,17 +188,26 @@ class CandidateResponse(models.Model):
     )
     submitted_at = models.DateTimeField(auto_now_add=True)
     overall_score = models.FloatField(null=True, blank=True)
+    # Running totals of scored answers, maintained by jobsafi.scoring
+    score_sum = models.IntegerField(default=0, editable=False)
+    scored_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["job", "submitted_at", "id"], name="response_job_submitted_idx"),
+            # Top-K ranking: best score first, earliest submission breaks ties
+            models.Index(fields=["job", "-overall_score", "submitted_at", "id"], name="response_job_ranking_idx"),
+        ]
 
     def __str__(self):
         return f"Response by {self.candidate.name} for {self.job.title}"
 
     def calculate_overall_score(self):
         """Recalculate overall score as average of all answer scores."""
-        answers = self.answers.exclude(score__isnull=True)
-        if not answers.exists():
-            return None
-        total = sum(answer.score for answer in answers)
-        self.overall_score = total / answers.count()
+        if not self.scored_count:
+            self.overall_score = None
+        else:
+            self.overall_score = self.score_sum / self.scored_count
         return self.overall_score
 
 
@@ -101,6 +221,138 @@ class CandidateAnswer(models.Model):
     )
     answer_text = models.TextField()
     score = models.IntegerField(null=True, blank=True)
+    # Set by auto-scoring; cleared when a reviewer sets the score
+    auto_scored = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Per-question score filters of the ranking look answers up by response
+            models.Index(fields=["response", "question"], name="answer_response_question_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.response.candidate.name} → {self.question.text[:30]}..."
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored score so saves can apply the difference
+        if "score" in field_names:
+            instance._loaded_score = instance.score
+        return instance
+
+
+# Materialized answer statistics, maintained by jobsafi.analytics
+class AnswerStatistics(models.Model):
+    answer_count = models.IntegerField(default=0)
+    # Answers with non-empty text
+    answered_count = models.IntegerField(default=0)
+    scored_count = models.IntegerField(default=0)
+    # Running sums, so the mean and variance never need a scan
+    score_sum = models.BigIntegerField(default=0)
+    score_square_sum = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def mean_score(self):
+        if not self.scored_count:
+            return None
+        return self.score_sum / self.scored_count
+
+    @property
+    def score_variance(self):
+        """Population variance of the scores."""
+        if not self.scored_count:
+            return None
+        mean = self.score_sum / self.scored_count
+        return max(self.score_square_sum / self.scored_count - mean * mean, 0.0)
+
+
+class JobAnalytics(AnswerStatistics):
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="analytics"
+    )
+
+    class Meta:
+        verbose_name_plural = "job analytics"
+
+    def __str__(self):
+        return f"Analytics of {self.job}"
+
+
+class QuestionAnalytics(AnswerStatistics):
+    question = models.OneToOneField(
+        ScreeningQuestion, on_delete=models.CASCADE, primary_key=True, related_name="analytics"
+    )
+
+    class Meta:
+        verbose_name_plural = "question analytics"
+
+    def __str__(self):
+        return f"Analytics of {self.question}"
+
+
+# Number of answers of a question with a given score
+class ScoreBucket(models.Model):
+    question = models.ForeignKey(
+        ScreeningQuestion, on_delete=models.CASCADE, related_name="score_buckets"
+    )
+    score = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["question", "score"], name="unique_question_score_bucket"),
+        ]
+
+    def __str__(self):
+        return f"{self.question_id}: {self.count} × {self.score}"
+
+
+# Offline export of a job's data, produced by the run_export_worker command
+class ExportTask(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    EXPIRED = "expired"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+        (EXPIRED, "Expired"),
+    ]
+    KIND_CHOICES = [
+        ("responses", "Responses"),
+        ("candidates", "Candidates"),
+        ("questions", "Question bank"),
+    ]
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("ndjson", "NDJSON"),
+    ]
+
+    job = models.ForeignKey(
+        Job, on_delete=models.CASCADE, related_name="exports"
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default="responses")
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    # Claims so far; a task left running by a dead worker is claimed again
+    attempts = models.PositiveIntegerField(default=0)
+    file_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return f"{self.response.candidate.name} → {self.question.text[:30]}..."
\ No newline at end of file
+        return f"{self.get_kind_display()} export of {self.job} ({self.status})"
@@ -0,0 +1,161 @@
+"""
+Near-duplicate detection for question texts with MinHash and LSH.
+
+A text is reduced to its content words (shingles) and summarised by a
+MinHash signature of NUM_PERM 32-bit values, stored as bytes on each row.
+The fraction of equal positions in two signatures estimates the Jaccard
+similarity of their word sets. LSHIndex splits signatures into BANDS bands
+of ROWS values and only compares texts sharing at least one band, so a
+lookup does not scan the whole collection.
+"""
+import re
+import struct
+from collections import defaultdict
+from functools import lru_cache
+from hashlib import blake2b
+from operator import eq
+
+from django.conf import settings
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+BAND_BYTES = ROWS * 4
+
+# Each shingle gets NUM_PERM independent 32-bit hashes from a salted
+# blake2b digest (16 values per 64-byte digest)
+_SALTS = [bytes([n]) * 16 for n in range(NUM_PERM // 16)]
+_PACK = struct.Struct(f"<{NUM_PERM}I")
+
+_WORD_RE = re.compile(r"[^\W_]+(?:['+#.][^\W_]+)*[+#]*")
+
+# Words that carry no topic: English function words plus the phrasing
+# screening questions are usually wrapped in.
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being between both but by can
+could describe detail details did do does doing during each example explain for from
+give had has have having how i if in into is it its just me more most my of on or our
+please share should so some such tell than that the their them then there these they
+this those through to us was we were what when where which while who whom why will with
+would you your
+""".split())
+
+
+def _singular(word):
+    """Crude plural folding so "processes" matches "process"."""
+    if len(word) <= 4 or not word.endswith("s"):
+        return word
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ss", "us", "is")):
+        return word
+    return word[:-1]
+
+
+def shingles(text):
+    """Set of normalized content words in `text`."""
+    words = set()
+    for word in _WORD_RE.findall(text.casefold()):
+        if word in STOPWORDS:
+            continue
+        words.add(_singular(word))
+    return words
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hashes(shingle):
+    data = shingle.encode("utf-8")
+    return _PACK.unpack(b"".join(blake2b(data, digest_size=64, salt=salt).digest() for salt in _SALTS))
+
+
+def minhash_signature(text):
+    """Packed MinHash signature of `text`, or b"" if it has no content words."""
+    rows = [_shingle_hashes(shingle) for shingle in shingles(text)]
+    if not rows:
+        return b""
+    return _PACK.pack(*(min(column) for column in zip(*rows)))
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two packed signatures."""
+    if not signature or not other:
+        return 0.0
+    return sum(map(eq, _PACK.unpack(signature), _PACK.unpack(other))) / NUM_PERM
+
+
+def default_threshold():
+    return settings.NEAR_DUPLICATE_THRESHOLD
+
+
+def is_near_duplicate(signature, others, threshold=None):
+    """True if `signature` is at least `threshold` similar to any of `others`."""
+    if not signature:
+        return False
+    threshold = default_threshold() if threshold is None else threshold
+    return any(similarity(signature, other) >= threshold for other in others)
+
+
+class LSHIndex:
+    """Banded LSH over packed signatures, keyed by arbitrary ids."""
+
+    def __init__(self, items=()):
+        self.signatures = {}
+        self._buckets = defaultdict(list)
+        for key, signature in items:
+            self.add(key, signature)
+
+    def add(self, key, signature):
+        signature = bytes(signature or b"")
+        if not signature:
+            return
+        self.signatures[key] = signature
+        for band in range(BANDS):
+            start = band * BAND_BYTES
+            self._buckets[band, signature[start:start + BAND_BYTES]].append(key)
+
+    def candidates(self, signature):
+        """Ids sharing at least one band with `signature`."""
+        found = set()
+        if signature:
+            for band in range(BANDS):
+                start = band * BAND_BYTES
+                found.update(self._buckets.get((band, signature[start:start + BAND_BYTES]), ()))
+        return found
+
+    def query(self, signature, threshold=None):
+        """[(id, similarity)] of indexed texts near `signature`, best first."""
+        threshold = default_threshold() if threshold is None else threshold
+        matches = []
+        for key in self.candidates(signature):
+            score = similarity(signature, self.signatures[key])
+            if score >= threshold:
+                matches.append((key, score))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+
+    def clusters(self, threshold=None):
+        """Sorted id lists of texts linked by near-duplicate pairs (single linkage)."""
+        threshold = default_threshold() if threshold is None else threshold
+        parent = {}
+
+        def find(key):
+            parent.setdefault(key, key)
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        # Only ids sharing a bucket are ever compared
+        for bucket in self._buckets.values():
+            for position, key in enumerate(bucket):
+                for other in bucket[position + 1:]:
+                    root, other_root = find(key), find(other)
+                    if root != other_root and similarity(self.signatures[key], self.signatures[other]) >= threshold:
+                        parent[other_root] = root
+
+        groups = defaultdict(list)
+        for key in parent:
+            groups[find(key)].append(key)
+        return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=lambda group: group[0])
@@ -0,0 +1,122 @@
+"""
+Versioned cache of the public job board, job pages and anonymous job API.
+
+Entries are stored in Django's cache under keys that embed shared version
+counters (jobsafi.versions, kept in the database): a global listing
+version, one version per job and one for tag names. Signals and the bulk
+write paths bump the versions whose content changed once the writing
+transaction commits, so the next request builds a fresh entry and the stale
+ones are never read again; PUBLIC_CACHE_TIMEOUT only bounds how long
+unreachable entries occupy the cache. Candidate and response counts and
+mean scores change with every application, so they are not cached: the
+job API reads them fresh for each page (JobViewSet.LIVE_FIELDS).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .versions import bump_version, get_version, get_versions
+
+CACHE_KEY_PREFIX = "jobsafi:public:"
+LISTING_VERSION = "public:jobs"
+TAGS_VERSION = "public:tags"
+
+_MISSING = object()
+_stats = {}
+
+
+def _job_version(job_id):
+    return f"public:job:{job_id}"
+
+
+def cache_key(kind, request, job_id=None):
+    """
+    Key of a public entry for `request`.
+
+    Listings depend on the global version; job pages on the job's version
+    and the tag names. The full URL is part of the key, so pages, query
+    strings and hosts (absolute pagination links) get separate entries.
+    """
+    if job_id is None:
+        versions = [get_version(LISTING_VERSION)]
+    else:
+        versions = get_versions(_job_version(job_id), TAGS_VERSION)
+    url = hashlib.md5(request.build_absolute_uri().encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{kind}:{job_id or ''}:{'.'.join(map(str, versions))}:{url}"
+
+
+def get_or_build(kind, request, build, job_id=None):
+    """
+    Return the cached value for `request`, calling `build()` on a miss.
+
+    Exceptions from `build` (e.g. Http404) propagate and nothing is stored.
+    """
+    stats = _stats.setdefault(kind, {"hits": 0, "misses": 0})
+    if not settings.PUBLIC_CACHE_TIMEOUT:
+        stats["misses"] += 1
+        return build()
+
+    # Versions are read before building, so a change committed while we
+    # build is stored under the old key and never served
+    key = cache_key(kind, request, job_id)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        stats["hits"] += 1
+        return value
+    stats["misses"] += 1
+    value = build()
+    cache.set(key, value, settings.PUBLIC_CACHE_TIMEOUT)
+    return value
+
+
+def _bump_on_commit(*names):
+    """
+    Bump the versions once the current transaction commits (at once
+    outside a transaction).
+
+    Bumped earlier, a request could read the new version while the old rows
+    are still the committed ones and cache them under it until the next
+    change.
+    """
+    def bump():
+        for name in names:
+            bump_version(name)
+    transaction.on_commit(bump)
+
+
+def invalidate_job(job_id, listing=True):
+    """Expire the pages of one job, and the listings unless `listing` is false."""
+    if listing:
+        _bump_on_commit(_job_version(job_id), LISTING_VERSION)
+    else:
+        _bump_on_commit(_job_version(job_id))
+
+
+def invalidate_jobs(job_ids):
+    """Expire the pages of several jobs and the listings."""
+    _bump_on_commit(*map(_job_version, set(job_ids)), LISTING_VERSION)
+
+
+def invalidate_listings():
+    _bump_on_commit(LISTING_VERSION)
+
+
+def invalidate_tags():
+    """A tag was renamed or deleted: every page showing tags is stale."""
+    _bump_on_commit(TAGS_VERSION, LISTING_VERSION)
+
+
+def public_cache_stats():
+    """Hit/miss counters of this worker, per kind of page."""
+    totals = {"hits": 0, "misses": 0}
+    for stats in _stats.values():
+        totals["hits"] += stats["hits"]
+        totals["misses"] += stats["misses"]
+    lookups = totals["hits"] + totals["misses"]
+    return {
+        **totals,
+        "hit_rate": totals["hits"] / lookups if lookups else None,
+        "pages": {kind: dict(stats) for kind, stats in _stats.items()},
+    }
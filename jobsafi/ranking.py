@@ -0,0 +1,45 @@
+"""
+Top-K ranking of a job's responses.
+
+Responses are read in the order of the (job, -overall_score, submitted_at,
+id) index and the query stops after K rows, so ranking a job with many
+applicants costs about the same as ranking one with a few. Filters are
+correlated subqueries checked only for the rows the scan visits.
+"""
+from django.db.models import Count, Exists, OuterRef, Subquery
+
+from .models import CandidateAnswer, CandidateResponse
+
+RANKING_ORDER = ('-overall_score', 'submitted_at', 'id')
+
+
+def top_responses(job, k, min_answered=None, question_min_scores=None):
+    """
+    Queryset of the `k` best scored responses of `job`, best first.
+
+    `min_answered` keeps responses with at least that many non-empty
+    answers; `question_min_scores` maps question id → minimum score the
+    response's answer to that question must have. Unscored responses are
+    never ranked. Answers are not loaded.
+    """
+    responses = CandidateResponse.objects.filter(job=job, overall_score__isnull=False)
+
+    if min_answered:
+        answered = (
+            CandidateAnswer.objects.filter(response=OuterRef('pk'))
+            .exclude(answer_text='')
+            .order_by()
+            .values('response')
+            .annotate(n=Count('id'))
+            .values('n')
+        )
+        responses = responses.alias(answered=Subquery(answered)).filter(answered__gte=min_answered)
+
+    for question_id, min_score in (question_min_scores or {}).items():
+        responses = responses.filter(Exists(
+            CandidateAnswer.objects.filter(
+                response=OuterRef('pk'), question_id=question_id, score__gte=min_score
+            )
+        ))
+
+    return responses.order_by(*RANKING_ORDER)[:k]
@@ -0,0 +1,66 @@
+"""
+Records of the bulk imports, read from CSV or newline-delimited JSON.
+
+Inputs are iterables of str/bytes lines (an open file, stdin or a request
+body read line by line), consumed lazily so imports run in constant memory.
+"""
+import csv
+import json
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class RecordError(Exception):
+    pass
+
+
+def _decode(line):
+    # Bytes that are not UTF-8 become lone surrogates instead of raising
+    # mid-stream; the records holding them are reported (_invalid_utf8)
+    return line.decode("utf-8", "surrogateescape") if isinstance(line, bytes) else line
+
+
+def _invalid_utf8(text):
+    return any("\udc80" <= char <= "\udcff" for char in text)
+
+
+def read_records(lines, input_format="ndjson"):
+    """
+    Yield (number, record) pairs from an iterable of str/bytes lines.
+
+    NDJSON records are numbered by line, CSV records (read under a header
+    row) by data row. A line that is not JSON or a record that is not valid
+    UTF-8 is yielded as a RecordError.
+    """
+    if input_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {input_format}")
+    lines = map(_decode, lines)
+    if input_format == "csv":
+        for number, row in enumerate(csv.DictReader(lines), 1):
+            values = [*row.keys(), *row.values()]
+            if any(isinstance(value, str) and _invalid_utf8(value) for value in values):
+                yield number, RecordError("Invalid UTF-8")
+            else:
+                yield number, row
+        return
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        if _invalid_utf8(line):
+            yield number, RecordError("Invalid UTF-8")
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, RecordError(f"Invalid JSON: {exc}")
+
+
+def text_value(record, name, max_length=None):
+    """The non-blank string `name` of a record, or raise RecordError."""
+    value = record.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise RecordError(f"{name} is required")
+    if max_length and len(value) > max_length:
+        raise RecordError(f"{name} is longer than {max_length} characters")
+    return value
@@ -0,0 +1,106 @@
+"""
+Bulk review of screening questions.
+
+After generation an employer approves, rejects, rates and orders dozens of
+questions. These functions do it for a whole set at once: one query loads
+the employer's rows (which is the ownership check), one UPDATE restricted
+to the employer's jobs writes the rows that actually change, and the jobs
+are touched and their public pages expired once, since bulk updates
+bypass the question signals.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Job, ScreeningQuestion
+from .public_cache import invalidate_job
+from .revisions import touch
+
+REVIEW_FIELDS = ('is_approved', 'rating')
+
+
+def _owned(employer, question_ids, **filters):
+    """
+    Lock and return the employer's questions among `question_ids`, or raise
+    ScreeningQuestion.DoesNotExist listing the ids that are not theirs.
+    """
+    questions = list(
+        ScreeningQuestion.objects.select_for_update()
+        .filter(id__in=list(question_ids), job__employer=employer, **filters)
+        .values('id', 'job_id', *REVIEW_FIELDS, 'position')
+    )
+    missing = set(question_ids) - {question['id'] for question in questions}
+    if missing:
+        raise ScreeningQuestion.DoesNotExist(sorted(missing))
+    return questions
+
+
+def _write(employer, questions, changes):
+    """One UPDATE of `questions` (rows as loaded), then touch their jobs."""
+    if not questions:
+        return 0
+    updated = ScreeningQuestion.objects.filter(
+        id__in=[question['id'] for question in questions], job__employer=employer
+    ).update(revision=F('revision') + 1, updated_at=timezone.now(), **changes)
+
+    job_ids = {question['job_id'] for question in questions}
+    touch(Job.objects.filter(pk__in=job_ids))
+    # Public pages list approved questions only
+    public = {
+        question['job_id'] for question in questions
+        if question['is_approved'] or changes.get('is_approved', question['is_approved'])
+    }
+    for job_id in public:
+        invalidate_job(job_id, listing=False)
+    return updated
+
+
+def update_questions(employer, question_ids, **changes):
+    """
+    Set `changes` (is_approved and/or rating) on the employer's questions.
+
+    Returns the number of questions that changed; questions already holding
+    the values are left alone. Raises ScreeningQuestion.DoesNotExist with
+    the ids that are not the employer's, changing nothing.
+    """
+    unknown = set(changes) - set(REVIEW_FIELDS)
+    if unknown:
+        raise TypeError(f"Cannot bulk update {', '.join(sorted(unknown))}")
+    with transaction.atomic():
+        questions = _owned(employer, question_ids)
+        changed = [
+            question for question in questions
+            if any(question[field] != value for field, value in changes.items())
+        ]
+        return _write(employer, changed, changes)
+
+
+def approve_generated_questions(employer, job):
+    """Approve every generated (not custom) question of the job still awaiting review."""
+    with transaction.atomic():
+        questions = list(
+            ScreeningQuestion.objects.select_for_update()
+            .filter(job=job, job__employer=employer, is_custom=False, is_approved=False)
+            .values('id', 'job_id', *REVIEW_FIELDS)
+        )
+        return _write(employer, questions, {'is_approved': True})
+
+
+def reorder_questions(employer, job, question_ids):
+    """
+    Give the job's questions the order of `question_ids` (positions 1, 2, ...).
+
+    Questions left out keep their position; new questions get position 0 and
+    are listed first until the next reorder. Returns the number of
+    questions that moved, or raises ScreeningQuestion.DoesNotExist with the
+    ids that are not questions of this job.
+    """
+    positions = {question_id: index for index, question_id in enumerate(question_ids, start=1)}
+    with transaction.atomic():
+        questions = _owned(employer, positions, job=job)
+        moved = [question for question in questions if question['position'] != positions[question['id']]]
+        return _write(employer, moved, {
+            'position': Case(
+                *[When(id=question['id'], then=Value(positions[question['id']])) for question in moved]
+            ),
+        })
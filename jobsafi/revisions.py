@@ -0,0 +1,16 @@
+"""
+Revisions of the rows served with ETag/Last-Modified validators.
+
+Job, ScreeningQuestion and CandidateResponse bump `revision` and
+`updated_at` on save. A parent's representation also embeds child rows
+(a job its questions and tags, a response its answers and candidate), so
+child writes touch the parent: signals do it for single saves and
+deletes, and bulk paths call touch() themselves.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+
+def touch(queryset):
+    """Bump the revision of every row of `queryset` in one UPDATE."""
+    return queryset.update(revision=F("revision") + 1, updated_at=timezone.now())
@@ -0,0 +1,126 @@
+"""
+Running score totals on CandidateResponse.
+
+Each response keeps `score_sum` and `scored_count` for its scored answers.
+Score changes are applied as deltas with F() expressions in a single UPDATE,
+so concurrent reviewers scoring different answers of the same response
+never overwrite each other, and `overall_score` is derived from the new
+totals in the same statement.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import (
+    Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .analytics import AnalyticsDelta
+from .models import CandidateAnswer, CandidateResponse
+
+
+def score_delta_update(sum_delta, count_delta):
+    """UPDATE kwargs adding the deltas to a response's running totals."""
+    new_sum = F('score_sum') + sum_delta
+    new_count = F('scored_count') + count_delta
+    return {
+        'score_sum': new_sum,
+        'scored_count': new_count,
+        'revision': F('revision') + 1,
+        'updated_at': timezone.now(),
+        # Every right-hand side sees the old row, hence the explicit deltas
+        'overall_score': Case(
+            When(scored_count__gt=-count_delta,
+                 then=Cast(new_sum, FloatField()) / Cast(new_count, FloatField())),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+    }
+
+
+def apply_score_changes(changes):
+    """
+    Apply answer score changes to their responses' running totals.
+
+    `changes` is an iterable of (response_id, old_score, new_score) where a
+    score of None means "not scored". One UPDATE is issued per response.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for response_id, old_score, new_score in changes:
+        delta = deltas[response_id]
+        if old_score is not None:
+            delta[0] -= old_score
+            delta[1] -= 1
+        if new_score is not None:
+            delta[0] += new_score
+            delta[1] += 1
+
+    for response_id, (sum_delta, count_delta) in deltas.items():
+        if sum_delta or count_delta:
+            CandidateResponse.objects.filter(pk=response_id).update(
+                **score_delta_update(sum_delta, count_delta)
+            )
+
+
+def recompute_response_scores(responses=None):
+    """
+    Rebuild running totals and overall_score from the answers.
+
+    Runs as one UPDATE with correlated aggregate subqueries. Returns the
+    number of responses updated.
+    """
+    if responses is None:
+        responses = CandidateResponse.objects.all()
+
+    scored = (
+        CandidateAnswer.objects.filter(response=OuterRef('pk'), score__isnull=False)
+        .order_by()
+        .values('response')
+    )
+    return responses.update(
+        score_sum=Coalesce(Subquery(scored.annotate(total=Sum('score')).values('total')), 0),
+        scored_count=Coalesce(Subquery(scored.annotate(n=Count('id')).values('n')), 0),
+        overall_score=Subquery(scored.annotate(average=Avg('score')).values('average')),
+        revision=F('revision') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+def apply_answer_scores(job, scores):
+    """
+    Set many answer scores of one job in one transaction.
+
+    `scores` maps answer id to its new score (None clears it). The current
+    answers are loaded with one query, changed scores are written with one
+    bulk UPDATE and the totals of every affected response are recomputed
+    once, as are the job's analytics. Returns the ids of the affected responses, or raises
+    CandidateAnswer.DoesNotExist listing ids that are not answers of the job.
+    """
+    with transaction.atomic():
+        answers = list(
+            CandidateAnswer.objects.select_for_update()
+            .filter(id__in=list(scores), response__job=job)
+            .only('id', 'response_id', 'question_id', 'score', 'auto_scored')
+        )
+        missing = set(scores) - {answer.id for answer in answers}
+        if missing:
+            raise CandidateAnswer.DoesNotExist(sorted(missing))
+
+        # Confirming an auto score also turns it into a reviewer score
+        changed = [
+            answer for answer in answers
+            if answer.score != scores[answer.id] or answer.auto_scored
+        ]
+        analytics = AnalyticsDelta()
+        for answer in changed:
+            analytics.change_score(answer.question_id, answer.score, scores[answer.id])
+            answer.score = scores[answer.id]
+            answer.auto_scored = False
+        CandidateAnswer.objects.bulk_update(changed, ['score', 'auto_scored'], batch_size=500)
+        analytics.apply({answer.question_id: job.id for answer in changed})
+
+        response_ids = {answer.response_id for answer in changed}
+        if response_ids:
+            recompute_response_scores(CandidateResponse.objects.filter(id__in=response_ids))
+    return response_ids
@@ -0,0 +1,188 @@
+"""
+Full-text search over jobs, screening questions and templates.
+
+The FTS5 tables are created by migration 0006 and kept in sync by SQLite
+triggers, so every write path (save, bulk_create, update, raw SQL) is
+indexed. Queries go through the FTS index and are ranked with bm25, which
+keeps lookups fast regardless of table size.
+"""
+import html
+import re
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models.expressions import RawSQL
+
+FullTextIndex = namedtuple('FullTextIndex', ['table', 'content_table', 'columns'])
+
+FULLTEXT_INDEXES = {
+    'job': FullTextIndex('jobsafi_job_fts', 'jobsafi_job', ('title', 'description')),
+    'question': FullTextIndex('jobsafi_screeningquestion_fts', 'jobsafi_screeningquestion', ('text',)),
+    'template': FullTextIndex('jobsafi_templatequestion_fts', 'jobsafi_templatequestion', ('tag', 'template_text')),
+}
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+# Private-use characters FTS5 wraps around matches, swapped for the
+# highlight tags once the text is escaped
+_MATCH_START = '\ue000'
+_MATCH_END = '\ue001'
+SNIPPET_TOKENS = 16
+
+# Per type: the title column, the joins and the job id column of a hit
+_HIT_SQL = {
+    'job': (
+        'c.title', '', 'c.id',
+    ),
+    'question': (
+        'j.title', 'JOIN jobsafi_job j ON j.id = c.job_id', 'c.job_id',
+    ),
+    'template': (
+        'c.tag', '', 'NULL',
+    ),
+}
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def fulltext_available():
+    """FTS5 tables only exist on SQLite databases."""
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query that cannot raise a syntax error.
+
+    Every word has to match and the last one is matched as a prefix, so
+    results keep coming while the user is still typing.
+    """
+    words = _WORD_RE.findall(query or '')
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def matching_ids(kind, query):
+    """Subquery of the primary keys matching `query`, for use with pk__in."""
+    index = FULLTEXT_INDEXES[kind]
+    return RawSQL(
+        f"SELECT rowid FROM {index.table} WHERE {index.table} MATCH %s",
+        [match_expression(query)],
+    )
+
+
+def highlight(snippet):
+    """
+    HTML of an FTS5 snippet: the indexed text escaped, matches wrapped in
+    the highlight tags. Job and question text is user input, so it is never
+    passed through as markup.
+    """
+    return html.escape(snippet).replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_END, HIGHLIGHT_END)
+
+
+def _visibility(kind, user):
+    """Extra WHERE clause matching what the API lets `user` see, or None."""
+    authenticated = user is not None and user.is_authenticated
+    if kind == 'job':
+        return ('c.employer_id = %s', [user.pk]) if authenticated else ('', [])
+    if kind == 'question':
+        return ('j.employer_id = %s', [user.pk]) if authenticated else ('c.is_approved = %s', [True])
+    # Templates are only listed to signed-in employers
+    return ('', []) if authenticated else None
+
+
+def search(query, types=None, user=None, limit=20):
+    """
+    Ranked hits for `query` across the requested types.
+
+    Each hit is a dict with the type, id, job id, title (plain text), a
+    snippet (escaped HTML with <mark> around matches) and the bm25 rank
+    (lower is better). Results follow the same visibility rules as the
+    list endpoints for `user`.
+    """
+    match = match_expression(query)
+    if not match:
+        return []
+
+    hits = []
+    with connection.cursor() as cursor:
+        for kind in types or FULLTEXT_INDEXES:
+            visibility = _visibility(kind, user)
+            if visibility is None:
+                continue
+            index = FULLTEXT_INDEXES[kind]
+            title, join, job_id = _HIT_SQL[kind]
+            where, params = visibility
+            cursor.execute(
+                f"SELECT {index.table}.rowid, {job_id}, {title}, "
+                f"snippet({index.table}, -1, %s, %s, '…', %s), {index.table}.rank "
+                f"FROM {index.table} "
+                f"JOIN {index.content_table} c ON c.id = {index.table}.rowid {join} "
+                f"WHERE {index.table} MATCH %s {'AND ' + where if where else ''} "
+                f"ORDER BY {index.table}.rank LIMIT %s",
+                [_MATCH_START, _MATCH_END, SNIPPET_TOKENS, match, *params, limit],
+            )
+            hits.extend(
+                {'type': kind, 'id': pk, 'job': job, 'title': title_value,
+                 'snippet': highlight(snippet), 'rank': rank}
+                for pk, job, title_value, snippet, rank in cursor.fetchall()
+            )
+
+    hits.sort(key=lambda hit: hit['rank'])
+    return hits[:limit]
+
+
+def _trigger_sql(index):
+    """CREATE TRIGGER statements keeping `index` in sync with its content table."""
+    fts, content = index.table, index.content_table
+    columns = ', '.join(index.columns)
+    new = ', '.join(f'new.{column}' for column in index.columns)
+    old = ', '.join(f'old.{column}' for column in index.columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new});"
+    return {
+        f'{fts}_ai': f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {content} BEGIN {insert} END",
+        f'{fts}_ad': f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {content} BEGIN {delete} END",
+        f'{fts}_au': f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON {content} BEGIN {delete} {insert} END",
+    }
+
+
+def ensure_triggers(using=DEFAULT_DB_ALIAS):
+    """
+    Recreate sync triggers that a migration dropped.
+
+    SQLite migrations that alter a content table rebuild it, and the
+    triggers go with the old table. Missing ones are recreated and the
+    affected index is rebuilt, since writes in between were not indexed.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return []
+    with db.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = set(cursor.fetchall())
+        repaired = []
+        for kind, index in FULLTEXT_INDEXES.items():
+            # Migrated back past the FTS tables: nothing to sync
+            if ('table', index.table) not in existing:
+                continue
+            missing = [sql for name, sql in _trigger_sql(index).items() if ('trigger', name) not in existing]
+            for sql in missing:
+                cursor.execute(sql)
+            if missing:
+                cursor.execute(f"INSERT INTO {index.table}({index.table}) VALUES('rebuild')")
+                repaired.append(kind)
+    return repaired
+
+
+def rebuild_index(kinds=None, optimize=False):
+    """Rebuild (and optionally merge) the FTS tables from their content tables."""
+    with connection.cursor() as cursor:
+        for kind in kinds or FULLTEXT_INDEXES:
+            table = FULLTEXT_INDEXES[kind].table
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+            if optimize:
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES('optimize')")
@@ -0,0 +1,242 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from .analytics import AnalyticsDelta, rebuild_analytics, record_answers
+from .autotag import autotag_jobs, invalidate_tag_aliases
+from .counters import adjust_job_counters
+from .exports import remove_export_file
+from .models import (
+    Candidate, CandidateAnswer, CandidateResponse, ExportTask, Job, ScreeningQuestion, TagAlias,
+    TemplateQuestion,
+)
+from .public_cache import invalidate_job, invalidate_tags
+from .revisions import touch
+from .search import ensure_triggers
+from .scoring import apply_score_changes, recompute_response_scores
+from .template_index import invalidate_template_index
+from .utils import propagate_template_in_background
+
+
+@receiver(post_save, sender=TemplateQuestion)
+@receiver(post_delete, sender=TemplateQuestion)
+def template_changed(sender, instance, **kwargs):
+    """Rebuild the tag → template index after any template change."""
+    invalidate_template_index()
+
+
+@receiver(post_save, sender=TemplateQuestion)
+def propagate_new_template(sender, instance, raw=False, **kwargs):
+    """Optionally push an added or edited template to the jobs carrying its tag."""
+    if settings.TEMPLATE_AUTO_PROPAGATE and not raw:
+        propagate_template_in_background(instance.pk)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """Put back FTS sync triggers lost when a migration rebuilt a table."""
+    if sender.label == "jobsafi":
+        ensure_triggers(using)
+
+
+@receiver(post_save, sender=TagAlias)
+@receiver(post_delete, sender=TagAlias)
+def tag_alias_changed(sender, instance, **kwargs):
+    """Recompile the auto-tagging automaton after any alias change."""
+    invalidate_tag_aliases()
+
+
+# Rows collected by the delete() being run in this thread. Django sends every
+# pre_delete of a delete() before any post_delete, so when children of a
+# deleted job go, the job is known and their bookkeeping is skipped: its
+# counters, analytics and responses are going away with it.
+_deleting = threading.local()
+
+
+def _deletion(origin):
+    """What the delete() started by `origin` collected (empty for any other)."""
+    deletion = getattr(_deleting, "deletion", None)
+    if origin is None or deletion is None or deletion["origin"] is not origin:
+        return {"origin": origin, "jobs": set(), "responses": set(), "questions": {}}
+    return deletion
+
+
+@receiver(pre_delete, sender=Job)
+@receiver(pre_delete, sender=CandidateResponse)
+@receiver(pre_delete, sender=ScreeningQuestion)
+def collect_deletion(sender, instance, origin=None, **kwargs):
+    deletion = _deletion(origin)
+    _deleting.deletion = deletion
+    if sender is Job:
+        deletion["jobs"].add(instance.pk)
+    elif sender is CandidateResponse:
+        deletion["responses"].add(instance.pk)
+    else:
+        deletion["questions"][instance.pk] = instance.job_id
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def job_changed(sender, instance, **kwargs):
+    """Expire the cached public pages showing the job."""
+    invalidate_job(instance.pk)
+
+
+@receiver(m2m_changed, sender=Job.tags.through)
+def job_tags_changed(sender, instance, action, **kwargs):
+    if isinstance(instance, Job) and action.startswith("post_"):
+        touch(Job.objects.filter(pk=instance.pk))
+        invalidate_job(instance.pk)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    invalidate_tags()
+
+
+@receiver(post_save, sender=ScreeningQuestion)
+@receiver(post_delete, sender=ScreeningQuestion)
+def question_changed(sender, instance, created=False, raw=False, origin=None, **kwargs):
+    """Bump the job's revision; expire its public page if the question is or was approved."""
+    if raw or instance.job_id in _deletion(origin)["jobs"]:
+        return
+    # The job's representation lists its questions
+    touch(Job.objects.filter(pk=instance.job_id))
+    # Rows loaded without is_approved may have been public
+    was_approved = False if created else instance.__dict__.get("_loaded_is_approved", True)
+    if instance.is_approved or was_approved:
+        invalidate_job(instance.job_id, listing=False)
+    instance._loaded_is_approved = instance.is_approved
+
+
+@receiver(post_save, sender=Job)
+def autotag_saved_job(sender, instance, created, raw=False, **kwargs):
+    """
+    Add vocabulary tags found in a new job's title or description, or in the
+    text an edit changed. Tags the employer removed are not added back
+    unless the edit brings their words in.
+    """
+    if raw or not settings.AUTO_TAG_JOBS:
+        return
+    text = (instance.title, instance.description)
+    # Unknown for rows loaded without the text: leave their tags alone
+    loaded = instance.__dict__.get("_loaded_text")
+    if created:
+        autotag_jobs(instance)
+    elif loaded is not None and loaded != text:
+        autotag_jobs(instance, previous={instance.pk: loaded})
+    instance._loaded_text = text
+
+
+@receiver(post_save, sender=Candidate)
+def candidate_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_job_counters(candidates={instance.job_id: 1})
+    else:
+        # Responses embed their candidate
+        touch(CandidateResponse.objects.filter(candidate=instance))
+
+
+@receiver(post_delete, sender=Candidate)
+def candidate_deleted(sender, instance, origin=None, **kwargs):
+    if instance.job_id not in _deletion(origin)["jobs"]:
+        adjust_job_counters(candidates={instance.job_id: -1})
+
+
+@receiver(post_save, sender=CandidateResponse)
+def response_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_job_counters(responses={instance.job_id: 1})
+
+
+@receiver(post_delete, sender=CandidateResponse)
+def response_deleted(sender, instance, origin=None, **kwargs):
+    if instance.job_id not in _deletion(origin)["jobs"]:
+        adjust_job_counters(responses={instance.job_id: -1})
+
+
+def _read_stored_score(answer):
+    answers = CandidateAnswer.objects.filter(pk=answer.pk)
+    if transaction.get_connection().in_atomic_block:
+        # Held until the caller's transaction ends
+        answers = answers.select_for_update()
+    stored = list(answers.values_list("score", flat=True))
+    if stored:
+        answer._loaded_score = stored[0]
+
+
+@receiver(pre_save, sender=CandidateAnswer)
+def read_stored_score(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Take the previous score from the row rather than from when the instance
+    was loaded: another save in between would otherwise be counted twice.
+    """
+    if raw or instance._state.adding or (update_fields is not None and "score" not in update_fields):
+        return
+    _read_stored_score(instance)
+
+
+@receiver(pre_delete, sender=CandidateAnswer)
+def read_deleted_score(sender, instance, origin=None, **kwargs):
+    # Rows collected by a queryset or cascading delete were just loaded
+    if origin is instance:
+        _read_stored_score(instance)
+
+
+@receiver(post_save, sender=CandidateAnswer)
+def answer_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Apply a score set, changed or cleared to the response's running totals and analytics."""
+    if raw:
+        return
+    if created:
+        record_answers([instance])
+        old_score = None
+    elif "_loaded_score" in instance.__dict__:
+        old_score = instance._loaded_score
+    elif update_fields is not None and "score" not in update_fields:
+        return
+    else:
+        # Previous score unknown (e.g. deferred field): rebuild this response
+        recompute_response_scores(CandidateResponse.objects.filter(pk=instance.response_id))
+        rebuild_analytics(Job.objects.filter(questions=instance.question_id))
+        instance._loaded_score = instance.score
+        return
+
+    apply_score_changes([(instance.response_id, old_score, instance.score)])
+    if old_score == instance.score:
+        # Score changes bump the response's revision with its totals
+        touch(CandidateResponse.objects.filter(pk=instance.response_id))
+    if not created:
+        delta = AnalyticsDelta()
+        delta.change_score(instance.question_id, old_score, instance.score)
+        delta.apply()
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=CandidateAnswer)
+def answer_deleted(sender, instance, origin=None, **kwargs):
+    deletion = _deletion(origin)
+    old_score = instance.__dict__.get("_loaded_score", instance.score)
+    # Totals of a response deleted along with the answer do not matter
+    if instance.response_id not in deletion["responses"]:
+        apply_score_changes([(instance.response_id, old_score, None)])
+        if old_score is None:
+            touch(CandidateResponse.objects.filter(pk=instance.response_id))
+    if deletion["questions"].get(instance.question_id) not in deletion["jobs"]:
+        delta = AnalyticsDelta()
+        delta.add_answer(instance.question_id, instance.answer_text, old_score, sign=-1)
+        delta.apply(create=False)
+
+
+@receiver(post_delete, sender=ExportTask)
+def export_deleted(sender, instance, **kwargs):
+    """Remove the file of a deleted export (e.g. with its job) once the delete commits."""
+    if instance.file_path:
+        transaction.on_commit(lambda: remove_export_file(instance.file_path))
@@ -0,0 +1,67 @@
+"""
+Candidate submissions shared by the REST API and the candidate portal.
+
+A submission is written in one transaction with a constant number of
+queries: one lookup validates every question id against the job and the
+answers are inserted with a single bulk_create. Job and question analytics
+take one UPDATE per distinct change, not one per answer.
+"""
+from django.db import transaction
+
+from .analytics import record_answers
+from .models import Candidate, CandidateAnswer, CandidateResponse
+
+
+def get_or_create_candidate(job, email, name):
+    """Find the job's candidate by email (refreshing the name) or create one."""
+    candidate, created = Candidate.objects.get_or_create(
+        email=email,
+        job=job,
+        defaults={'name': name}
+    )
+    if not created and name and candidate.name != name:
+        candidate.name = name
+        candidate.save(update_fields=['name'])
+    return candidate
+
+
+def _question_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def submit_response(job, candidate, answers, questions=None):
+    """
+    Create a CandidateResponse with its answers.
+
+    `answers` is an iterable of (question_id, answer_text) pairs. Answers to
+    questions that do not belong to the job (or to `questions`, a queryset of
+    the job's questions, when given) and answers without text are skipped.
+    """
+    if questions is None:
+        questions = job.questions.all()
+
+    pairs = []
+    for question_id, answer_text in answers:
+        question_id = _question_id(question_id)
+        if question_id is not None and answer_text is not None:
+            pairs.append((question_id, answer_text))
+
+    with transaction.atomic():
+        valid_ids = set()
+        if pairs:
+            valid_ids = set(
+                questions.filter(id__in={question_id for question_id, _ in pairs})
+                .values_list('id', flat=True)
+            )
+
+        response = CandidateResponse.objects.create(candidate=candidate, job=job)
+        answers = CandidateAnswer.objects.bulk_create([
+            CandidateAnswer(response=response, question_id=question_id, answer_text=answer_text)
+            for question_id, answer_text in pairs
+            if question_id in valid_ids
+        ])
+        record_answers(answers, question_jobs=dict.fromkeys(valid_ids, job.id))
+    return response
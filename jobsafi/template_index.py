@@ -0,0 +1,110 @@
+"""
+Process-local index of template questions keyed by normalized tag.
+
+The template library changes rarely, so instead of querying TemplateQuestion
+on every generation request the rows are loaded once per process and reused
+until the shared "templates" version counter moves.
+"""
+import threading
+from collections import namedtuple
+
+from django.db import transaction
+
+from .models import TemplateQuestion
+from .neardup import LSHIndex
+from .versions import bump_version, get_version
+
+VERSION_NAME = "templates"
+
+TemplateEntry = namedtuple("TemplateEntry", ["id", "tag", "template_text", "fingerprint", "minhash"])
+
+_index = None
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "rebuilds": 0}
+
+
+def normalize_tag(name):
+    return name.strip().lower()
+
+
+class TemplateIndex:
+    """Immutable snapshot of the template library for one version."""
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = tuple(entries)
+        by_tag = {}
+        for entry in self.entries:
+            by_tag.setdefault(normalize_tag(entry.tag), []).append(entry)
+        self.by_tag = {tag: tuple(items) for tag, items in by_tag.items()}
+        self._lsh = None
+
+    def for_tag(self, tag):
+        return self.by_tag.get(normalize_tag(tag), ())
+
+    def lsh(self):
+        """Near-duplicate index over the template signatures, built on first use."""
+        if self._lsh is None:
+            self._lsh = LSHIndex((entry.id, entry.minhash) for entry in self.entries)
+        return self._lsh
+
+    def duplicate_clusters(self, threshold=None):
+        """Groups of near-duplicate templates, as lists of entries."""
+        by_id = {entry.id: entry for entry in self.entries}
+        return [[by_id[pk] for pk in cluster] for cluster in self.lsh().clusters(threshold)]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def get_template_index():
+    """Return the current index, rebuilding it if the library has changed."""
+    global _index
+    version = get_version(VERSION_NAME)
+    index = _index
+    if index is not None and index.version == version:
+        _stats["hits"] += 1
+        return index
+
+    with _lock:
+        _stats["misses"] += 1
+        index = _index
+        if index is None or index.version != version:
+            # The version is read before the rows and writers only bump it
+            # once their change is committed, so a change committed while
+            # we load is picked up on the next call.
+            rows = TemplateQuestion.objects.order_by("id").values_list(
+                "id", "tag", "template_text", "fingerprint", "minhash"
+            )
+            index = TemplateIndex(
+                version, (TemplateEntry(*row[:4], bytes(row[4])) for row in rows)
+            )
+            _index = index
+            _stats["rebuilds"] += 1
+        return index
+
+
+def _drop_index():
+    global _index
+    bump_version(VERSION_NAME)
+    _index = None
+
+
+def invalidate_template_index():
+    """
+    Mark every process's index as stale once the current transaction
+    commits (at once outside a transaction).
+
+    Bumped earlier, another worker could read the new version while the
+    old rows are still the committed ones and cache them under it.
+    """
+    transaction.on_commit(_drop_index)
+
+
+def template_index_stats():
+    index = _index
+    return {
+        **_stats,
+        "version": index.version if index is not None else None,
+        "templates": len(index) if index is not None else 0,
+    }
@@ -0,0 +1,126 @@
+"""
+Bulk import and export of the template question library.
+
+A template is identified by its normalized tag and the fingerprint of its
+normalized text, the (tag, fingerprint) unique key of TemplateQuestion.
+Imports read CSV or NDJSON records ({"tag": "...", "template_text": "..."})
+lazily and upsert them in chunks: one query finds the chunk's existing
+templates, so the report can tell inserted, updated (same text, different
+wording) and unchanged records apart, and the new and changed rows are
+written with one bulk_create(update_conflicts=True). Exports stream rows
+through QuerySet.iterator() in the same formats, and an export imports
+back as all unchanged.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .exports import EXPORT_CHUNK_SIZE
+from .models import TemplateQuestion
+from .neardup import minhash_signature
+from .records import RecordError, text_value
+from .template_index import invalidate_template_index, normalize_tag
+from .text import text_fingerprint
+from .utils import propagate_template_in_background
+
+TEMPLATE_FIELDS = ["id", "tag", "template_text"]
+
+
+def template_rows(tag=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a header and then one row per template (of `tag` if given)."""
+    yield TEMPLATE_FIELDS
+    templates = TemplateQuestion.objects.order_by("id")
+    if tag:
+        templates = templates.filter(tag=normalize_tag(tag))
+    yield from templates.values_list(*TEMPLATE_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _clean(record):
+    """Return the normalized tag and the text of a record, or raise RecordError."""
+    if isinstance(record, RecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordError("Each record must be a JSON object")
+    tag = normalize_tag(text_value(record, "tag", TemplateQuestion._meta.get_field("tag").max_length))
+    return tag, text_value(record, "template_text")
+
+
+def import_templates(records, chunk_size=None):
+    """
+    Upsert templates from (number, record) pairs, as records.read_records()
+    yields them, one transaction per chunk.
+
+    Returns a report dict with the inserted, updated and unchanged counts,
+    the records repeating an earlier one of the input (`duplicates`) and
+    the invalid ones (`errors`, a list of {"record", "error"}).
+    """
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    report = {"inserted": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "errors": []}
+    seen = set()
+    chunk = []
+    for number, record in records:
+        chunk.append((number, record))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, seen, report)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, seen, report)
+    return report
+
+
+def _import_chunk(chunk, seen, report):
+    templates = {}
+    for number, record in chunk:
+        try:
+            tag, text = _clean(record)
+        except RecordError as exc:
+            report["errors"].append({"record": number, "error": str(exc)})
+            continue
+        key = (tag, text_fingerprint(text))
+        if key in seen:
+            report["duplicates"] += 1
+            continue
+        seen.add(key)
+        templates[key] = text
+    if not templates:
+        return
+
+    existing = {
+        (tag, fingerprint): text
+        for tag, fingerprint, text in TemplateQuestion.objects.filter(
+            tag__in={tag for tag, _ in templates},
+            fingerprint__in={fingerprint for _, fingerprint in templates},
+        ).values_list("tag", "fingerprint", "template_text")
+    }
+    rows = []
+    inserted = 0
+    for (tag, fingerprint), text in templates.items():
+        current = existing.get((tag, fingerprint))
+        if current is None:
+            inserted += 1
+        elif current == text:
+            report["unchanged"] += 1
+            continue
+        else:
+            report["updated"] += 1
+        rows.append(TemplateQuestion(
+            tag=tag, template_text=text, fingerprint=fingerprint, minhash=minhash_signature(text),
+        ))
+    report["inserted"] += inserted
+    if not rows:
+        return
+
+    with transaction.atomic():
+        # A template created since the lookup above is updated, not duplicated
+        TemplateQuestion.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["tag", "fingerprint"],
+            update_fields=["template_text", "minhash"],
+            batch_size=500,
+        )
+        # Bulk writes send no post_save: propagate here (after commit)
+        if inserted and settings.TEMPLATE_AUTO_PROPAGATE:
+            propagate_template_in_background(*[
+                row.pk for row in rows if (row.tag, row.fingerprint) not in existing
+            ])
+    invalidate_template_index()
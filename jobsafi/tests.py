@@ -1,3 +1,760 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .analytics import COUNTERS, job_analytics, rebuild_analytics
+from .autotag import TagMatcher, get_tag_matcher
+from .counters import reconcile_job_counters
+from .exports import claim_next_task, cleanup_expired_exports, export_lines, response_rows, run_export_task
+from .ingest import ingest_responses
+from .job_import import import_jobs
+from .models import (
+    CacheVersion, Candidate, CandidateAnswer, CandidateResponse, Employer, ExportTask, Job,
+    JobAnalytics, QuestionAnalytics, ScoreBucket, ScreeningQuestion, TagAlias, TemplateQuestion,
+)
+from .neardup import LSHIndex, minhash_signature, shingles, similarity
+from .public_cache import LISTING_VERSION
+from .records import RecordError, read_records
+from .scoring import apply_answer_scores, recompute_response_scores
+from .search import ensure_triggers, match_expression, search
+from .submissions import submit_response
+from .template_index import get_template_index
+from .template_library import import_templates
+from .utils import auto_generate_questions, propagate_template
+from .versions import bump_version, get_version, get_versions
+
+# Keep test runs out of the file-based cache of the project
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def numbered(records):
+    """(number, record) pairs, as records.read_records() yields them."""
+    return enumerate(records, start=1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResponseScoreTests(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+        self.job = Job.objects.create(employer=self.employer, title='Python dev', description='d', seniority='Mid')
+        self.questions = [
+            ScreeningQuestion.objects.create(job=self.job, text=f'Question {i}') for i in range(3)
+        ]
+        candidate = Candidate.objects.create(job=self.job, name='a', email='a@example.com')
+        self.response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+
+    def answer(self, question, score=None):
+        return CandidateAnswer.objects.create(
+            response=self.response, question=question, answer_text='x', score=score
+        )
+
+    def assertTotals(self, score_sum, scored_count, overall_score):
+        self.response.refresh_from_db()
+        self.assertEqual(
+            (self.response.score_sum, self.response.scored_count, self.response.overall_score),
+            (score_sum, scored_count, overall_score),
+        )
+
+    def test_totals_follow_answer_scores(self):
+        first = self.answer(self.questions[0], score=4)
+        second = self.answer(self.questions[1], score=2)
+        self.answer(self.questions[2])
+        self.assertTotals(6, 2, 3.0)
+
+        second.score = 5
+        second.save()
+        self.assertTotals(9, 2, 4.5)
+
+        second.score = None
+        second.save()
+        self.assertTotals(4, 1, 4.0)
+
+        first.delete()
+        self.assertTotals(0, 0, None)
+
+    def test_saves_of_stale_copies_are_counted_once(self):
+        answer = self.answer(self.questions[0])
+        first, second = CandidateAnswer.objects.get(pk=answer.pk), CandidateAnswer.objects.get(pk=answer.pk)
+        first.score = 4
+        first.save()
+        second.score = 2
+        second.save(update_fields=['score'])
+        self.assertTotals(2, 1, 2.0)
+        self.assertEqual(answer.question.analytics.score_sum, 2)
+
+    def test_apply_answer_scores(self):
+        answers = [self.answer(question) for question in self.questions]
+        affected = apply_answer_scores(self.job, {answers[0].id: 3, answers[1].id: 5})
+        self.assertEqual(affected, {self.response.id})
+        self.assertTotals(8, 2, 4.0)
+
+        apply_answer_scores(self.job, {answers[0].id: None})
+        self.assertTotals(5, 1, 5.0)
+
+    def test_apply_answer_scores_rejects_answers_of_other_jobs(self):
+        other = Job.objects.create(employer=self.employer, title='Go dev', description='d', seniority='Mid')
+        answer = self.answer(self.questions[0])
+        with self.assertRaises(CandidateAnswer.DoesNotExist) as raised:
+            apply_answer_scores(other, {answer.id: 3})
+        self.assertEqual(raised.exception.args[0], [answer.id])
+        self.assertTotals(0, 0, None)
+
+    def test_recompute_repairs_drifted_totals(self):
+        self.answer(self.questions[0], score=3)
+        self.answer(self.questions[1])
+        CandidateResponse.objects.update(score_sum=99, scored_count=9, overall_score=1)
+        self.assertEqual(recompute_response_scores(), 1)
+        self.assertTotals(3, 1, 3.0)
+
+    def test_deleting_the_job_deletes_its_responses(self):
+        self.answer(self.questions[0], score=3)
+        self.job.delete()
+        self.assertFalse(CandidateResponse.objects.exists())
+        self.assertFalse(CandidateAnswer.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TEMPLATE_AUTO_PROPAGATE=False)
+class GenerateQuestionsTests(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+        # The template index drops its entries when the templates commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for tag, text in (
+                ('python', 'What is a decorator?'),
+                ('python', 'How does the GIL limit threads?'),
+                ('django', 'When would you use select_related?'),
+            ):
+                TemplateQuestion.objects.create(tag=tag, template_text=text)
+
+    def job(self, *tags):
+        job = Job.objects.create(employer=self.employer, title='Dev', description='d', seniority='Mid')
+        job.tags.add(*tags)
+        return job
+
+    def test_one_question_per_template_of_the_job_tags(self):
+        job = self.job('Python', 'django')
+        created = auto_generate_questions(job)
+        self.assertEqual(
+            sorted(question.text for question in created),
+            ['How does the GIL limit threads?', 'What is a decorator?', 'When would you use select_related?'],
+        )
+        self.assertFalse(any(question.is_approved or question.is_custom for question in created))
+        self.assertEqual(auto_generate_questions(job), [])
+
+    def test_questions_the_job_already_has_are_skipped(self):
+        job = self.job('python')
+        ScreeningQuestion.objects.create(job=job, text='what is a  DECORATOR', is_custom=True)
+        created = auto_generate_questions(job)
+        self.assertEqual([question.text for question in created], ['How does the GIL limit threads?'])
+
+    def test_jobs_without_tags_get_nothing(self):
+        self.assertEqual(auto_generate_questions(self.job()), [])
+
+    def test_query_count_does_not_grow_with_the_jobs(self):
+        counts = []
+        for size in (1, 6):
+            jobs = [self.job('python', 'django') for _ in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                created = auto_generate_questions(jobs)
+            self.assertEqual(len(created), 3 * size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class VersionTests(TestCase):
+    def test_bump_increments_by_one(self):
+        before = get_version('test:counter')
+        bump_version('test:counter')
+        bump_version('test:counter')
+        self.assertEqual(get_version('test:counter'), before + 2)
+
+    def test_first_bump_creates_the_counter(self):
+        bump_version('test:new')
+        self.assertEqual(CacheVersion.objects.filter(name='test:new').count(), 1)
+
+    def test_get_versions_reads_all_counters_with_one_query(self):
+        a, b = get_version('test:a'), get_version('test:b')
+        with self.assertNumQueries(1):
+            self.assertEqual(get_versions('test:a', 'test:b'), [a, b])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TEMPLATE_AUTO_PROPAGATE=False)
+class TemplateIndexTests(TestCase):
+    def test_index_is_reused_until_a_template_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            template = TemplateQuestion.objects.create(tag=' Python ', template_text='What is a decorator?')
+        index = get_template_index()
+        self.assertIs(get_template_index(), index)
+        self.assertEqual([entry.id for entry in index.for_tag('PYTHON')], [template.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            template.delete()
+        self.assertEqual(len(get_template_index().for_tag('python')), 0)
+
+    def test_index_changes_when_the_template_commits(self):
+        get_template_index()
+        with self.captureOnCommitCallbacks() as callbacks:
+            TemplateQuestion.objects.create(tag='go', template_text='Explain goroutines.')
+        # Not committed yet: other workers must not cache the new rows under a new version
+        self.assertEqual(len(get_template_index().for_tag('go')), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(get_template_index().for_tag('go')), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TEMPLATE_AUTO_PROPAGATE=False)
+class PropagateTemplateTests(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+        self.jobs = []
+        for tags in (['Python'], ['python', 'django'], ['python'], ['go']):
+            job = Job.objects.create(employer=self.employer, title='Dev', description='d', seniority='Mid')
+            job.tags.add(*tags)
+            self.jobs.append(job)
+        self.template = TemplateQuestion.objects.create(tag='python', template_text='What is a decorator?')
+
+    def test_adds_the_template_to_tagged_jobs_lacking_it(self):
+        ScreeningQuestion.objects.create(job=self.jobs[2], text='what is a DECORATOR', is_custom=True)
+        self.assertEqual(propagate_template(self.template, batch_size=1), 2)
+        self.assertEqual(
+            list(ScreeningQuestion.objects.filter(text='What is a decorator?').order_by('job_id').values_list('job_id', flat=True)),
+            [self.jobs[0].id, self.jobs[1].id],
+        )
+        self.assertEqual(propagate_template(self.template), 0)
+
+    def test_propagation_touches_the_jobs(self):
+        revisions = dict(Job.objects.values_list('pk', 'revision'))
+        propagate_template(self.template)
+        self.assertGreater(Job.objects.get(pk=self.jobs[0].pk).revision, revisions[self.jobs[0].pk])
+        self.assertEqual(Job.objects.get(pk=self.jobs[3].pk).revision, revisions[self.jobs[3].pk])
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('propagate_templates', '--tag', 'PYTHON', stdout=out)
+        self.assertIn('Added 3 questions', out.getvalue())
+
+
+class ReadRecordsTests(TestCase):
+    def test_ndjson(self):
+        records = list(read_records([b'{"a": 1}\n', b'\n', b'not json\n', b'{"a": "\xff"}\n', '{"a": 2}']))
+        self.assertEqual([number for number, _ in records], [1, 3, 4, 5])
+        self.assertEqual(records[0][1], {'a': 1})
+        self.assertIsInstance(records[1][1], RecordError)
+        self.assertEqual(str(records[2][1]), 'Invalid UTF-8')
+        self.assertEqual(records[3][1], {'a': 2})
+
+    def test_csv(self):
+        lines = [b'title,tags\n', b'"Go, dev","go, python"\n', b'Caf\xe9,x\n', 'Rust dev,\n']
+        records = list(read_records(lines, 'csv'))
+        self.assertEqual(records[0], (1, {'title': 'Go, dev', 'tags': 'go, python'}))
+        self.assertEqual(str(records[1][1]), 'Invalid UTF-8')
+        self.assertEqual(records[2], (3, {'title': 'Rust dev', 'tags': ''}))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            list(read_records([], 'xml'))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ExportTests(TestCase):
+    def setUp(self):
+        employer = Employer.objects.create_user('employer', password='x')
+        self.job = Job.objects.create(employer=employer, title='Python dev', description='d', seniority='Mid')
+        self.questions = [
+            ScreeningQuestion.objects.create(job=self.job, text=text) for text in ('Why, "us"?', 'When?')
+        ]
+        self.responses = []
+        for email, answers in (('a@example.com', [('Because', 4), ('Now', None)]), ('b@example.com', [])):
+            candidate = Candidate.objects.create(job=self.job, name=email[0], email=email)
+            response = CandidateResponse.objects.create(job=self.job, candidate=candidate)
+            for question, (text, score) in zip(self.questions, answers):
+                CandidateAnswer.objects.create(response=response, question=question, answer_text=text, score=score)
+            self.responses.append(response)
+
+    def test_one_row_per_response(self):
+        first, second = self.questions
+        rows = list(response_rows(self.job, chunk_size=1))
+        self.assertEqual(rows[0], [
+            'response_id', 'candidate', 'email', 'submitted_at', 'overall_score',
+            f'Q{first.id}: Why, "us"?', f'Q{first.id} score', f'Q{second.id}: When?', f'Q{second.id} score',
+        ])
+        self.assertEqual(rows[1][:3] + rows[1][4:], [self.responses[0].id, 'a', 'a@example.com', 4.0, 'Because', 4, 'Now', None])
+        self.assertEqual(rows[2][:3] + rows[2][4:], [self.responses[1].id, 'b', 'b@example.com', None, None, None, None, None])
+
+    def test_csv_and_ndjson(self):
+        lines = list(export_lines(response_rows(self.job), 'csv'))
+        self.assertEqual(len(lines), 3)
+        parsed = list(csv.reader(io.StringIO(''.join(lines))))
+        self.assertEqual(parsed[0][5], f'Q{self.questions[0].id}: Why, "us"?')
+        self.assertEqual(parsed[1][5:], ['Because', '4', 'Now', ''])
+        self.assertEqual(parsed[1][3], self.responses[0].submitted_at.isoformat())
+
+        records = [json.loads(line) for line in export_lines(response_rows(self.job), 'ndjson')]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['overall_score'], 4.0)
+        self.assertIsNone(records[1][f'Q{self.questions[0].id} score'])
+        with self.assertRaises(ValueError):
+            export_lines([], 'xml')
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_responses', self.job.id, '--output', 'ndjson', stdout=out)
+        self.assertEqual([json.loads(line)['email'] for line in out.getvalue().splitlines()], ['a@example.com', 'b@example.com'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, EXPORT_TASK_TIMEOUT_MINUTES=10, EXPORT_MAX_ATTEMPTS=2)
+class ExportWorkerTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        export_root = self.settings(EXPORT_ROOT=root)
+        export_root.enable()
+        self.addCleanup(export_root.disable)
+        employer = Employer.objects.create_user('employer', password='x')
+        self.job = Job.objects.create(employer=employer, title='Python dev', description='d', seniority='Mid')
+        for i in range(3):
+            Candidate.objects.create(job=self.job, name=f'c{i}', email=f'c{i}@example.com')
+
+    def task(self, **fields):
+        return ExportTask.objects.create(job=self.job, kind='candidates', **fields)
+
+    def abandon(self, task):
+        ExportTask.objects.filter(pk=task.pk).update(started_at=timezone.now() - timedelta(minutes=11))
+
+    def test_tasks_are_claimed_once_in_order(self):
+        first, second = self.task(), self.task(file_format='ndjson')
+        claimed = claim_next_task()
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (first.pk, ExportTask.RUNNING, 1))
+        self.assertEqual(claim_next_task().pk, second.pk)
+        self.assertIsNone(claim_next_task())
+
+    def test_run_writes_the_file(self):
+        self.task(file_format='ndjson')
+        self.assertTrue(run_export_task(claim_next_task()))
+        task = ExportTask.objects.get()
+        self.assertEqual((task.status, task.rows_written), (ExportTask.DONE, 3))
+        with gzip.open(task.file_path, 'rt') as lines:
+            self.assertEqual([json.loads(line)['name'] for line in lines], ['c0', 'c1', 'c2'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertFalse(os.path.exists(task.file_path))
+
+    def test_abandoned_task_is_claimed_again(self):
+        self.task()
+        stale = claim_next_task()
+        self.assertIsNone(claim_next_task())
+        self.abandon(stale)
+        retry = claim_next_task()
+        self.assertEqual((retry.pk, retry.attempts), (stale.pk, 2))
+
+        # The first worker finishing late cannot overwrite the retry
+        self.assertFalse(run_export_task(stale))
+        self.assertEqual(ExportTask.objects.get().status, ExportTask.RUNNING)
+        self.assertTrue(run_export_task(retry))
+
+    def test_task_out_of_attempts_fails(self):
+        task = self.task(status=ExportTask.RUNNING, attempts=2)
+        self.abandon(task)
+        self.assertIsNone(claim_next_task())
+        task.refresh_from_db()
+        self.assertEqual(task.status, ExportTask.FAILED)
+        self.assertIn('2 attempts', task.error)
+
+    def test_expired_files_are_removed(self):
+        self.task()
+        run_export_task(claim_next_task())
+        task = ExportTask.objects.get()
+        self.assertEqual(cleanup_expired_exports(), 0)
+        ExportTask.objects.update(finished_at=timezone.now() - timedelta(hours=25))
+        self.assertEqual(cleanup_expired_exports(), 1)
+        self.assertFalse(os.path.exists(task.file_path))
+        self.assertEqual(ExportTask.objects.get().status, ExportTask.EXPIRED)
+
+    def test_command(self):
+        self.task()
+        out = io.StringIO()
+        call_command('run_export_worker', '--once', stdout=out)
+        self.assertIn('done', out.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+        self.job = Job.objects.create(
+            employer=self.employer, title='Senior <Python> developer', description='Django and PostgreSQL', seniority='Senior',
+        )
+        self.approved = ScreeningQuestion.objects.create(job=self.job, text='How do Python decorators work?', is_approved=True)
+        self.draft = ScreeningQuestion.objects.create(job=self.job, text='Python packaging in 2024?')
+        self.template = TemplateQuestion.objects.create(tag='python', template_text='What is the GIL?')
+
+    def hits(self, query, user=None, types=None):
+        return [(hit['type'], hit['id']) for hit in search(query, types, user)]
+
+    def test_match_expression_quotes_words_and_prefixes_the_last(self):
+        self.assertEqual(match_expression('decor "AND* (py'), '"decor" "AND" "py"*')
+        self.assertEqual(match_expression(' -*"'), '')
+        self.assertEqual(self.hits('NEAR( OR'), [])
+
+    def test_prefix_match_and_visibility(self):
+        self.assertEqual(self.hits('decorat', self.employer), [('question', self.approved.id)])
+        self.assertCountEqual(self.hits('python', self.employer), [
+            ('job', self.job.id), ('question', self.approved.id), ('question', self.draft.id),
+            ('template', self.template.id),
+        ])
+        # Anonymous users see approved questions and no templates
+        self.assertCountEqual(self.hits('python'), [('job', self.job.id), ('question', self.approved.id)])
+        other = Employer.objects.create_user('other', password='x')
+        self.assertEqual(self.hits('python', other, ['job', 'question']), [])
+
+    def test_snippets_are_escaped(self):
+        [hit] = search('python', ['job'], self.employer)
+        self.assertEqual(hit['snippet'], 'Senior &lt;<mark>Python</mark>&gt; developer')
+        self.assertEqual(hit['title'], 'Senior <Python> developer')
+
+    def test_index_follows_updates_and_deletes(self):
+        Job.objects.filter(pk=self.job.pk).update(title='Go developer')
+        self.assertEqual(self.hits('golang go', self.employer, ['job']), [])
+        self.assertEqual(self.hits('go', self.employer, ['job']), [('job', self.job.id)])
+        self.draft.delete()
+        self.assertEqual(self.hits('packaging', self.employer), [])
+
+    def test_ensure_triggers_repairs_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER jobsafi_screeningquestion_fts_ai')
+        unindexed = ScreeningQuestion.objects.create(job=self.job, text='Explain asyncio', is_approved=True)
+        self.assertEqual(self.hits('asyncio'), [])
+
+        self.assertEqual(ensure_triggers(), ['question'])
+        self.assertEqual(self.hits('asyncio'), [('question', unindexed.id)])
+        self.assertEqual(ensure_triggers(), [])
+
+
+class TagMatcherTests(TestCase):
+    def test_phrases_match_whole_words(self):
+        matcher = TagMatcher(None, [
+            ('python', 'python'), ('django', 'django'), ('node.js', 'javascript'), ('c++', 'cpp'),
+            ('machine learning', 'ml'), ('learning management', 'lms'), ('react native', 'mobile'),
+        ])
+        self.assertEqual(matcher.match('Python/Django dev, some Node.js'), {'python', 'django', 'javascript'})
+        self.assertEqual(matcher.match('Pythonic code', 'C++ and c#'), {'cpp'})
+        # Overlapping phrases and failure links
+        self.assertEqual(matcher.match('machine learning management'), {'ml', 'lms'})
+        self.assertEqual(matcher.match('react react native'), {'mobile'})
+        self.assertEqual(matcher.match('machine', 'learning'), set())
+        self.assertEqual(matcher.match(None, ''), set())
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TEMPLATE_AUTO_PROPAGATE=False)
+class AutotagTests(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            TemplateQuestion.objects.create(tag='python', template_text='What is a decorator?')
+            TemplateQuestion.objects.create(tag='javascript', template_text='What is a closure?')
+            TagAlias.objects.create(alias=' JS ', tag='JavaScript')
+
+    def job(self, description, **fields):
+        return Job.objects.create(employer=self.employer, title='Dev', description=description, seniority='Mid', **fields)
+
+    def tags(self, job):
+        return sorted(job.tags.names())
+
+    def test_new_jobs_get_template_tags_and_aliases(self):
+        self.assertEqual(self.tags(self.job('Python and JS, pythonic')), ['javascript', 'python'])
+
+    def test_matcher_follows_alias_changes(self):
+        self.assertIs(get_tag_matcher(), get_tag_matcher())
+        with self.captureOnCommitCallbacks(execute=True):
+            TagAlias.objects.create(alias='py', tag='python')
+        self.assertEqual(get_tag_matcher().match('py'), {'python'})
+
+    def test_edits_only_add_tags_of_the_changed_text(self):
+        job = self.job('Python')
+        job.tags.remove('python')
+        job.title = 'Senior dev'
+        job.save()
+        self.assertEqual(self.tags(job), [])
+        job.description = 'Python and JS'
+        job.save()
+        self.assertEqual(self.tags(job), ['javascript'])
+
+    def test_command(self):
+        with self.settings(AUTO_TAG_JOBS=False):
+            job = self.job('js')
+        out = io.StringIO()
+        call_command('autotag_jobs', stdout=out)
+        self.assertIn('Added 1 tags to 1 jobs', out.getvalue())
+        self.assertEqual(self.tags(job), ['javascript'])
+
+
+class NearDuplicateTests(TestCase):
+    texts = {
+        1: 'Describe the Django ORM queryset and migrations',
+        2: 'Explain Django ORM querysets, migrations and admin',
+        3: 'ORM querysets, migrations, admin and signals',
+        4: 'What is the GIL in Python?',
+        5: 'Explain the Python GIL.',
+        6: 'Can you tell us more about it?',
+    }
+
+    def setUp(self):
+        self.index = LSHIndex((pk, minhash_signature(text)) for pk, text in self.texts.items())
+
+    def test_shingles_drop_stopwords_and_fold_plurals(self):
+        self.assertEqual(shingles(self.texts[2]), {'django', 'orm', 'queryset', 'migration', 'admin'})
+        self.assertEqual(minhash_signature(self.texts[6]), b'')
+
+    def test_query(self):
+        signature = minhash_signature('Explain the GIL of Python')
+        self.assertEqual(self.index.query(signature), [(4, 1.0), (5, 1.0)])
+        self.assertEqual(self.index.query(minhash_signature('Explain Rust lifetimes')), [])
+        self.assertEqual(self.index.query(b''), [])
+
+    def test_clusters_are_single_linkage(self):
+        # 1 and 3 are not similar enough, but both are near 2
+        self.assertLess(similarity(self.index.signatures[1], self.index.signatures[3]), 0.6)
+        self.assertEqual(self.index.clusters(0.6), [[1, 2, 3], [4, 5]])
+        self.assertEqual(self.index.clusters(0.9), [[4, 5]])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TEMPLATE_AUTO_PROPAGATE=False)
+class NearDuplicateQuestionTests(TestCase):
+    def setUp(self):
+        employer = Employer.objects.create_user('employer', password='x')
+        self.job = Job.objects.create(employer=employer, title='Dev', description='d', seniority='Mid')
+        self.job.tags.add('python')
+
+    def template(self, text):
+        return TemplateQuestion.objects.create(tag='python', template_text=text)
+
+    def test_generation_skips_near_duplicates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.template('Explain Python decorators')
+            self.template('What are decorators in Python?')
+            self.template('Explain the GIL')
+        ScreeningQuestion.objects.create(job=self.job, text='Tell us about the GIL', is_custom=True)
+        self.assertEqual([question.text for question in auto_generate_questions(self.job)], ['Explain Python decorators'])
+        self.assertEqual(propagate_template(self.template('Python decorators: explain them')), 0)
+
+    def test_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.template('What is the GIL in Python?')
+            second = self.template('Explain the Python GIL.')
+            self.template('Explain decorators')
+        out = io.StringIO()
+        call_command('find_near_duplicates', stdout=out)
+        self.assertIn(f'  {first.id}: [python] What is the GIL in Python?\n  {second.id}:', out.getvalue())
+        self.assertIn('Found 1 clusters', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('find_near_duplicates', '--threshold', '2')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+        self.jobs = [
+            Job.objects.create(employer=self.employer, title=f'Dev {i}', description='d', seniority='Mid') for i in range(2)
+        ]
+        self.questions = [
+            ScreeningQuestion.objects.create(job=job, text=f'Question {i}') for job in self.jobs for i in range(3)
+        ]
+
+    def respond(self, job, email, answers):
+        candidate = Candidate.objects.create(job=job, name='a', email=email)
+        return submit_response(job, candidate, answers)
+
+    def snapshot(self):
+        return (
+            sorted(JobAnalytics.objects.values_list('job_id', *COUNTERS)),
+            sorted(QuestionAnalytics.objects.values_list('question_id', *COUNTERS)),
+            sorted(ScoreBucket.objects.values_list('question_id', 'score', 'count')),
+        )
+
+    def test_incremental_statistics_match_a_rebuild(self):
+        first, second, third = self.questions[:3]
+        responses = [
+            self.respond(self.jobs[0], f'{i}@example.com', [(first.id, 'x'), (second.id, '' if i else 'y')])
+            for i in range(4)
+        ]
+        self.respond(self.jobs[1], 'z@example.com', [(self.questions[3].id, 'z')])
+        answers = list(CandidateAnswer.objects.filter(question=first).order_by('id'))
+        apply_answer_scores(self.jobs[0], {answers[0].id: 4, answers[1].id: 4, answers[2].id: 2})
+
+        # Score changes, a cleared score, and deletes of answers, responses and questions
+        answers[0].score = 5
+        answers[0].save()
+        answers[1].score = None
+        answers[1].save()
+        CandidateAnswer.objects.create(response=responses[3], question=third, answer_text='t', score=3)
+        third_answer = CandidateAnswer.objects.create(response=responses[2], question=third, answer_text='t', score=1)
+        answers[2].delete()
+        third_answer.delete()
+        responses[3].delete()
+        second.delete()
+
+        incremental = self.snapshot()
+        # Nothing is left at zero that a rebuild would not create
+        self.assertFalse(ScoreBucket.objects.filter(count__lte=0).exists())
+        self.assertFalse(QuestionAnalytics.objects.filter(question_id__in=[second.id, third.id]).exists())
+        rebuild_analytics()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_job_analytics(self):
+        question = self.questions[0]
+        for i, score in enumerate((2, 4, None)):
+            response = self.respond(self.jobs[0], f'{i}@example.com', [(question.id, 'x')])
+            response.answers.update(score=score)
+        rebuild_analytics(Job.objects.filter(pk=self.jobs[0].pk))
+        self.jobs[0].refresh_from_db()
+        data = job_analytics(self.jobs[0])
+        self.assertEqual((data['response_count'], data['scored_count'], data['mean_score'], data['score_variance']), (3, 2, 3.0, 1.0))
+        self.assertEqual(data['histogram'], [{'score': 2, 'count': 1}, {'score': 4, 'count': 1}])
+        self.assertEqual(data['questions'][0]['answer_rate'], 1.0)
+        self.assertIsNone(data['questions'][1]['mean_score'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobCounterTests(TestCase):
+    def setUp(self):
+        employer = Employer.objects.create_user('employer', password='x')
+        self.jobs = [
+            Job.objects.create(employer=employer, title=f'Dev {i}', description='d', seniority='Mid') for i in range(3)
+        ]
+        self.question = ScreeningQuestion.objects.create(job=self.jobs[0], text='Why?')
+
+    def counters(self):
+        return list(Job.objects.order_by('id').values_list('candidate_count', 'response_count'))
+
+    def test_counters_match_a_recount(self):
+        first, second, third = self.jobs
+        candidates = [Candidate.objects.create(job=first, name='a', email=f'{i}@example.com') for i in range(3)]
+        for candidate in candidates:
+            submit_response(first, candidate, [(self.question.id, 'x')])
+        submit_response(first, candidates[0], [])
+        lines = [
+            json.dumps({'job': first.id, 'candidate': {'name': 'b', 'email': f'b{i}@example.com'},
+                        'answers': [{'question': self.question.id, 'answer_text': 'y'}]}).encode()
+            for i in range(3)
+        ]
+        list(ingest_responses(lines, chunk_size=2))
+        other = Candidate.objects.create(job=second, name='c', email='c@example.com')
+        CandidateResponse.objects.create(job=second, candidate=other)
+        CandidateResponse.objects.create(job=third, candidate=candidates[1])
+
+        candidates[0].delete()
+        CandidateResponse.objects.filter(candidate=candidates[1], job=first).delete()
+        third.delete()
+
+        incremental = self.counters()
+        self.assertEqual(incremental, [(5, 4), (1, 1)])
+        self.assertEqual(reconcile_job_counters(), 2)
+        self.assertEqual(self.counters(), incremental)
+
+    def test_reconcile_repairs_drifted_counters(self):
+        Candidate.objects.create(job=self.jobs[0], name='a', email='a@example.com')
+        Job.objects.update(candidate_count=7, response_count=-1)
+        out = io.StringIO()
+        call_command('reconcile_job_counters', str(self.jobs[0].id), stdout=out)
+        self.assertIn('Reconciled counters of 1 jobs', out.getvalue())
+        self.assertEqual(self.counters(), [(1, 0), (7, -1), (7, -1)])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, AUTO_TAG_JOBS=False)
+class JobImportTests(TestCase):
+    def setUp(self):
+        self.employer = Employer.objects.create_user('employer', password='x')
+
+    def record(self, i, **extra):
+        return {'title': f'Job {i}', 'description': 'Build Django apps', 'seniority': 'Mid', **extra}
+
+    def test_import_reports_every_record(self):
+        records = [
+            self.record(1, tags=['Python', 'django']),
+            'not an object',
+            self.record(3, tags='go, python'),
+            {'title': 'No description'},
+        ]
+        reports = list(import_jobs(numbered(records), self.employer, chunk_size=2))
+
+        self.assertEqual([report['record'] for report in reports], [1, 2, 3, 4])
+        self.assertEqual([report['status'] for report in reports], ['ok', 'error', 'ok', 'error'])
+        jobs = Job.objects.filter(employer=self.employer).order_by('id')
+        self.assertEqual([job.title for job in jobs], ['Job 1', 'Job 3'])
+        self.assertEqual(sorted(jobs[0].tags.names()), ['django', 'python'])
+        self.assertEqual(sorted(jobs[1].tags.names()), ['go', 'python'])
+
+    def test_import_resumes_after_start(self):
+        records = [self.record(i) for i in range(1, 5)]
+        reports = list(import_jobs(numbered(records), self.employer, start=2))
+        self.assertEqual([report['record'] for report in reports], [3, 4])
+        self.assertEqual(Job.objects.filter(employer=self.employer).count(), 2)
+
+    def test_import_generates_questions(self):
+        # The template index drops its entries when the template commits
+        with self.captureOnCommitCallbacks(execute=True):
+            TemplateQuestion.objects.create(tag='python', template_text='What is a decorator?')
+        reports = list(import_jobs(numbered([self.record(1, tags=['python'])]), self.employer, generate=True))
+        self.assertEqual(reports[0]['questions'], 1)
+        self.assertEqual(Job.objects.get(pk=reports[0]['job_id']).questions.count(), 1)
+
+    def test_import_expires_the_listings_once(self):
+        records = [self.record(i, tags=['python']) for i in range(1, 6)]
+        before = get_version(LISTING_VERSION)
+        with self.captureOnCommitCallbacks(execute=True):
+            list(import_jobs(numbered(records), self.employer, chunk_size=2))
+        self.assertEqual(get_version(LISTING_VERSION), before + 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TEMPLATE_AUTO_PROPAGATE=False)
+class TemplateImportTests(TestCase):
+    def test_upsert_report(self):
+        TemplateQuestion.objects.create(tag='python', template_text='What is a decorator?')
+        TemplateQuestion.objects.create(tag='python', template_text='Explain generators.')
+        records = [
+            {'tag': 'Python', 'template_text': 'What is a decorator'},  # same text, new wording
+            {'tag': 'python', 'template_text': 'Explain generators.'},
+            {'tag': 'Go', 'template_text': 'Explain goroutines.'},
+            {'tag': 'go', 'template_text': 'explain  goroutines'},
+            'not an object',
+            {'tag': 'go'},
+        ]
+        report = import_templates(numbered(records), chunk_size=2)
+
+        self.assertEqual(
+            {key: report[key] for key in ('inserted', 'updated', 'unchanged', 'duplicates')},
+            {'inserted': 1, 'updated': 1, 'unchanged': 1, 'duplicates': 1},
+        )
+        self.assertEqual([error['record'] for error in report['errors']], [5, 6])
+        self.assertEqual(
+            sorted(TemplateQuestion.objects.values_list('tag', 'template_text')),
+            [('go', 'Explain goroutines.'), ('python', 'Explain generators.'), ('python', 'What is a decorator')],
+        )
+
+    def test_import_refreshes_the_template_index(self):
+        self.assertEqual(len(get_template_index().for_tag('go')), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_templates(numbered([{'tag': 'go', 'template_text': 'Explain goroutines.'}]))
+        self.assertEqual(len(get_template_index().for_tag('go')), 1)
+
+    def test_reimported_export_is_unchanged(self):
+        import_templates(numbered([
+            {'tag': 'python', 'template_text': 'What is a decorator?'},
+            {'tag': 'go', 'template_text': 'Explain goroutines.'},
+        ]))
+        exported = TemplateQuestion.objects.values('tag', 'template_text')
+        report = import_templates(numbered(list(exported)))
+        self.assertEqual((report['inserted'], report['updated'], report['unchanged']), (0, 0, 2))
@@ -0,0 +1,34 @@
+import hashlib
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Case-fold and collapse whitespace so trivially different copies match."""
+    return _WHITESPACE.sub(" ", text.casefold()).strip().rstrip("?.!:; ")
+
+
+def text_fingerprint(text):
+    """SHA-256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class SeparatorTable(dict):
+    """
+    str.translate table turning every non-word character into a space.
+
+    Letters and digits are kept, plus the characters in `keep`. Entries are
+    filled lazily, so only characters actually seen are stored.
+    translate() + split() is several times faster than a regex findall.
+    """
+
+    def __init__(self, keep=""):
+        super().__init__()
+        self.keep = keep
+
+    def __missing__(self, code):
+        char = chr(code)
+        value = code if char.isalnum() or char in self.keep else " "
+        self[code] = value
+        return value
@@ -1,30 +1,158 @@
+import logging
+import threading
+from collections import defaultdict
+
+from django.db import connection, transaction
+
 from .models import Job, ScreeningQuestion, TemplateQuestion
+from .neardup import default_threshold, is_near_duplicate
+from .revisions import touch
+from .template_index import get_template_index, normalize_tag
+
+# Jobs are looked up in slices so the IN (...) lists stay well below
+# SQLite's bound-parameter limit when generating for a whole employer.
+JOB_BATCH_SIZE = 500
 
-def auto_generate_questions(job):
+logger = logging.getLogger(__name__)
+
+
+def auto_generate_questions(jobs):
     """
-    Auto-generate screening questions based on job tags and template questions
+    Auto-generate screening questions based on job tags and template questions.
+
+    Accepts a single job or an iterable/queryset of jobs. Templates are read
+    from the in-process tag index, existing questions are compared in memory
+    and the new questions are written with a single bulk insert inside one
+    transaction. Returns the list of created questions.
     """
-    generated_questions = []
-    
-    # Get all tags for this job
-    for tag in job.tags.all():
-        # Find template questions for this tag
-        templates = TemplateQuestion.objects.filter(tag=tag.name.lower())
-        
-        for template in templates:
-            # Check if similar question already exists for this job
-            existing_question = ScreeningQuestion.objects.filter(
-                job=job,
-                text__icontains=template.template_text[:50]  # Partial match
-            ).first()
-            
-            if not existing_question:
-                question = ScreeningQuestion.objects.create(
-                    job=job,
+    if isinstance(jobs, Job):
+        jobs = [jobs]
+    job_ids = [job.pk if isinstance(job, Job) else job for job in jobs]
+
+    new_questions = []
+    with transaction.atomic():
+        for start in range(0, len(job_ids), JOB_BATCH_SIZE):
+            new_questions.extend(_build_questions(job_ids[start:start + JOB_BATCH_SIZE]))
+        ScreeningQuestion.objects.bulk_create(new_questions, batch_size=JOB_BATCH_SIZE)
+        if new_questions:
+            touch(Job.objects.filter(pk__in={question.job_id for question in new_questions}))
+
+    return new_questions
+
+
+def _build_questions(job_ids):
+    """Return unsaved questions for the given jobs, without duplicates."""
+    # Tag names per job, in one query through taggit's TaggedItem
+    job_tags = defaultdict(list)
+    for job_id, tag_name in (
+        Job.objects.filter(pk__in=job_ids, tags__isnull=False)
+        .order_by('pk', 'tags__name')
+        .values_list('pk', 'tags__name')
+    ):
+        job_tags[job_id].append(normalize_tag(tag_name))
+    if not job_tags:
+        return []
+
+    # Templates come from the process-local tag index
+    index = get_template_index()
+
+    # Fingerprints and signatures of existing questions per job, in one query
+    existing = defaultdict(set)
+    signatures = defaultdict(list)
+    for job_id, fingerprint, minhash in ScreeningQuestion.objects.filter(
+        job_id__in=list(job_tags)
+    ).values_list('job_id', 'fingerprint', 'minhash'):
+        existing[job_id].add(fingerprint)
+        signatures[job_id].append(bytes(minhash))
+
+    threshold = default_threshold()
+    questions = []
+    for job_id, tags in job_tags.items():
+        fingerprints = existing[job_id]
+        job_signatures = signatures[job_id]
+        for tag in tags:
+            for template in index.for_tag(tag):
+                # Skip templates the job already has, verbatim or reworded
+                if template.fingerprint in fingerprints:
+                    continue
+                if is_near_duplicate(template.minhash, job_signatures, threshold):
+                    continue
+                fingerprints.add(template.fingerprint)
+                job_signatures.append(template.minhash)
+                questions.append(ScreeningQuestion(
+                    job_id=job_id,
                     text=template.template_text,
+                    fingerprint=template.fingerprint,
+                    minhash=template.minhash,
                     is_custom=False,
                     is_approved=False  # Employer can review and approve
-                )
-                generated_questions.append(question)
-    
-    return generated_questions
\ No newline at end of file
+                ))
+    return questions
+
+
+def propagate_template(template, batch_size=JOB_BATCH_SIZE):
+    """
+    Add one template to every job tagged with its tag that does not have it yet.
+
+    Jobs are found with a single join through taggit's TaggedItem, jobs
+    holding a reworded copy are skipped, and the questions are inserted in
+    batches of `batch_size`, each in its own transaction. Returns the number
+    of jobs the template was added to.
+    """
+    minhash = bytes(template.minhash)
+    threshold = default_threshold()
+    job_ids = list(
+        Job.objects.filter(tags__name__iexact=normalize_tag(template.tag))
+        .exclude(questions__fingerprint=template.fingerprint)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .distinct()
+    )
+
+    added = 0
+    for start in range(0, len(job_ids), batch_size):
+        batch = job_ids[start:start + batch_size]
+        signatures = defaultdict(list)
+        for job_id, signature in ScreeningQuestion.objects.filter(
+            job_id__in=batch
+        ).values_list('job_id', 'minhash'):
+            signatures[job_id].append(bytes(signature))
+        batch = [
+            job_id for job_id in batch
+            if not is_near_duplicate(minhash, signatures[job_id], threshold)
+        ]
+        with transaction.atomic():
+            ScreeningQuestion.objects.bulk_create(
+                [
+                    ScreeningQuestion(
+                        job_id=job_id,
+                        text=template.template_text,
+                        fingerprint=template.fingerprint,
+                        minhash=minhash,
+                        is_custom=False,
+                        is_approved=False,
+                    )
+                    for job_id in batch
+                ],
+                # A concurrent generation may have added it meanwhile
+                ignore_conflicts=True,
+            )
+            touch(Job.objects.filter(pk__in=batch))
+        added += len(batch)
+    return added
+
+
+def propagate_template_in_background(*template_ids):
+    """Run propagate_template for the templates in a worker thread once the transaction commits."""
+    def run():
+        try:
+            for template in TemplateQuestion.objects.filter(pk__in=template_ids).order_by('pk'):
+                # One failing template does not stop the others
+                try:
+                    propagate_template(template)
+                except Exception:
+                    logger.exception("Propagating template %s failed", template.pk)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
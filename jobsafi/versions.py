@@ -0,0 +1,56 @@
+"""
+Shared version counters kept in the database.
+
+Process-local caches remember the version they were built for and compare it
+with the shared counter, so a change made in one worker is noticed by all
+the others without any cross-process messaging.
+
+The counters are CacheVersion rows rather than cache keys: bumping is one
+UPDATE ... SET value = value + 1, which is atomic on every database, and
+rows are never culled. A cache backend would need an atomic incr shared by
+all workers and must never evict a counter, or an invalidation is lost and
+entries built for an old version are served again.
+"""
+import time
+
+from django.db.models import F
+
+from .models import CacheVersion
+
+
+def _initial_version():
+    # Seed from the clock rather than 1 so a counter that is created again
+    # (e.g. rolled back with a test transaction) never restarts at a value
+    # some process has already built against: every bump since the previous
+    # seed took longer than a nanosecond.
+    return time.time_ns()
+
+
+def _create(names):
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(name=name, value=_initial_version()) for name in names],
+        ignore_conflicts=True,
+    )
+
+
+def get_versions(*names):
+    """Return the current values of the named counters, with one query."""
+    values = dict(CacheVersion.objects.filter(name__in=names).values_list("name", "value"))
+    missing = [name for name in names if name not in values]
+    if missing:
+        _create(missing)
+        values.update(CacheVersion.objects.filter(name__in=missing).values_list("name", "value"))
+    return [values[name] for name in names]
+
+
+def get_version(name):
+    """Return the current value of the named counter."""
+    return get_versions(name)[0]
+
+
+def bump_version(name):
+    """Increment the named counter."""
+    if not CacheVersion.objects.filter(name=name).update(value=F("value") + 1):
+        # First use: start a fresh counter
+        _create([name])
+        CacheVersion.objects.filter(name=name).update(value=F("value") + 1)
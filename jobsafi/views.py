@@ -1,49 +1,51 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from .models import Job, Candidate, CandidateResponse, CandidateAnswer
+from django.db import transaction
+from django.http import HttpResponse
+from .models import Job
+from .public_cache import get_or_build
+from .submissions import get_or_create_candidate, submit_response
 
 def home(request):
-    jobs = Job.objects.all().order_by('seniority')
-    context = {"jobs": jobs}
-    return render(request, "jobsafi/home.html", context)
+    def build():
+        jobs = Job.objects.all().order_by('seniority')
+        context = {"jobs": jobs}
+        return render(request, "jobsafi/home.html", context).content
+
+    # The page holds nothing per visitor, so the rendered HTML is cached
+    return HttpResponse(get_or_build("home", request, build))
 
 def job_detail(request, pk):
-    job = get_object_or_404(Job, pk=pk)
-    questions = job.questions.filter(is_approved=True)  # Only show approved questions
-    
     if request.method == 'POST':
+        job = get_object_or_404(Job, pk=pk)
+        questions = job.questions.filter(is_approved=True)  # Only show approved questions
+
         # Process form submission
         candidate_name = request.POST.get('candidate_name')
         candidate_email = request.POST.get('candidate_email')
-        
-        # Create or get candidate
-        candidate, created = Candidate.objects.get_or_create(
-            email=candidate_email,
-            job=job,
-            defaults={'name': candidate_name}
-        )
-        
-        # Create response
-        response = CandidateResponse.objects.create(
-            candidate=candidate,
-            job=job
-        )
-        
-        # Create answers
-        for question in questions:
-            answer_text = request.POST.get(f'answer_{question.id}')
-            if answer_text:
-                CandidateAnswer.objects.create(
-                    response=response,
-                    question=question,
-                    answer_text=answer_text
-                )
+        answers = [
+            (key[len('answer_'):], value)
+            for key, value in request.POST.items()
+            if key.startswith('answer_') and value
+        ]
+
+        with transaction.atomic():
+            candidate = get_or_create_candidate(job, candidate_email, candidate_name)
+            # Only approved questions can be answered from the portal
+            submit_response(job, candidate, answers, questions=questions)
         
         messages.success(request, 'Application submitted successfully!')
         return redirect('job_detail', pk=job.pk)
-    
-    context = {
-        "job": job,
-        "questions": questions,
-    }
-    return render(request, "jobsafi/job_detail.html", context)
\ No newline at end of file
+
+    def build():
+        job = get_object_or_404(Job, pk=pk)
+        questions = job.questions.filter(is_approved=True).order_by('position', 'id')  # Only show approved questions
+        return {
+            "job": job,
+            "questions": list(questions),
+        }
+
+    # The form carries a per-visitor CSRF token and flash messages, so the
+    # data is cached and the page is rendered on every request
+    context = get_or_build("job_detail", request, build, job_id=pk)
+    return render(request, "jobsafi/job_detail.html", context)
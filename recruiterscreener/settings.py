@@ -48,8 +48,16 @@ REST_FRAMEWORK = {
     #"DEFAULT_PERMISSION_CLASSES": [
     #    "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     #   ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
+    "PAGE_SIZE": config('API_PAGE_SIZE', default=50, cast=int),
 }
 
+# Upper bound for ?page_size= on list endpoints
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Build list pages from .values() rows instead of model instances
+API_FAST_LIST_SERIALIZERS = config('API_FAST_LIST_SERIALIZERS', default=True, cast=bool)
+
 ROOT_URLCONF = 'recruiterscreener.urls'
 
 TEMPLATES = [
@@ -83,6 +91,47 @@ DATABASES = {
 
 CONN_MAX_AGE = 300
 
+# Cache of the public pages; the version counters that expire its entries
+# are kept in the database (jobsafi.versions), so any backend will do
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(BASE_DIR, '.django_cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        }
+    }
+}
+
+# Lifetime of cached public pages (board, job pages, anonymous job API);
+# entries are expired exactly by version bumps, 0 disables the cache
+PUBLIC_CACHE_TIMEOUT = config('PUBLIC_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Push added/edited templates to already tagged jobs in a background thread
+# (otherwise run `python manage.py propagate_templates`)
+TEMPLATE_AUTO_PROPAGATE = config('TEMPLATE_AUTO_PROPAGATE', default=False, cast=bool)
+
+# Tag new jobs with template tags (and aliases) found in title/description, and
+# edited jobs with those their changed text brings in
+AUTO_TAG_JOBS = config('AUTO_TAG_JOBS', default=True, cast=bool)
+
+# Estimated word-set similarity above which two questions count as near-duplicates
+NEAR_DUPLICATE_THRESHOLD = config('NEAR_DUPLICATE_THRESHOLD', default=0.6, cast=float)
+
+# Highest score given by auto-scoring (`pip install numpy` to enable it)
+AUTO_SCORE_SCALE = config('AUTO_SCORE_SCALE', default=10, cast=int)
+
+# Records written per transaction by the bulk imports (responses and jobs)
+INGEST_CHUNK_SIZE = config('INGEST_CHUNK_SIZE', default=500, cast=int)
+
+# Background exports (written by `python manage.py run_export_worker`)
+EXPORT_ROOT = config('EXPORT_ROOT', default=os.path.join(BASE_DIR, 'exports'))
+EXPORT_RETENTION_HOURS = config('EXPORT_RETENTION_HOURS', default=24, cast=int)
+# A task still running this long after it was claimed is taken to have lost
+# its worker and is claimed again, up to EXPORT_MAX_ATTEMPTS times in all
+EXPORT_TASK_TIMEOUT_MINUTES = config('EXPORT_TASK_TIMEOUT_MINUTES', default=60, cast=int)
+EXPORT_MAX_ATTEMPTS = config('EXPORT_MAX_ATTEMPTS', default=3, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {